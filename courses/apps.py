@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self) -> None:  # noqa: D102
+        from courses import checks, signals  # noqa: F401, PLC0415
@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from typing import Any
+from collections.abc import Callable
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.conf import settings as django_settings
+from django.core.cache import BaseCache, caches
+from django.utils import timezone
+from rest_framework.request import Request
+
+
+class CatalogCache:
+    '''
+    Versioned cache of serialized catalog pages.
+
+    Every entry key contains the current catalog version, so invalidation is a
+    single increment of the version key: old entries are never read again and
+    expire on their own. The backend is any Django cache alias, which makes the
+    cache per process with LocMemCache and shared between workers with Redis or
+    Memcached. Other workers see an invalidation only through a shared cache,
+    so `courses.checks` requires one when WEB_CONCURRENCY is above 1.
+    '''
+
+    version_key = 'courses:catalog:version'
+    changed_at_key = 'courses:catalog:changed_at'
+    key_prefix = 'courses:catalog'
+    # Upper bound for the keys remembered to tell evictions from cold misses.
+    max_tracked_keys = 10_000
+
+    def __init__(self, alias: str, timeout: int | None) -> None:
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._written: set[str] = set()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @property
+    def cache(self) -> BaseCache:  # noqa: D102
+        return caches[self.alias]
+
+    @property
+    def version(self) -> int:
+        '''Return the current catalog version.'''
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Start from a clock based value, so a lost version key never brings back entries of an old version.
+            self.cache.add(self.version_key, time.time_ns() // 1000, timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    @property
+    def changed_at(self) -> datetime | None:
+        '''Return when the catalog was last invalidated, or None if the cache lost it.'''
+        return self.cache.get(self.changed_at_key)
+
+    def make_key(self, request: Request) -> str:
+        '''Build a key from the request URL: page, filters and ordering are all in the query string.'''
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+        digest = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+        return f'{self.key_prefix}:{self.version}:{digest}'
+
+    def get(self, request: Request) -> Any | None:  # noqa: ANN401
+        '''Return cached page data for the request or None.'''
+        key = self.make_key(request)
+        data = self.cache.get(key)
+        with self._lock:
+            if data is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                if key in self._written:
+                    # Stored by this process for the current version but gone: expired or culled.
+                    self.evictions += 1
+                    self._written.discard(key)
+        return data
+
+    def set(self, request: Request, data: Any) -> None:  # noqa: ANN401
+        '''Store page data for the request.'''
+        key = self.make_key(request)
+        self.cache.set(key, data, timeout=self.timeout)
+        with self._lock:
+            if len(self._written) < self.max_tracked_keys:
+                self._written.add(key)
+
+    def remember(self, name: str, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        '''Return a value computed at most once per catalog version.'''
+        key = f'{self.key_prefix}:{self.version}:{name}'
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def invalidate(self) -> None:
+        '''Drop every cached page by moving the catalog to a new version.'''
+        # Before the version moves: validators computed for the new version see the new time.
+        self.cache.set(self.changed_at_key, timezone.now(), timeout=None)
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, time.time_ns() // 1000, timeout=None)
+        with self._lock:
+            self.invalidations += 1
+            self._written.clear()
+
+    def stats(self) -> dict[str, Any]:
+        '''Return counters of this process.'''
+        version = self.version
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'alias': self.alias,
+                'version': version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+catalog_cache = CatalogCache(
+    alias=django_settings.COURSES_CATALOG_CACHE['ALIAS'],
+    timeout=django_settings.COURSES_CATALOG_CACHE['TIMEOUT'],
+)
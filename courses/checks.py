@@ -0,0 +1,28 @@
+'''
+Configuration checks of the courses app (`manage.py check`).
+
+The catalog cache moves to a new version on every catalog change. Workers
+see that version only through a cache they share: with a per-process cache
+the other workers would serve old pages and validators until they expire.
+'''
+from django.conf import settings as django_settings
+from django.core.checks import CheckMessage, Error, Tags, register
+
+from users.checks import get_process_local_backend
+
+
+@register(Tags.caches)
+def check_catalog_cache(**kwargs) -> list[CheckMessage]:  # noqa: ANN003, ARG001
+    '''Require a shared catalog cache when the server runs several workers.'''
+    alias = django_settings.COURSES_CATALOG_CACHE['ALIAS']
+    backend = get_process_local_backend(alias)
+    if django_settings.WEB_CONCURRENCY <= 1 or backend is None:
+        return []
+    return [
+        Error(
+            f'Catalog cache alias {alias!r} uses {backend}, which is not shared between '
+            f'{django_settings.WEB_CONCURRENCY} workers.',
+            hint='Point CATALOG_CACHE_BACKEND/CATALOG_CACHE_LOCATION to a shared cache such as Redis.',
+            id='courses.E001',
+        ),
+    ]
@@ -0,0 +1,80 @@
+'''
+Catalog filtering and ordering.
+
+Every filter and ordering here is served by an index on `Course` (see its
+Meta and migration 0010), so filtered catalog pages stay index range scans
+instead of full table scans:
+
+    ?author=Name            author = ...                 (author, id)
+    ?title=Intro            title LIKE 'Intro%'          title varchar_pattern_ops
+    ?title_contains=sql     UPPER(title) LIKE '%SQL%'    trigram GIN on UPPER(title)
+    ?price_min=10           price >= 10                  (price, id)
+    ?price_max=99.99        price <= 99.99               (price, id)
+    ?ordering=-price        ORDER BY price DESC, id DESC (price, id)
+
+`?ordering=-completion_count` lists the most completed courses first from
+the denormalized count and its `(completion_count, id)` index. Only the
+fields in the view's `ordering_fields` can be ordered by.
+'''
+from django.db.models import QuerySet
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.request import Request
+from rest_framework.serializers import CharField, DecimalField, Serializer, ValidationError
+from rest_framework.views import APIView
+
+
+class CourseFilterSerializer(Serializer):
+    '''Validates catalog filter query parameters.'''
+
+    author = CharField(required=False)
+    title = CharField(required=False)
+    title_contains = CharField(required=False, min_length=3)
+    price_min = DecimalField(required=False, max_digits=9, decimal_places=2, min_value=0)
+    price_max = DecimalField(required=False, max_digits=9, decimal_places=2, min_value=0)
+
+    lookups = {
+        'author': 'author',
+        'title': 'title__startswith',
+        'title_contains': 'title__icontains',
+        'price_min': 'price__gte',
+        'price_max': 'price__lte',
+    }
+
+    def validate(self, attrs: dict) -> dict:  # noqa: D102
+        if 'price_min' in attrs and 'price_max' in attrs and attrs['price_min'] > attrs['price_max']:
+            raise ValidationError({'price_max': ['Must not be less than price_min.']})
+        return attrs
+
+    def get_filters(self) -> dict[str, object]:
+        '''Return ORM lookups for the validated parameters.'''
+        return {self.lookups[name]: value for name, value in self.validated_data.items()}
+
+
+class CourseFilterBackend(BaseFilterBackend):
+    '''Filter the catalog by author, title and price; invalid values give 400.'''
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view: APIView) -> QuerySet:  # noqa: ARG002, D102
+        query_params = request.query_params
+        params = {name: query_params[name] for name in CourseFilterSerializer.lookups if name in query_params}
+        if not params:
+            return queryset
+        serializer = CourseFilterSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(**serializer.get_filters())
+
+
+class StableOrderingFilter(OrderingFilter):
+    '''
+    `OrderingFilter` that appends the primary key as a tie-breaker.
+
+    Non-unique orderings (price, author) would otherwise let rows move between
+    pages. Only the first requested key is used and the tie-breaker follows its
+    direction, so the whole ORDER BY is one forward or backward scan of a
+    `(key, id)` index.
+    '''
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: APIView) -> list[str]:  # noqa: D102
+        ordering = list(super().get_ordering(request, queryset, view) or ())[:1]
+        if ordering and ordering[0].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
@@ -0,0 +1,65 @@
+import io
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from courses.models import Course
+from courses.serializers import CourseSerializer
+from django_mai.renderers import FastJSONParser, FastJSONRenderer, has_orjson
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF JSONRenderer/JSONParser with the orjson backed pair on CourseSerializer payloads.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--rows', default='20,1000', help='Comma separated payload sizes.')
+        parser.add_argument('--number', type=int, default=0, help='Calls per measurement, 0 to pick by size.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        if not has_orjson():
+            self.stderr.write('orjson is not installed: FastJSONRenderer falls back to the stdlib encoder.')
+        renderers = JSONRenderer(), FastJSONRenderer()
+        parsers = JSONParser(), FastJSONParser()
+
+        self.stdout.write(f'{"rows":>6} {"operation":<8}{"drf, ms":>10}{"fast, ms":>10}{"speedup":>9}{"MB/s":>8}')
+        for rows in (int(n) for n in options['rows'].split(',')):
+            data = {'count': rows, 'next': None, 'previous': None, 'results': self._payload(rows)}
+            body = renderers[0].render(data)
+            if renderers[1].render(data) != body:
+                self.stderr.write(f'{rows} rows: renderer outputs differ.')
+                return
+            number = options['number'] or max(10, 20000 // rows)
+            cases = [
+                ('render', *(lambda r=renderer, d=data: r.render(d) for renderer in renderers)),
+                ('parse', *(lambda p=parser, b=body: p.parse(io.BytesIO(b)) for parser in parsers)),
+            ]
+            for label, before, after in cases:
+                before_ms = min(timeit.repeat(before, number=number, repeat=3)) / number * 1000
+                after_ms = min(timeit.repeat(after, number=number, repeat=3)) / number * 1000
+                throughput = len(body) / after_ms / 1000
+                self.stdout.write(
+                    f'{rows:>6} {label:<8}{before_ms:>10.3f}{after_ms:>10.3f}'
+                    f'{before_ms / after_ms:>8.1f}x{throughput:>8.0f}',
+                )
+
+    def _payload(self, rows: int) -> list:
+        '''Serialize unsaved courses, so the benchmark does not need the database.'''
+        now = timezone.now()
+        courses = [
+            Course(
+                id=i + 1,
+                title=f'Course {i}: введение в предмет',
+                price=Decimal(i % 1000) + Decimal('0.99'),
+                author=f'Author {i % 50}',
+                image=f'courses/{i}.jpg',
+                link=f'https://example.com/courses/{i}/',
+                updated_at=now - timedelta(minutes=i),
+            )
+            for i in range(rows)
+        ]
+        return CourseSerializer(courses, many=True).data
@@ -0,0 +1,99 @@
+import math
+import statistics
+import time
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test.utils import override_settings
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from courses.models import CompletedCourse, Course
+from courses.pagination import KeysetPagination
+
+
+class Command(BaseCommand):
+    help = 'Compare page-number and keyset pagination latency from the first to a deep page.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--model', choices=('course', 'completedcourse'), default='completedcourse')
+        parser.add_argument('--pages', default='1,10,100,1000,10000', help='Comma separated page numbers.')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many rows before measuring. Seeded rows are rolled back afterwards.',
+        )
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            if options['seed']:
+                self._seed(options['model'], options['seed'])
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _seed(self, model: str, rows: int) -> None:
+        courses_count = min(rows, 1000) if model == 'completedcourse' else rows
+        courses = Course.objects.bulk_create(
+            (
+                Course(title=f'Course {i}', price=Decimal(i % 100), author='bench', link='https://example.com/')
+                for i in range(courses_count)
+            ),
+            batch_size=1000,
+        )
+        if model == 'course':
+            return
+        user_model = get_user_model()
+        users = user_model.objects.bulk_create(
+            user_model(username=f'bench-{i}') for i in range(math.ceil(rows / courses_count))
+        )
+        CompletedCourse.objects.bulk_create(
+            (CompletedCourse(user=user, course=course) for user in users for course in courses),
+            batch_size=1000,
+        )
+
+    def _run(self, options: dict) -> None:
+        queryset = (Course if options['model'] == 'course' else CompletedCourse).objects.order_by('id')
+        page_size = options['page_size']
+        factory = APIRequestFactory()
+
+        self.stdout.write(f'{"page":>8} {"page-number, ms":>16} {"keyset, ms":>12}')
+        for page in (int(p) for p in options['pages'].split(',')):
+            offset = (page - 1) * page_size
+            boundary = queryset.values_list('id', flat=True)[offset - 1:offset] if offset else [None]
+            if not boundary:
+                self.stdout.write(f'{page:>8} {"-":>16} {"-":>12}')
+                continue
+
+            page_number = PageNumberPagination()
+            page_number.page_size = page_size
+            page_request = Request(factory.get('/', {'page': page}))
+            numbered = self._measure(page_number, queryset, page_request, options['repeat'])
+
+            keyset = KeysetPagination()
+            keyset.page_size = page_size
+            keyset.base_url = 'http://testserver/'
+            params = {}
+            if boundary[0] is not None:
+                url = keyset.encode_cursor(Cursor(offset=0, reverse=False, position=str(boundary[0])))
+                params = parse_qs(urlparse(url).query)
+            keyset_request = Request(factory.get('/', params))
+            keyed = self._measure(keyset, queryset, keyset_request, options['repeat'])
+
+            self.stdout.write(f'{page:>8} {numbered:>16.2f} {keyed:>12.2f}')
+
+    def _measure(self, paginator, queryset: QuerySet, request: Request, repeat: int) -> float:  # noqa: ANN001
+        '''Return the median wall time of paginating and fetching one page, in milliseconds.'''
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(paginator.paginate_queryset(queryset, request))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
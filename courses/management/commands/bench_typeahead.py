@@ -0,0 +1,47 @@
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from courses.typeahead import PrefixIndex
+from django_mai.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Measure typeahead lookup latency on a synthetic in-memory catalog, without the database.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--courses', type=int, default=100_000)
+        parser.add_argument('--lookups', type=int, default=20_000)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        rng = random.Random(options['seed'])  # noqa: S311
+        vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(20_000)]
+        authors = [' '.join(rng.choices(vocabulary, k=2)).title() for _ in range(5_000)]
+        rows = [
+            (i, ' '.join(rng.choices(vocabulary, k=rng.randint(2, 6))).capitalize(), rng.choice(authors))
+            for i in range(1, options['courses'] + 1)
+        ]
+
+        # Infinite intervals skip the catalog checks: this index is not tied to the database.
+        index = PrefixIndex(check_interval=float('inf'), db_check_interval=float('inf'))
+        started = time.perf_counter()
+        index.load(rows)
+        self.stdout.write(f'built {len(rows)} courses in {time.perf_counter() - started:.2f} s')
+
+        renderer = FastJSONRenderer()
+        queries = [rng.choice(vocabulary)[: rng.randint(1, 6)] for _ in range(options['lookups'])]
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            renderer.render({'results': index.lookup(query, options['limit'])})
+            timings.append((time.perf_counter() - started) * 1e6)
+        quantiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f'lookup + render, us: p50 {quantiles[49]:.1f}, p95 {quantiles[94]:.1f}, '
+            f'p99 {quantiles[98]:.1f}, max {max(timings):.1f}',
+        )
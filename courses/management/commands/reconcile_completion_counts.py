@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Count
+
+from courses.cache import catalog_cache
+from courses.models import CompletedCourse, Course
+
+
+class Command(BaseCommand):
+    help = 'Recompute Course.completion_count from CompletedCourse rows in batches and fix drifted counts.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counts without fixing them.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        batch_size, dry_run = options['batch_size'], options['dry_run']
+        last_id, batches, fixed = 0, 0, 0
+        while True:
+            # One short transaction per batch: rows are locked only while their counts are compared.
+            with transaction.atomic():
+                stored = dict(
+                    Course.objects.filter(id__gt=last_id)
+                    .order_by('id')
+                    .select_for_update()
+                    .values_list('id', 'completion_count')[:batch_size],
+                )
+                if not stored:
+                    break
+                actual = dict(
+                    CompletedCourse.objects.filter(course_id__in=stored)
+                    .order_by()
+                    .values('course_id')
+                    .annotate(count=Count('id'))
+                    .values_list('course_id', 'count'),
+                )
+                drifted = {
+                    course_id: actual.get(course_id, 0)
+                    for course_id, count in stored.items()
+                    if actual.get(course_id, 0) != count
+                }
+                for course_id, count in drifted.items():
+                    self.stdout.write(f'course {course_id}: {stored[course_id]} -> {count}')
+                    if not dry_run:
+                        Course.objects.filter(id=course_id).update(completion_count=count)
+            batches += 1
+            fixed += len(drifted)
+            last_id = max(stored)
+        if fixed and not dry_run:
+            catalog_cache.invalidate()
+        verb = 'drifted' if dry_run else 'fixed'
+        self.stdout.write(f'{batches} batches, {fixed} counts {verb}')
@@ -0,0 +1,50 @@
+from django.db import migrations, transaction
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import Count, Min, Model, Q
+
+
+BATCH_SIZE = 1000
+
+
+def remove_duplicates(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:  # noqa: ARG001
+    '''Keep the oldest row of every (user, course) pair, deleting the rest in short transactions.'''
+    completed_course = apps.get_model('courses', 'CompletedCourse')
+    duplicates = (
+        completed_course.objects.values('user_id', 'course_id')
+        .annotate(keep_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+        .values_list('user_id', 'course_id', 'keep_id')
+        .order_by()
+    )
+    batch = []
+    for duplicate in duplicates.iterator(chunk_size=BATCH_SIZE):
+        batch.append(duplicate)
+        if len(batch) == BATCH_SIZE:
+            delete_batch(completed_course, batch)
+            batch = []
+    if batch:
+        delete_batch(completed_course, batch)
+
+
+def delete_batch(completed_course: type[Model], batch: list[tuple[int, int, int]]) -> None:
+    '''Delete duplicates of one batch of pairs in a single transaction.'''
+    condition = Q()
+    for user_id, course_id, keep_id in batch:
+        condition |= Q(user_id=user_id, course_id=course_id) & ~Q(id=keep_id)
+    with transaction.atomic():
+        completed_course.objects.filter(condition).delete()
+
+
+class Migration(migrations.Migration):
+
+    # Every batch commits on its own, so the table is never locked for the whole run.
+    atomic = False
+
+    dependencies = [
+        ('courses', '0004_rename_completedcourses_completedcourse'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+CONSTRAINT = models.UniqueConstraint(fields=('user', 'course'), name='completedcourse_user_course_uniq')
+
+
+def add_constraint(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Add the unique constraint, building its index without blocking writes on PostgreSQL.'''
+    table, name = quoted_names(apps, schema_editor)
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'CREATE UNIQUE INDEX {name} ON {table} (user_id, course_id)')
+        return
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which ADD CONSTRAINT
+    # ... USING INDEX rejects: drop any leftover of an earlier run and build it again.
+    schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} (user_id, course_id)')
+    schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}')
+
+
+def remove_constraint(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Drop the unique constraint together with its index.'''
+    table, name = quoted_names(apps, schema_editor)
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'DROP INDEX {name}')
+        return
+    schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+
+
+def quoted_names(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> tuple[str, str]:
+    '''Return quoted table and constraint names.'''
+    model = apps.get_model('courses', 'CompletedCourse')
+    return (
+        schema_editor.quote_name(model._meta.db_table),  # noqa: SLF001
+        schema_editor.quote_name(CONSTRAINT.name),
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('courses', '0005_remove_completedcourse_duplicates'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(model_name='completedcourse', constraint=CONSTRAINT),
+            ],
+            database_operations=[
+                migrations.RunPython(add_constraint, remove_constraint),
+            ],
+        ),
+    ]
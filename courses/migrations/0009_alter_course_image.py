@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:26
+
+from django.db import migrations, models
+import images.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_course_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='image',
+            field=models.ImageField(storage=images.storage.images_storage, upload_to='', verbose_name='images'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+INDEXES = (
+    models.Index(fields=('author', 'id'), name='course_author_id_idx'),
+    models.Index(fields=('price', 'id'), name='course_price_id_idx'),
+    models.Index(fields=('title', 'id'), name='course_title_id_idx'),
+    models.Index(fields=('title',), name='course_title_prefix_idx', opclasses=('varchar_pattern_ops',)),
+)
+
+# Serves `UPPER(title::text) LIKE UPPER('%...%')`, i.e. title__icontains. Not part
+# of the model state: GIN and pg_trgm exist on PostgreSQL only.
+TRIGRAM_INDEX = 'course_title_trgm_idx'
+
+
+def add_indexes(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Create the catalog indexes, without blocking writes on PostgreSQL.'''
+    table = quoted_table(apps, schema_editor)
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for index in INDEXES:
+        if index.opclasses and not postgres:
+            continue
+        columns = ', '.join(
+            f'{schema_editor.quote_name(field)} {opclass}'.strip()
+            for field, opclass in zip(index.fields, index.opclasses or ('',) * len(index.fields), strict=True)
+        )
+        name = schema_editor.quote_name(index.name)
+        if postgres:
+            # A failed CONCURRENTLY build leaves an INVALID index behind, which IF NOT EXISTS would keep.
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            schema_editor.execute(f'CREATE INDEX CONCURRENTLY {name} ON {table} ({columns})')
+        else:
+            schema_editor.execute(f'CREATE INDEX {name} ON {table} ({columns})')
+    if postgres:
+        name = schema_editor.quote_name(TRIGRAM_INDEX)
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY {name} ON {table} USING gin (UPPER("title"::text) gin_trgm_ops)',
+        )
+
+
+def remove_indexes(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:  # noqa: ARG001
+    '''Drop the catalog indexes.'''
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    names = [index.name for index in INDEXES if postgres or not index.opclasses]
+    if postgres:
+        names.append(TRIGRAM_INDEX)
+    for name in names:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+def quoted_table(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> str:
+    '''Return the quoted course table name.'''
+    return schema_editor.quote_name(apps.get_model('courses', 'Course')._meta.db_table)  # noqa: SLF001
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('courses', '0009_alter_course_image'),
+    ]
+
+    operations = [
+        # No-op on other backends.
+        TrigramExtension(),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddIndex(model_name='course', index=index) for index in INDEXES],
+            database_operations=[migrations.RunPython(add_indexes, remove_indexes)],
+        ),
+    ]
@@ -0,0 +1,73 @@
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+# Keep in sync with courses.search: 'simple' configuration, title weighted A, author B.
+VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B')"
+)
+FUNCTION = 'courses_course_search_vector'
+TRIGGER = 'courses_course_search_vector'
+INDEX = 'course_search_vector_idx'
+
+
+def add_trigger(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Maintain the search vector with a trigger, fill it for existing rows and index it on PostgreSQL.'''
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = quoted_table(apps, schema_editor)
+    schema_editor.execute(
+        f'CREATE OR REPLACE FUNCTION {FUNCTION}() RETURNS trigger AS $$ '
+        f'BEGIN NEW.search_vector := {VECTOR}; RETURN NEW; END $$ LANGUAGE plpgsql',
+    )
+    # Django writes every column on save(), search_vector included; listing it
+    # recomputes the vector whenever a statement could overwrite it.
+    schema_editor.execute(
+        f'CREATE TRIGGER {TRIGGER} BEFORE INSERT OR UPDATE OF title, author, search_vector ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION {FUNCTION}()',
+    )
+    # Fill existing rows: the trigger computes the vector.
+    schema_editor.execute(f'UPDATE {table} SET search_vector = NULL')  # noqa: S608
+    index = schema_editor.quote_name(INDEX)
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which IF NOT EXISTS would keep.
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY {index} ON {table} USING gin (search_vector)')
+
+
+def remove_trigger(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Drop the index, trigger and function.'''
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = quoted_table(apps, schema_editor)
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX)}')
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS {TRIGGER} ON {table}')
+    schema_editor.execute(f'DROP FUNCTION IF EXISTS {FUNCTION}()')
+
+
+def quoted_table(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> str:
+    '''Return the quoted course table name.'''
+    return schema_editor.quote_name(apps.get_model('courses', 'Course')._meta.db_table)  # noqa: SLF001
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('courses', '0010_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name='search vector',
+            ),
+        ),
+        # The GIN index is not in the model state: it cannot exist on other backends.
+        migrations.RunPython(add_trigger, remove_trigger),
+    ]
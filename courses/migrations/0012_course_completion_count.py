@@ -0,0 +1,67 @@
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+INDEX = models.Index(fields=('completion_count', 'id'), name='course_completion_count_id_idx')
+
+
+def fill_counts(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Count existing completions with one UPDATE.'''
+    course_model = apps.get_model('courses', 'Course')
+    completed_model = apps.get_model('courses', 'CompletedCourse')
+    counts = (
+        completed_model.objects.filter(course_id=models.OuterRef('pk'))
+        .order_by()
+        .values('course_id')
+        .annotate(count=models.Count('id'))
+        .values('count')
+    )
+    course_model.objects.using(schema_editor.connection.alias).update(
+        completion_count=models.functions.Coalesce(models.Subquery(counts), 0),
+    )
+
+
+def add_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Create the popularity index, without blocking writes on PostgreSQL.'''
+    table, name = quoted_names(apps, schema_editor)
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'CREATE INDEX {name} ON {table} (completion_count, id)')
+        return
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which IF NOT EXISTS would keep.
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY {name} ON {table} (completion_count, id)')
+
+
+def remove_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Drop the popularity index.'''
+    _table, name = quoted_names(apps, schema_editor)
+    schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def quoted_names(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> tuple[str, str]:
+    '''Return quoted table and index names.'''
+    model = apps.get_model('courses', 'Course')
+    return schema_editor.quote_name(model._meta.db_table), schema_editor.quote_name(INDEX.name)  # noqa: SLF001
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('courses', '0011_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='completion_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='completion count'),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.AddIndex(model_name='course', index=INDEX)],
+            database_operations=[migrations.RunPython(add_index, remove_index)],
+        ),
+    ]
@@ -1,18 +1,167 @@
-from django.conf import settings as django_settings
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, transaction
+
+from courses.cache import catalog_cache
+from images.storage import images_storage
+from users.cache import progress_cache
 
 
 User = get_user_model()
 
+
+class CourseQuerySet(models.QuerySet):
+    def add_completions(self, course_ids: list[int], delta: int) -> int:
+        '''
+        Shift `completion_count` of the courses by `delta` in one UPDATE.
+
+        The F() expression makes concurrent shifts add up. Counts are shown in
+        catalog pages, so the catalog cache is invalidated on commit when any
+        row changed. `updated_at` stays: it dates the course data itself.
+        '''
+        if not course_ids or not delta:
+            return 0
+        queryset = self.filter(id__in=course_ids)
+        if delta < 0:
+            # Never below zero, even after a drift; reconcile_completion_counts fixes drifts.
+            queryset = queryset.filter(completion_count__gte=-delta)
+        updated = queryset.update(completion_count=models.F('completion_count') + delta)
+        if updated:
+            transaction.on_commit(catalog_cache.invalidate)
+        return updated
+
+
 class Course(models.Model):
     title = models.CharField(verbose_name='titles', blank=False)
     price = models.DecimalField(verbose_name='prices', max_digits=9, decimal_places=2)
     author = models.CharField(verbose_name='authors')
-    image = models.ImageField(verbose_name='images', storage=django_settings.IMAGES_STORAGE)
+    image = models.ImageField(verbose_name='images', storage=images_storage)
+    image_renditions = models.JSONField(verbose_name='image renditions', default=dict, blank=True, editable=False)
     link = models.URLField(verbose_name='links')
+    updated_at = models.DateTimeField(verbose_name='updated at', auto_now=True, db_index=True)
+    # Weighted title and author words, written by a PostgreSQL trigger (courses.search).
+    search_vector = SearchVectorField(verbose_name='search vector', null=True, editable=False)
+    # Number of CompletedCourse rows, kept by courses.signals and the bulk methods below.
+    completion_count = models.PositiveIntegerField(verbose_name='completion count', default=0, editable=False)
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:  # noqa: D106
+        # Catalog filters and ordering (courses.filters). Trailing `id` keeps the
+        # order stable and serves keyset pages within a filter. On PostgreSQL
+        # migration 0010 also adds a trigram index for `title_contains`.
+        indexes = (
+            models.Index(fields=('author', 'id'), name='course_author_id_idx'),
+            models.Index(fields=('price', 'id'), name='course_price_id_idx'),
+            models.Index(fields=('title', 'id'), name='course_title_id_idx'),
+            models.Index(fields=('completion_count', 'id'), name='course_completion_count_id_idx'),
+            # LIKE 'prefix%' on PostgreSQL; other backends ignore opclasses.
+            models.Index(fields=('title',), name='course_title_prefix_idx', opclasses=('varchar_pattern_ops',)),
+        )
+
+
+class CompletedCourseQuerySet(models.QuerySet):
+    STATUS_CREATED = 'created'
+    STATUS_EXISTS = 'exists'
+    STATUS_DELETED = 'deleted'
+    STATUS_NOT_COMPLETED = 'not_completed'
+    STATUS_NOT_FOUND = 'not_found'
+
+    def complete(self, user_id: int, course_ids: list[int]) -> dict[int, str]:
+        '''
+        Mark courses completed by the user with one INSERT and return a status per course id.
+
+        Statuses and counts follow the rows the INSERT actually added, so a
+        concurrent request completing the same course is not counted twice.
+        '''
+        known = set(Course.objects.filter(id__in=course_ids).values_list('id', flat=True))
+        with transaction.atomic(using=self.db):
+            created = self._insert_completions(user_id, [course_id for course_id in course_ids if course_id in known])
+            Course.objects.add_completions(sorted(created), 1)
+            if created:
+                self.invalidate_progress(user_id)
+        statuses = {}
+        for course_id in course_ids:
+            if course_id not in known:
+                statuses[course_id] = self.STATUS_NOT_FOUND
+            elif course_id in created:
+                statuses[course_id] = self.STATUS_CREATED
+            else:
+                statuses[course_id] = self.STATUS_EXISTS
+        return statuses
+
+    def uncomplete(self, user_id: int, course_ids: list[int]) -> dict[int, str]:
+        '''Remove completions of the user with one DELETE and return a status per course id.'''
+        with transaction.atomic(using=self.db):
+            deleted = self._delete_completions(user_id, course_ids)
+            Course.objects.add_completions(sorted(deleted), -1)
+            if deleted:
+                self.invalidate_progress(user_id)
+        return {
+            course_id: self.STATUS_DELETED if course_id in deleted else self.STATUS_NOT_COMPLETED
+            for course_id in course_ids
+        }
+
+    # Both statements send no signals and return the course ids of the rows they
+    # actually changed: the caller shifts the counts with one UPDATE per request.
+    # RETURNING needs PostgreSQL or SQLite 3.35+.
+
+    def _insert_completions(self, user_id: int, course_ids: list[int]) -> set[int]:
+        if not course_ids:
+            return set()
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        sql = (
+            f'INSERT INTO {quote(self.model._meta.db_table)} (user_id, course_id) '  # noqa: S608, SLF001
+            f'VALUES {", ".join(["(%s, %s)"] * len(course_ids))} '
+            'ON CONFLICT DO NOTHING RETURNING course_id'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [param for course_id in course_ids for param in (user_id, course_id)])
+            return {course_id for (course_id,) in cursor.fetchall()}
+
+    def _delete_completions(self, user_id: int, course_ids: list[int]) -> set[int]:
+        if not course_ids:
+            return set()
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        sql = (
+            f'DELETE FROM {quote(self.model._meta.db_table)} '  # noqa: S608, SLF001
+            f'WHERE user_id = %s AND course_id IN ({", ".join(["%s"] * len(course_ids))}) '
+            'RETURNING course_id'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, *course_ids])
+            return {course_id for (course_id,) in cursor.fetchall()}
+
+    def progress(self, user_id: int) -> dict[str, object]:
+        '''Return the number and total price of courses completed by the user with one aggregate query.'''
+        progress = self.filter(user_id=user_id).aggregate(
+            courses_completed=models.Count('id'),
+            total_spent=models.Sum('course__price'),
+        )
+        if progress['total_spent'] is None:
+            progress['total_spent'] = Decimal(0)
+        return progress
+
+    @staticmethod
+    def invalidate_progress(user_id: int) -> None:
+        '''Drop the cached progress summary of the user.'''
+        progress_cache.invalidate(user_id)
+        # A request that read the old completions before the commit may store them again.
+        transaction.on_commit(lambda: progress_cache.invalidate(user_id))
 
 
 class CompletedCourse(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    objects = CompletedCourseQuerySet.as_manager()
+
+    class Meta:  # noqa: D106
+        constraints = (
+            # Also serves per-user listing: the index starts with user_id.
+            models.UniqueConstraint(fields=('user', 'course'), name='completedcourse_user_course_uniq'),
+        )
@@ -0,0 +1,130 @@
+import binascii
+import math
+from base64 import b64decode, b64encode
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from courses.search import Hit
+
+
+class KeysetPagination(CursorPagination):
+    '''
+    Cursor pagination over a unique ordering.
+
+    Does not run COUNT(*) and does not use OFFSET for deep pages: every page is
+    a single `WHERE key > position ORDER BY key LIMIT n` index range scan.
+    The ordering is taken from the view's `keyset_ordering` attribute.
+    '''
+
+    ordering = ('id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request: Request, queryset, view: APIView) -> tuple[str, ...]:  # noqa: ANN001
+        '''Return the view's keyset ordering, falling back to the filter backends' one.'''
+        ordering = getattr(view, 'keyset_ordering', None)
+        if ordering is None:
+            return super().get_ordering(request, queryset, view)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class PaginationModeMixin:
+    '''
+    Allow a client to choose the pagination mode per request.
+
+    `?pagination=cursor` (or any request carrying a `cursor` parameter) switches
+    the view to `keyset_pagination_class`, `?pagination=page` forces
+    `pagination_class`. Without the parameter `default_pagination_mode` is used,
+    so a viewset can opt into keyset pagination by default.
+    '''
+
+    keyset_pagination_class = KeysetPagination
+    keyset_ordering: tuple[str, ...] = ('id',)
+    default_pagination_mode = 'page'
+    pagination_mode_query_param = 'pagination'
+
+    def get_pagination_mode(self) -> str:
+        '''Return `cursor` or `page` for the current request.'''
+        request = getattr(self, 'request', None)
+        if request is None:
+            return self.default_pagination_mode
+        query_params = request.query_params
+        mode = query_params.get(self.pagination_mode_query_param)
+        if mode in ('cursor', 'page'):
+            return mode
+        if self.keyset_pagination_class.cursor_query_param in query_params:
+            return 'cursor'
+        return self.default_pagination_mode
+
+    @property
+    def paginator(self) -> BasePagination | None:
+        '''Return the paginator instance for the selected pagination mode.'''
+        if not hasattr(self, '_paginator'):
+            if self.get_pagination_mode() == 'cursor':
+                pagination_class = self.keyset_pagination_class
+            else:
+                pagination_class = self.pagination_class
+            self._paginator = pagination_class() if pagination_class is not None else None
+        return self._paginator
+
+
+class RankedCursorPagination(BasePagination):
+    '''
+    Forward-only cursor pagination over ranked search hits.
+
+    The cursor is the `(rank, id)` of the last hit on the page, and the next
+    page is fetched as the hits ranked strictly below it, so deep pages cost
+    the same as the first one and concurrent inserts do not shift pages.
+    '''
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request: Request) -> int:
+        '''Return the requested page size, capped by `max_page_size`.'''
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_position(self, request: Request) -> Hit | None:
+        '''Decode the cursor of the request, None for the first page.'''
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            rank, course_id = b64decode(encoded.encode(), validate=True).decode().split(':')
+            position = Hit(float(rank), int(course_id))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if not math.isfinite(position.rank):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def paginate_hits(self, hits: list[Hit], request: Request, page_size: int) -> list[Hit]:
+        '''Return the page from `page_size + 1` fetched hits and remember the next cursor.'''
+        self.request = request
+        page = hits[:page_size]
+        self.next_position = page[-1] if len(hits) > page_size else None
+        return page
+
+    def get_next_link(self) -> str | None:  # noqa: D102
+        if self.next_position is None:
+            return None
+        encoded = b64encode(f'{self.next_position.rank!r}:{self.next_position.course_id}'.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data: list) -> Response:  # noqa: D102
+        return Response({'next': self.get_next_link(), 'results': data})
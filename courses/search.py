@@ -0,0 +1,165 @@
+'''
+Full-text search over course titles and authors.
+
+On PostgreSQL `Course.search_vector` stores
+`setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', author), 'B')`.
+A trigger from migration 0011 keeps it current on every insert and on
+updates of `title` or `author`, and a GIN index serves the `@@` match, so
+a search never recomputes vectors or scans the table.
+
+Other backends (SQLite in tests and local runs) use `InvertedIndexSearch`:
+an in-process token -> {course id: weight} index with the same tokens and
+weights, built from the database on first use and kept current by
+`courses.signals`. It is per process, so it only fits single process runs.
+
+Both backends return `Hit`s ordered by rank, then id, descending, and take
+the last hit of the previous page as the cursor position.
+'''
+import heapq
+import re
+import threading
+from typing import NamedTuple
+
+from django.conf import settings as django_settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import F, Q
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from courses.models import Course
+
+
+# Same as the 'simple' text search configuration: lowercased words.
+TOKEN_RE = re.compile(r'\w+')
+SEARCH_CONFIG = 'simple'
+# ts_rank weights of the 'A' (title) and 'B' (author) labels.
+TITLE_WEIGHT = 1.0
+AUTHOR_WEIGHT = 0.4
+
+
+class Hit(NamedTuple):
+    rank: float
+    course_id: int
+
+
+def tokenize(text: str) -> list[str]:
+    '''Split text into lowercased words.'''
+    return TOKEN_RE.findall(text.lower())
+
+
+class PostgresSearch:
+    '''Ranked `@@` match against the stored, GIN indexed search vector.'''
+
+    def search(self, text: str, after: Hit | None, limit: int) -> list[Hit]:
+        '''Return up to `limit` hits ranked below `after`.'''
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        queryset = Course.objects.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+        if after is not None:
+            queryset = queryset.filter(Q(rank__lt=after.rank) | Q(rank=after.rank, id__lt=after.course_id))
+        return [Hit(*row) for row in queryset.order_by('-rank', '-id').values_list('rank', 'id')[:limit]]
+
+    def update(self, course_id: int, title: str, author: str) -> None:
+        '''Nothing to do: the trigger updates the vector in the same statement.'''
+
+    def remove(self, course_id: int) -> None:
+        '''Nothing to do: the vector is deleted with the row.'''
+
+
+class InvertedIndexSearch:
+    '''
+    In-process inverted index of course titles and authors.
+
+    All words of the query must match. The rank of a course is the sum of the
+    weights of the matched words, so it orders results like ts_rank without
+    reproducing its values.
+    '''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: dict[str, dict[int, float]] | None = None
+        self._documents: dict[int, tuple[str, ...]] = {}
+
+    def reset(self) -> None:
+        '''Forget the index; it is rebuilt from the database on the next search.'''
+        with self._lock:
+            self._postings = None
+            self._documents = {}
+
+    def _build(self) -> dict[str, dict[int, float]]:
+        self._postings = {}
+        rows = Course.objects.values_list('id', 'title', 'author').order_by().iterator(chunk_size=2000)
+        for course_id, title, author in rows:
+            self._add(course_id, title, author)
+        return self._postings
+
+    def _add(self, course_id: int, title: str, author: str) -> None:
+        weights: dict[str, float] = {}
+        for token in tokenize(title):
+            weights[token] = weights.get(token, 0.0) + TITLE_WEIGHT
+        for token in tokenize(author):
+            weights[token] = weights.get(token, 0.0) + AUTHOR_WEIGHT
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[course_id] = weight
+        self._documents[course_id] = tuple(weights)
+
+    def _remove(self, course_id: int) -> None:
+        for token in self._documents.pop(course_id, ()):
+            postings = self._postings[token]
+            postings.pop(course_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def update(self, course_id: int, title: str, author: str) -> None:
+        '''Index a created or changed course.'''
+        with self._lock:
+            if self._postings is not None:
+                self._remove(course_id)
+                self._add(course_id, title, author)
+
+    def remove(self, course_id: int) -> None:
+        '''Drop a deleted course from the index.'''
+        with self._lock:
+            if self._postings is not None:
+                self._remove(course_id)
+
+    def search(self, text: str, after: Hit | None, limit: int) -> list[Hit]:
+        '''Return up to `limit` hits ranked below `after`.'''
+        tokens = set(tokenize(text))
+        if not tokens:
+            return []
+        with self._lock:
+            index = self._postings if self._postings is not None else self._build()
+            postings = sorted((index.get(token, {}) for token in tokens), key=len)
+            # Intersect starting from the rarest word: the work is bounded by its posting list.
+            candidates = [course_id for course_id in postings[0] if all(course_id in p for p in postings[1:])]
+            hits = (Hit(sum(p[course_id] for p in postings), course_id) for course_id in candidates)
+            if after is not None:
+                hits = (hit for hit in hits if hit < after)
+            return heapq.nlargest(limit, hits)
+
+
+_backend: PostgresSearch | InvertedIndexSearch | None = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend() -> PostgresSearch | InvertedIndexSearch:
+    '''Return the backend from COURSES_SEARCH, by default the one matching the database.'''
+    global _backend  # noqa: PLW0603
+    with _backend_lock:
+        if _backend is None:
+            path = django_settings.COURSES_SEARCH['BACKEND']
+            if path:
+                _backend = import_string(path)()
+            else:
+                _backend = PostgresSearch() if connection.vendor == 'postgresql' else InvertedIndexSearch()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting: str, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Drop the backend when COURSES_SEARCH changes in tests.'''
+    global _backend  # noqa: PLW0603
+    if setting == 'COURSES_SEARCH':
+        _backend = None
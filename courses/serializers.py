@@ -1,25 +1,60 @@
-from rest_framework.serializers import ModelSerializer
+from django.contrib.auth import get_user_model
+from rest_framework.serializers import (
+    CurrentUserDefault,
+    HiddenField,
+    IntegerField,
+    ListField,
+    ModelSerializer,
+    Serializer,
+)
 
 from courses.models import CompletedCourse, Course
+from django_mai.serializers import ProjectionMixin
+from images.fields import RenditionStatusField, SrcSetField
 
 
-class CourseSerializer(ModelSerializer):
+User = get_user_model()
+
+
+class CourseSerializer(ProjectionMixin, ModelSerializer):
+    image_srcset = SrcSetField(source='image_renditions')
+    image_status = RenditionStatusField(source='image_renditions')
 
     class Meta:  # noqa: D106
         model = Course
-        fields = '__all__'
+        exclude = ('image_renditions', 'search_vector')
+
+
+class CompletedCourseUserSerializer(ProjectionMixin, ModelSerializer):
+    '''Public part of a user nested into completed course payloads.'''
+
+    avatar_srcset = SrcSetField(source='avatar_renditions')
+
+    class Meta:  # noqa: D106
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'avatar', 'avatar_srcset')
 
 
 class CompletedCourseWriteSerializer(ModelSerializer):
+    user = HiddenField(default=CurrentUserDefault())
 
     class Meta:  # noqa: D106
         model = CompletedCourse
         fields = '__all__'
 
 
-class CompletedCourseReadSerializer(ModelSerializer):
+class CompletedCourseReadSerializer(ProjectionMixin, ModelSerializer):
+    course = CourseSerializer(read_only=True)
+    user = CompletedCourseUserSerializer(read_only=True)
 
     class Meta:  # noqa: D106
-        depth = 1
         model = CompletedCourse
-        fields = '__all__'
+        fields = ('id', 'course', 'user')
+
+
+class CompletedCourseBulkSerializer(Serializer):
+    courses = ListField(child=IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+    def validate_courses(self, value: list[int]) -> list[int]:
+        '''Drop repeated course ids keeping the original order.'''
+        return list(dict.fromkeys(value))
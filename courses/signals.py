@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.cache import catalog_cache
+from courses.models import CompletedCourse, Course
+from courses.search import get_search_backend
+from courses.typeahead import typeahead_index
+from images.renditions import refresh_renditions, release_renditions
+from users.cache import progress_cache
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_catalog_cache(**kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Move the catalog cache to a new version once the change is committed.'''
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+@receiver(post_save, sender=Course)
+def build_image_renditions(instance: Course, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Build resized variants of a newly uploaded course image.'''
+    refresh_renditions(instance, 'image', 'image_renditions')
+
+
+@receiver(post_delete, sender=Course)
+def release_image(instance: Course, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Let the image and its variants be garbage collected once no course uses them.'''
+    release_renditions(instance, 'image', 'image_renditions')
+
+
+@receiver(post_save, sender=Course)
+def index_course(instance: Course, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Update the search and typeahead indexes once the change is committed.'''
+    backend, pk, title, author = get_search_backend(), instance.pk, instance.title, instance.author
+    transaction.on_commit(lambda: backend.update(pk, title, author))
+    transaction.on_commit(lambda: typeahead_index.update(pk, title, author))
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(instance: Course, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Drop a deleted course from the search and typeahead indexes once the deletion is committed.'''
+    backend, pk = get_search_backend(), instance.pk
+    transaction.on_commit(lambda: backend.remove(pk))
+    transaction.on_commit(lambda: typeahead_index.remove(pk))
+
+
+@receiver(post_save, sender=CompletedCourse)
+def count_completion(instance: CompletedCourse, created: bool, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Count a new completion in the course row.'''
+    if created:
+        Course.objects.add_completions([instance.course_id], 1)
+
+
+@receiver(post_delete, sender=CompletedCourse)
+def uncount_completion(instance: CompletedCourse, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Remove a deleted completion from the course count.'''
+    Course.objects.add_completions([instance.course_id], -1)
+
+
+@receiver(post_save, sender=CompletedCourse)
+@receiver(post_delete, sender=CompletedCourse)
+def invalidate_user_progress(instance: CompletedCourse, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Drop the cached progress summary of the user who completed or uncompleted a course.'''
+    CompletedCourse.objects.invalidate_progress(instance.user_id)
+
+
+@receiver(post_save, sender=Course)
+def invalidate_all_progress(created: bool, update_fields: frozenset | None, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Drop every cached progress summary once a course price change is committed.'''
+    if not created and (update_fields is None or 'price' in update_fields):
+        transaction.on_commit(progress_cache.invalidate_all)
@@ -1,3 +1,762 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from courses.cache import CatalogCache, catalog_cache
+from courses.checks import check_catalog_cache
+from courses.filters import CourseFilterBackend, StableOrderingFilter
+from courses.models import CompletedCourse, Course
+from courses.serializers import CourseSerializer
+from courses.typeahead import PrefixIndex, typeahead_index
+from courses.views import CoursesViewSet
+from django_mai import renderers
+
+
+User = get_user_model()
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CompletedCoursesQueryBudgetTests(APITestCase):
+    '''List endpoints must not issue queries per row.'''
+
+    # COUNT(*) + page SELECT for page number pagination, page SELECT for keyset pagination.
+    PAGE_NUMBER_QUERY_BUDGET = 2
+    KEYSET_QUERY_BUDGET = 1
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student', password='password')  # noqa: S106
+        others = [User.objects.create_user(username=f'student-{i}') for i in range(3)]
+        courses = Course.objects.bulk_create(
+            Course(title=f'Course {i}', price=i, author='Author', link='https://example.com/') for i in range(5)
+        )
+        CompletedCourse.objects.bulk_create(
+            CompletedCourse(user=user, course=course) for user in [cls.user, *others] for course in courses
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+
+    def test_page_number_list_query_budget(self) -> None:  # noqa: D102
+        with self.assertNumQueries(self.PAGE_NUMBER_QUERY_BUDGET):
+            response = self.client.get('/api/courses/completedcourses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+
+    def test_keyset_list_query_budget(self) -> None:  # noqa: D102
+        with self.assertNumQueries(self.KEYSET_QUERY_BUDGET):
+            response = self.client.get('/api/courses/completedcourses/', {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+
+    def test_nested_user_has_no_private_fields(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/completedcourses/')
+        user = response.data['results'][0]['user']
+        self.assertNotIn('password', user)
+        self.assertNotIn('groups', user)
+        self.assertEqual(set(user), {'id', 'username', 'first_name', 'last_name', 'avatar', 'avatar_srcset'})
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class PaginationModeTests(APITestCase):
+    '''`?pagination=cursor|page` and the `cursor` parameter select the pagination mode.'''
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.courses = Course.objects.bulk_create(
+            Course(title=f'Course {i}', price=i, author='Author', link='https://example.com/') for i in range(5)
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def test_page_mode_by_default(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([row['id'] for row in response.data['results']], [course.pk for course in self.courses])
+
+    def test_cursor_pages_follow_keyset_ordering(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/', {'pagination': 'cursor', 'page_size': 2})
+        self.assertNotIn('count', response.data)
+        ids = [row['id'] for row in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, [course.pk for course in self.courses])
+
+    def test_cursor_parameter_selects_cursor_mode(self) -> None:  # noqa: D102
+        first = self.client.get('/api/courses/', {'pagination': 'cursor', 'page_size': 2})
+        cursor = parse_qs(urlparse(first.data['next']).query)['cursor'][0]
+        response = self.client.get('/api/courses/', {'cursor': cursor, 'page_size': 2})
+        self.assertNotIn('count', response.data)
+        self.assertEqual([row['id'] for row in response.data['results']], [course.pk for course in self.courses[2:4]])
+
+    def test_page_mode_can_be_forced(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/', {'pagination': 'page', 'cursor': 'ignored'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CompletedCoursesScopeTests(APITestCase):
+    '''Completions are listed per user unless a staff user asks for all of them.'''
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        course = Course.objects.create(title='Course', price=1, author='Author', link='https://example.com/')
+        CompletedCourse.objects.create(user=cls.user, course=course)
+        CompletedCourse.objects.create(user=cls.other, course=course)
+
+    def test_list_is_scoped_to_current_user(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/courses/completedcourses/')
+        self.assertEqual([row['user']['id'] for row in response.data['results']], [self.user.pk])
+
+    def test_scope_all_requires_staff(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/courses/completedcourses/', {'scope': 'all'}).status_code, 403)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/api/courses/completedcourses/', {'scope': 'all'}).data['count'], 2)
+
+    def test_create_uses_current_user_and_rejects_duplicates(self) -> None:  # noqa: D102
+        course = Course.objects.create(title='New', price=1, author='Author', link='https://example.com/')
+        self.client.force_authenticate(self.user)
+        data = {'course': course.pk, 'user': self.other.pk}
+        self.assertEqual(self.client.post('/api/courses/completedcourses/', data).status_code, 201)
+        self.assertTrue(CompletedCourse.objects.filter(user=self.user, course=course).exists())
+        self.assertEqual(self.client.post('/api/courses/completedcourses/', data).status_code, 400)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CompletedCoursesBulkTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.courses = Course.objects.bulk_create(
+            Course(title=f'Course {i}', price=i, author='Author', link='https://example.com/') for i in range(3)
+        )
+        CompletedCourse.objects.create(user=cls.user, course=cls.courses[0])
+
+    def setUp(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_complete(self) -> None:  # noqa: D102
+        ids = [course.pk for course in self.courses]
+        # Course lookup, then one INSERT for every new row and one UPDATE of their counts in a savepoint.
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/courses/completedcourses/bulk/', {'courses': [*ids, 999, ids[1]]}, 'json')
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['exists', 'created', 'created', 'not_found'],
+        )
+        self.assertEqual(CompletedCourse.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            list(Course.objects.order_by('id').values_list('completion_count', flat=True)),
+            [1, 1, 1],
+        )
+
+    def test_bulk_complete_counts_only_inserted_rows(self) -> None:  # noqa: D102
+        course = self.courses[1]
+        raced = []
+
+        def race(execute, sql, params, many, context):  # noqa: ANN001, ANN202
+            # A concurrent request completes the course between the lookup and this INSERT.
+            if sql.startswith('INSERT') and not raced:
+                raced.append(sql)
+                CompletedCourse.objects.create(user=self.user, course=course)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(race):
+            statuses = CompletedCourse.objects.complete(self.user.pk, [course.pk])
+        self.assertEqual(statuses, {course.pk: 'exists'})
+        self.assertEqual(Course.objects.get(pk=course.pk).completion_count, 1)
+
+    def test_bulk_rejects_invalid_ids(self) -> None:  # noqa: D102
+        response = self.client.post('/api/courses/completedcourses/bulk/', {'courses': [0]}, 'json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_uncomplete(self) -> None:  # noqa: D102
+        ids = [self.courses[0].pk, self.courses[1].pk]
+        response = self.client.delete('/api/courses/completedcourses/bulk/', {'courses': ids}, 'json')
+        self.assertEqual([row['status'] for row in response.data['results']], ['deleted', 'not_completed'])
+        self.assertFalse(CompletedCourse.objects.filter(user=self.user).exists())
+        self.assertEqual(Course.objects.get(pk=ids[0]).completion_count, 0)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CompletionCountTests(APITestCase):
+    '''`Course.completion_count` follows completions and orders the catalog by popularity.'''
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.other = User.objects.create_user(username='other')
+        cls.courses = Course.objects.bulk_create(
+            Course(title=f'Course {i}', price=i, author='Author', link='https://example.com/') for i in range(3)
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+
+    def count(self, course: Course) -> int:
+        '''Return the stored count of the course.'''
+        return Course.objects.values_list('completion_count', flat=True).get(pk=course.pk)
+
+    def test_create_and_destroy(self) -> None:  # noqa: D102
+        course = self.courses[0]
+        response = self.client.post('/api/courses/completedcourses/', {'course': course.pk})
+        CompletedCourse.objects.create(user=self.other, course=course)
+        self.assertEqual(self.count(course), 2)
+        self.client.delete(f'/api/courses/completedcourses/{response.data["id"]}/')
+        self.assertEqual(self.count(course), 1)
+
+    def test_completion_cannot_move_to_another_course(self) -> None:  # noqa: D102
+        course, other = self.courses[:2]
+        response = self.client.post('/api/courses/completedcourses/', {'course': course.pk})
+        url = f'/api/courses/completedcourses/{response.data["id"]}/'
+        self.assertEqual(self.client.patch(url, {'course': other.pk}).status_code, 405)
+        self.assertEqual(self.client.put(url, {'course': other.pk}).status_code, 405)
+        self.assertEqual([self.count(course), self.count(other)], [1, 0])
+
+    def test_count_invalidates_catalog_on_commit(self) -> None:  # noqa: D102
+        course = self.courses[0]
+        updated_at = Course.objects.get(pk=course.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            CompletedCourse.objects.create(user=self.user, course=course)
+            CompletedCourse.objects.complete(self.other.pk, [course.pk])
+        self.assertEqual(Course.objects.get(pk=course.pk).updated_at, updated_at)
+        self.assertIn(catalog_cache.invalidate, callbacks)
+        # Nothing to remove: no count changes, the catalog cache stays.
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            CompletedCourse.objects.uncomplete(self.user.pk, [self.courses[1].pk])
+        self.assertNotIn(catalog_cache.invalidate, callbacks)
+
+    def test_balanced_counts_move_validators(self) -> None:  # noqa: D102
+        first, second = self.courses[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            CompletedCourse.objects.complete(self.user.pk, [first.pk])
+        response = self.client.get('/api/courses/')
+        etag, detail_etag = response['ETag'], self.client.get(f'/api/courses/{first.pk}/')['ETag']
+        # +1 and -1: the row count, the total count and every updated_at stay the same.
+        with self.captureOnCommitCallbacks(execute=True):
+            CompletedCourse.objects.complete(self.other.pk, [second.pk])
+            CompletedCourse.objects.uncomplete(self.user.pk, [first.pk])
+        response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([course['completion_count'] for course in response.data['results']], [0, 1, 0])
+        response = self.client.get(f'/api/courses/{first.pk}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        # Last-Modified follows the invalidation, not just updated_at.
+        last_modified = CoursesViewSet.get_catalog_validators()[1]
+        self.assertEqual(last_modified, catalog_cache.changed_at)
+        self.assertGreater(last_modified, max(course.updated_at for course in Course.objects.all()))
+
+    def test_ordering_by_popularity(self) -> None:  # noqa: D102
+        CompletedCourse.objects.complete(self.user.pk, [self.courses[1].pk, self.courses[2].pk])
+        CompletedCourse.objects.complete(self.other.pk, [self.courses[2].pk])
+        response = self.client.get('/api/courses/', {'ordering': '-completion_count'})
+        self.assertEqual(
+            [(row['id'], row['completion_count']) for row in response.data['results']],
+            [(self.courses[2].pk, 2), (self.courses[1].pk, 1), (self.courses[0].pk, 0)],
+        )
+
+    def test_reconcile_fixes_drift(self) -> None:  # noqa: D102
+        CompletedCourse.objects.create(user=self.user, course=self.courses[0])
+        Course.objects.filter(pk=self.courses[0].pk).update(completion_count=5)
+        Course.objects.filter(pk=self.courses[1].pk).update(completion_count=1)
+        out = io.StringIO()
+        call_command('reconcile_completion_counts', '--dry-run', stdout=out)
+        self.assertIn('2 counts drifted', out.getvalue())
+        self.assertEqual(self.count(self.courses[0]), 5)
+        call_command('reconcile_completion_counts', '--batch-size=2', stdout=out)
+        self.assertIn('2 batches, 2 counts fixed', out.getvalue())
+        self.assertEqual([self.count(course) for course in self.courses], [1, 0, 0])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CatalogCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.course = Course.objects.create(title='Course', price=1, author='Author', link='https://example.com/')
+
+    def setUp(self) -> None:  # noqa: D102
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_served_from_cache(self) -> None:  # noqa: D102
+        self.client.get('/api/courses/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_cache_key_includes_query(self) -> None:  # noqa: D102
+        self.client.get('/api/courses/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/courses/', {'pagination': 'cursor'})
+
+    def test_course_change_invalidates_cache(self) -> None:  # noqa: D102
+        self.client.get('/api/courses/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.title = 'Renamed'
+            self.course.save()
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+    def test_invalidation_reaches_other_workers(self) -> None:  # noqa: D102
+        # Two aliases over one cache directory stand for the catalog caches of two worker processes.
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with override_settings(CACHES={**settings.CACHES, 'worker_a': shared, 'worker_b': shared}):
+                worker_a, worker_b = CatalogCache('worker_a', 60), CatalogCache('worker_b', 60)
+                request = Request(APIRequestFactory().get('/api/courses/'))
+                worker_a.set(request, {'count': 1})
+                self.assertEqual(worker_b.get(request), {'count': 1})
+                worker_b.invalidate()
+                self.assertIsNone(worker_a.get(request))
+
+
+class CatalogCacheCheckTests(SimpleTestCase):
+    '''The catalog cache must be shared between several workers.'''
+
+    def test_process_local_cache_is_an_error(self) -> None:  # noqa: D102
+        with override_settings(WEB_CONCURRENCY=3):
+            self.assertEqual([error.id for error in check_catalog_cache()], ['courses.E001'])
+        with override_settings(WEB_CONCURRENCY=1):
+            self.assertEqual(check_catalog_cache(), [])
+
+    def test_shared_cache_passes(self) -> None:  # noqa: D102
+        caches = {'catalog': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis'}}
+        with override_settings(WEB_CONCURRENCY=3, CACHES=caches):
+            self.assertEqual(check_catalog_cache(), [])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CatalogConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.course = Course.objects.create(title='Course', price=1, author='Author', link='https://example.com/')
+
+    def setUp(self) -> None:  # noqa: D102
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self) -> None:  # noqa: D102
+        etag = self.client.get('/api/courses/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_changes_with_catalog(self) -> None:  # noqa: D102
+        etag = self.client.get('/api/courses/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(title='New', price=1, author='Author', link='https://example.com/')
+        response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_not_modified(self) -> None:  # noqa: D102
+        response = self.client.get(f'/api/courses/{self.course.pk}/')
+        response = self.client.get(
+            f'/api/courses/{self.course.pk}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class SparseFieldsetTests(APITestCase):
+    '''`?fields=` and `?omit=` narrow both the response and the SELECT.'''
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.course = Course.objects.create(title='Course', price=1, author='Author', link='https://example.com/')
+        CompletedCourse.objects.create(user=cls.user, course=cls.course)
+
+    def setUp(self) -> None:  # noqa: D102
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def select_of(self, queries: CaptureQueriesContext, table: str) -> str:
+        '''Return the column list of the first SELECT from the table.'''
+        prefix = f'SELECT "{table}"."id"'
+        sql = next(q['sql'] for q in queries if q['sql'].startswith(prefix))
+        return sql.split(' FROM ')[0]
+
+    def test_catalog_fields(self) -> None:  # noqa: D102
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/courses/', {'fields': 'id,title,price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'price'})
+        select = self.select_of(queries, Course._meta.db_table)  # noqa: SLF001
+        self.assertIn('"title"', select)
+        self.assertNotIn('"author"', select)
+        self.assertNotIn('"link"', select)
+
+    def test_catalog_omit(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/', {'omit': 'author,link'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('author', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+
+    def test_detail_fields(self) -> None:  # noqa: D102
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/courses/{self.course.pk}/', {'fields': 'id,title'})
+        self.assertEqual(response.data, {'id': self.course.pk, 'title': 'Course'})
+        self.assertIn('ETag', response)
+
+    def test_unknown_field(self) -> None:  # noqa: D102
+        response = self.client.get('/api/courses/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_completed_courses_without_user(self) -> None:  # noqa: D102
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/courses/completedcourses/', {'fields': 'id,course'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'course'})
+        self.assertEqual(response.data['results'][0]['course']['title'], 'Course')
+        select = self.select_of(queries, CompletedCourse._meta.db_table)  # noqa: SLF001
+        self.assertNotIn(f'"{User._meta.db_table}"', select)  # noqa: SLF001
+
+
+class FastJSONTests(SimpleTestCase):
+    '''FastJSONRenderer and FastJSONParser must be drop-in replacements for the DRF pair.'''
+
+    def setUp(self) -> None:  # noqa: D102
+        course = Course(
+            id=1,
+            title='Café \u2028 line',
+            price=Decimal('10.50'),
+            author='Author',
+            image='courses/1.jpg',
+            link='https://example.com/',
+            updated_at=timezone.now(),
+        )
+        self.data = {
+            'results': CourseSerializer([course], many=True).data,
+            'price': Decimal('1.10'),
+            'day': date(2024, 1, 2),
+            'at': timezone.now(),
+            'message': gettext_lazy('Not found.'),
+            1: 'non-string key',
+        }
+
+    def test_output_matches_drf(self) -> None:  # noqa: D102
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+        self.assertIn(b'\\u2028', expected)
+        for media_type in ('application/json; indent=2', 'application/json; indent=4'):
+            self.assertEqual(
+                renderers.FastJSONRenderer().render(self.data, media_type),
+                JSONRenderer().render(self.data, media_type),
+            )
+
+    def test_stdlib_fallback(self) -> None:  # noqa: D102
+        with mock.patch.object(renderers, 'orjson', None):
+            body = renderers.FastJSONRenderer().render(self.data)
+            self.assertEqual(body, JSONRenderer().render(self.data))
+            self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+    def test_non_finite_floats(self) -> None:  # noqa: D102
+        data = {'results': [{'rating': float('nan')}, {'rating': float('inf')}]}
+        with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+            renderers.FastJSONRenderer().render(data)
+        non_strict = type('NonStrict', (renderers.FastJSONRenderer,), {'strict': False})
+        self.assertEqual(non_strict().render(data), b'{"results":[{"rating":NaN},{"rating":Infinity}]}')
+        self.assertEqual(renderers.FastJSONRenderer().render({'rating': None}), b'{"rating":null}')
+
+    def test_parser(self) -> None:  # noqa: D102
+        body = JSONRenderer().render(self.data)
+        self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        for invalid in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                renderers.FastJSONParser().parse(io.BytesIO(invalid))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CatalogFilterTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        Course.objects.bulk_create(
+            Course(title=title, price=price, author=author, link='https://example.com/')
+            for title, price, author in (
+                ('Intro to SQL', 10, 'Ann'),
+                ('Intro to Python', 30, 'Bob'),
+                ('Advanced SQL', 50, 'Ann'),
+                ('Compilers', 30, 'Eve'),
+            )
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def titles(self, params: dict) -> list[str]:  # noqa: D102
+        response = self.client.get('/api/courses/', params)
+        self.assertEqual(response.status_code, 200)
+        return [course['title'] for course in response.data['results']]
+
+    def test_filters(self) -> None:  # noqa: D102
+        self.assertEqual(self.titles({'author': 'Ann'}), ['Intro to SQL', 'Advanced SQL'])
+        self.assertEqual(self.titles({'title': 'Intro'}), ['Intro to SQL', 'Intro to Python'])
+        self.assertEqual(self.titles({'title_contains': 'sql'}), ['Intro to SQL', 'Advanced SQL'])
+        self.assertEqual(self.titles({'price_min': '20', 'price_max': '30'}), ['Intro to Python', 'Compilers'])
+
+    def test_ordering(self) -> None:  # noqa: D102
+        self.assertEqual(
+            self.titles({'ordering': '-price'}),
+            ['Advanced SQL', 'Compilers', 'Intro to Python', 'Intro to SQL'],
+        )
+        # Not whitelisted: the default ordering is used.
+        self.assertEqual(self.titles({'ordering': 'link'})[0], 'Intro to SQL')
+
+    def test_invalid_filters(self) -> None:  # noqa: D102
+        for params in ({'price_min': 'cheap'}, {'price_min': '50', 'price_max': '10'}, {'title_contains': 'a'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/courses/', params).status_code, 400)
+
+
+class CatalogIndexTests(TestCase):
+    '''Every supported filter and ordering must be an index scan, not a full table scan.'''
+
+    # (query parameters, whether SQLite can serve them from an index too). SQLite
+    # does not use indexes for LIKE with ESCAPE, has no trigram indexes, and
+    # without statistics it estimates an open price range as too wide for one.
+    CASES = (
+        ({'author': 'Ann'}, True),
+        ({'title': 'Intro'}, False),
+        ({'title_contains': 'sql'}, False),
+        ({'price_min': '10'}, False),
+        ({'price_min': '10', 'price_max': '20'}, True),
+        ({'ordering': 'price'}, True),
+        ({'ordering': '-title'}, True),
+        ({'ordering': 'author'}, True),
+        ({'ordering': '-completion_count'}, True),
+    )
+
+    def plan(self, params: dict) -> str:
+        '''Return the query plan of the catalog queryset filtered by the backends.'''
+        view = CoursesViewSet()
+        request = Request(APIRequestFactory().get('/', params))
+        queryset = Course.objects.all()
+        for backend in (CourseFilterBackend, StableOrderingFilter):
+            queryset = backend().filter_queryset(request, queryset, view)
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+        with connection.cursor() as cursor:
+            # The planner prefers a sequential scan of a tiny test table even when an index applies.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def test_index_scans(self) -> None:  # noqa: D102
+        table = Course._meta.db_table  # noqa: SLF001
+        for params, portable in self.CASES:
+            with self.subTest(params=params):
+                if connection.vendor != 'postgresql' and not portable:
+                    self.skipTest('needs PostgreSQL')
+                plan = self.plan(params)
+                if connection.vendor == 'postgresql':
+                    self.assertNotIn('Seq Scan', plan, msg=plan)
+                elif 'ordering' in params:
+                    self.assertIn(f'SCAN {table} USING INDEX', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+                else:
+                    self.assertRegex(plan, rf'SEARCH {table} USING (COVERING )?INDEX')
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], COURSES_SEARCH={'BACKEND': 'courses.search.InvertedIndexSearch'})
+class CourseSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        Course.objects.bulk_create(
+            Course(title=title, price=1, author=author, link='https://example.com/')
+            for title, author in (
+                ('Python for data science', 'Guido'),
+                ('Advanced Python', 'Ann'),
+                ('Data structures', 'Python Guild'),
+                ('Compilers', 'Eve'),
+                ('Python and data', 'Bob'),
+            )
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        self.client.force_authenticate(self.user)
+
+    def search(self, q: str, **params) -> list[str]:  # noqa: ANN003
+        '''Return titles of the first page of results.'''
+        response = self.client.get('/api/courses/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [course['title'] for course in response.data['results']]
+
+    def test_ranking(self) -> None:  # noqa: D102
+        # Title matches (weight A) outrank author matches (weight B); ties go to the newest course.
+        self.assertEqual(
+            self.search('python'),
+            ['Python and data', 'Advanced Python', 'Python for data science', 'Data structures'],
+        )
+        self.assertEqual(self.search('PYTHON data'), ['Python and data', 'Python for data science', 'Data structures'])
+        self.assertEqual(self.search('rust'), [])
+
+    def test_cursor_pages(self) -> None:  # noqa: D102
+        titles, url = [], '/api/courses/search/?q=python&page_size=1&fields=id,title'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'rank'})
+            titles += [course['title'] for course in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, self.search('python'))
+
+    def test_index_follows_changes(self) -> None:  # noqa: D102
+        self.search('python')
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title='Rust in action', price=1, author='Tim', link='https://example.com/')
+        self.assertEqual(self.search('rust'), ['Rust in action'])
+        with self.captureOnCommitCallbacks(execute=True):
+            course.title = 'Go in action'
+            course.save()
+        self.assertEqual(self.search('rust'), [])
+        self.assertEqual(self.search('action'), ['Go in action'])
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertEqual(self.search('action'), [])
+
+    def test_invalid_requests(self) -> None:  # noqa: D102
+        self.assertEqual(self.client.get('/api/courses/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/courses/search/', {'q': 'python', 'cursor': 'bad'}).status_code, 404)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class TypeaheadTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.python, cls.compilers = Course.objects.bulk_create(
+            [
+                Course(title='Python for beginners', price=1, author='Guido', link='https://example.com/'),
+                Course(title='Compilers', price=1, author='Alfred Aho', link='https://example.com/'),
+            ],
+        )
+
+    def setUp(self) -> None:  # noqa: D102
+        typeahead_index.reset()
+        self.client.force_authenticate(self.user)
+
+    def suggest(self, q: str, **params) -> list[str]:  # noqa: ANN003
+        '''Return suggested titles.'''
+        response = self.client.get('/api/courses/typeahead/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [course['title'] for course in response.data['results']]
+
+    def test_prefixes(self) -> None:  # noqa: D102
+        self.assertEqual(self.suggest('pyth'), ['Python for beginners'])
+        self.assertEqual(self.suggest('python FOR b'), ['Python for beginners'])
+        # Any title or author word, case-insensitively.
+        self.assertEqual(self.suggest('Begin'), ['Python for beginners'])
+        self.assertEqual(self.suggest('aho'), ['Compilers'])
+        self.assertEqual(self.suggest(''), [])
+        self.assertEqual(self.suggest('c', limit='1'), ['Compilers'])
+
+    def test_lookup_does_not_query(self) -> None:  # noqa: D102
+        self.suggest('py')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('gui'), ['Python for beginners'])
+
+    def test_index_follows_changes(self) -> None:  # noqa: D102
+        self.suggest('py')
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title='Rust', price=1, author='Steve', link='https://example.com/')
+        self.assertEqual(self.suggest('ru'), ['Rust'])
+        with self.captureOnCommitCallbacks(execute=True):
+            course.title = 'Go'
+            course.save()
+        self.assertEqual(self.suggest('ru'), [])
+        self.assertEqual(self.suggest('st'), ['Go'])
+        with self.captureOnCommitCallbacks(execute=True):
+            course.delete()
+        self.assertEqual(self.suggest('st'), [])
+
+    def test_checks_in_background_once_per_interval(self) -> None:  # noqa: D102
+        index = PrefixIndex(check_interval=0, db_check_interval=60)
+        index.build()
+        with mock.patch('courses.typeahead.threading.Thread') as thread:
+            index.lookup('py', 10)
+            index._checking = False  # noqa: SLF001
+            index._db_checked_at -= 60  # noqa: SLF001
+            index.lookup('py', 10)
+        # The shared version is checked every time, the database once per db_check_interval after the build.
+        calls = [call.kwargs['args'] for call in thread.call_args_list]
+        self.assertEqual(calls, [(index.refresh, False), (index.refresh, True)])
+
+    def test_bumps_shared_version_outside_lock(self) -> None:  # noqa: D102
+        index = PrefixIndex(check_interval=float('inf'), db_check_interval=float('inf'))
+        index.build()
+        bump = index.bump_shared_version
+
+        def foreign_change_then_bump() -> int:
+            self.assertFalse(index._lock.locked())  # noqa: SLF001
+            bump()  # Another process changes the catalog first.
+            return bump()
+
+        with mock.patch.object(index, 'bump_shared_version', foreign_change_then_bump):
+            index.update(self.python.pk, 'Haskell', 'Guido')
+            index.remove(self.compilers.pk)
+        # The foreign change is not in the index, so the next check still rebuilds.
+        self.assertTrue(index.refresh(check_database=False))
+
+    def test_rebuilds_on_foreign_catalog_change(self) -> None:  # noqa: D102
+        # Checks are run directly rather than in background threads.
+        index = PrefixIndex(check_interval=float('inf'), db_check_interval=float('inf'))
+        index.build()
+        self.assertFalse(index.refresh())
+        # Another process renamed a course and moved the shared version.
+        Course.objects.filter(pk=self.python.pk).update(title='Haskell')
+        index.bump_shared_version()
+        self.assertTrue(index.refresh(check_database=False))
+        self.assertEqual([course['title'] for course in index.lookup('hask', 10)], ['Haskell'])
+
+    def test_rebuilds_on_database_change_without_shared_cache(self) -> None:  # noqa: D102
+        # Checks are run directly rather than in background threads.
+        index = PrefixIndex(check_interval=float('inf'), db_check_interval=float('inf'))
+        index.build()
+        # The version key lives in a per-process cache: only the database shows the change.
+        Course.objects.filter(pk=self.python.pk).update(title='Haskell', updated_at=timezone.now())
+        self.assertFalse(index.refresh(check_database=False))
+        self.assertTrue(index.refresh())
+        self.assertEqual([course['title'] for course in index.lookup('hask', 10)], ['Haskell'])
+        Course.objects.filter(pk=self.compilers.pk).delete()
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.lookup('comp', 10), [])
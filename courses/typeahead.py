@@ -0,0 +1,225 @@
+'''
+Typeahead suggestions for the course search box.
+
+`PrefixIndex` keeps sorted `(key, course id)` pairs in memory, where keys are
+the normalized title, the normalized author and every title and author word.
+A lookup is one `bisect` plus a walk over the matching run, so it never
+touches the database and does not depend on the catalog size.
+
+The index is built when the server starts (`warm_up()` from the WSGI/ASGI
+modules) or on the first lookup, and kept current by `courses.signals` for
+changes made in this process. Other processes notice changes in a background
+thread while lookups keep using the old index, and rebuild it:
+
+- every change of a title or author moves a version key in the catalog cache
+  alias (`courses.cache`), checked every `CHECK_INTERVAL` seconds. It is
+  only seen by other workers when that alias is shared between them;
+- so every `DB_CHECK_INTERVAL` seconds the number of courses and their latest
+  `updated_at` are also compared with the ones the index was built from. This
+  catches changes with a per-process cache and writes that bypass signals.
+'''
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+from django.conf import settings as django_settings
+from django.db import connections
+from django.db.models import Count, Max
+
+from courses.cache import catalog_cache
+from courses.models import Course
+from courses.search import tokenize
+
+
+def normalize(text: str) -> str:
+    '''Return text as lowercased words separated by single spaces.'''
+    return ' '.join(tokenize(text))
+
+
+class PrefixIndex:
+    '''Sorted array of course title and author keys searched with bisect.'''
+
+    version_key = 'courses:typeahead:version'
+
+    def __init__(self, check_interval: float, db_check_interval: float) -> None:
+        self.check_interval = check_interval
+        self.db_check_interval = db_check_interval
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys: list[tuple[str, int]] = []
+        self._courses: dict[int, tuple[str, str]] = {}
+        self._built = False
+        self._checking = False
+        self._version: int | None = None
+        self._state: tuple | None = None
+        self._checked_at = self._db_checked_at = 0.0
+
+    @staticmethod
+    def make_keys(title: str, author: str) -> set[str]:
+        '''Return the keys a course is found by.'''
+        words = tokenize(title) + tokenize(author)
+        return {normalize(title), normalize(author), *words} - {''}
+
+    def load(
+        self,
+        rows: Iterable[tuple[int, str, str]],
+        version: int | None = None,
+        state: tuple | None = None,
+    ) -> None:
+        '''Replace the index with `(id, title, author)` rows.'''
+        courses = {course_id: (title, author) for course_id, title, author in rows}
+        keys = sorted(
+            (key, course_id) for course_id, (title, author) in courses.items() for key in self.make_keys(title, author)
+        )
+        with self._lock:
+            self._keys, self._courses, self._version, self._state = keys, courses, version, state
+            self._built = True
+        # The state was just read: the next database check can wait for its interval.
+        self._db_checked_at = time.monotonic()
+
+    @staticmethod
+    def get_catalog_state() -> tuple:
+        '''Return the number of courses and their latest `updated_at`; any catalog change moves one.'''
+        state = Course.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+        return state['count'], state['updated_at']
+
+    def get_shared_version(self) -> int:
+        '''Return the version of course titles and authors shared by all processes.'''
+        cache = catalog_cache.cache
+        version = cache.get(self.version_key)
+        if version is None:
+            # Clock based, so a lost key never matches the version of an old index.
+            cache.add(self.version_key, time.time_ns() // 1000, timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def bump_shared_version(self) -> int:
+        '''Move the shared version after a change of titles or authors.'''
+        try:
+            return catalog_cache.cache.incr(self.version_key)
+        except ValueError:
+            return self.get_shared_version()
+
+    def build(self) -> None:
+        '''Load every course from the database.'''
+        # Read before the rows: a change made during the build is seen by the next check.
+        version, state = self.get_shared_version(), self.get_catalog_state()
+        rows = Course.objects.values_list('id', 'title', 'author').order_by().iterator(chunk_size=2000)
+        self.load(rows, version, state)
+
+    def reset(self) -> None:
+        '''Forget the index; it is rebuilt on the next lookup.'''
+        with self._lock:
+            self._keys, self._courses, self._version, self._state = [], {}, None, None
+            self._built = False
+
+    def ensure_built(self) -> None:
+        '''Build the index unless it is already built; concurrent callers wait for one build.'''
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                self.build()
+
+    def warm_up(self) -> None:
+        '''Build the index in a background thread, e.g. at server start.'''
+        thread = threading.Thread(target=self._in_thread, args=(self.ensure_built,), name='typeahead-warm-up')
+        thread.daemon = True
+        thread.start()
+
+    def _in_thread(self, function: Callable[..., None], *args: object) -> None:
+        try:
+            function(*args)
+        finally:
+            self._checking = False
+            connections.close_all()
+
+    def check_version(self) -> None:
+        '''Start a background check for changes made by other processes, at most once per interval.'''
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval or self._checking:
+            return
+        self._checked_at = now
+        check_database = now - self._db_checked_at >= self.db_check_interval
+        if check_database:
+            self._db_checked_at = now
+        self._checking = True
+        thread = threading.Thread(target=self._in_thread, args=(self.refresh, check_database), name='typeahead-check')
+        thread.daemon = True
+        thread.start()
+
+    def refresh(self, check_database: bool = True) -> bool:
+        '''Rebuild the index if the catalog changed since it was built; return whether it did.'''
+        stale = self.get_shared_version() != self._version
+        if not stale and check_database:
+            stale = self.get_catalog_state() != self._state
+        if stale:
+            with self._build_lock:
+                self.build()
+        return stale
+
+    def update(self, course_id: int, title: str, author: str) -> None:
+        '''Index a created or changed course.'''
+        with self._lock:
+            if self._built and self._courses.get(course_id) == (title, author):
+                return
+        # Outside the lock: the shared cache may be a network round trip away.
+        version = self.bump_shared_version()
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(course_id)
+            self._courses[course_id] = (title, author)
+            for key in self.make_keys(title, author):
+                bisect.insort(self._keys, (key, course_id))
+            self._applied(version)
+
+    def remove(self, course_id: int) -> None:
+        '''Drop a deleted course.'''
+        version = self.bump_shared_version()
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(course_id)
+            self._applied(version)
+
+    def _applied(self, version: int) -> None:
+        # This process has applied its own change: no need to rebuild for it. If another
+        # change took a version in between, leave the index stale for the next check.
+        if self._version == version - 1:
+            self._version = version
+
+    def _remove(self, course_id: int) -> None:
+        course = self._courses.pop(course_id, None)
+        if course is None:
+            return
+        for key in self.make_keys(*course):
+            i = bisect.bisect_left(self._keys, (key, course_id))
+            if i < len(self._keys) and self._keys[i] == (key, course_id):
+                del self._keys[i]
+
+    def lookup(self, prefix: str, limit: int) -> list[dict[str, object]]:
+        '''Return up to `limit` courses with a key starting with `prefix`, in key order.'''
+        prefix = normalize(prefix)
+        if not prefix or limit < 1:
+            return []
+        self.ensure_built()
+        self.check_version()
+        found: dict[int, tuple[str, str]] = {}
+        with self._lock:
+            keys, courses = self._keys, self._courses
+            i = bisect.bisect_left(keys, (prefix,))
+            while i < len(keys) and len(found) < limit:
+                key, course_id = keys[i]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(course_id, courses[course_id])
+                i += 1
+        return [{'id': course_id, 'title': title, 'author': author} for course_id, (title, author) in found.items()]
+
+
+typeahead_index = PrefixIndex(
+    check_interval=django_settings.COURSES_TYPEAHEAD['CHECK_INTERVAL'],
+    db_check_interval=django_settings.COURSES_TYPEAHEAD['DB_CHECK_INTERVAL'],
+)
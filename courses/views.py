@@ -1,23 +1,168 @@
-from rest_framework.permissions import IsAuthenticated
+from datetime import datetime
+
+from django.db.models import Count, Max, QuerySet
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework.viewsets import ModelViewSet
 
-from courses.models import CompletedCourse
-from courses.serializers import CompletedCourseReadSerializer, CompletedCourseWriteSerializer, CourseSerializer
+from courses.cache import catalog_cache
+from courses.filters import CourseFilterBackend, StableOrderingFilter
+from courses.models import CompletedCourse, Course
+from courses.pagination import PaginationModeMixin, RankedCursorPagination
+from courses.search import get_search_backend
+from courses.serializers import (
+    CompletedCourseBulkSerializer,
+    CompletedCourseReadSerializer,
+    CompletedCourseWriteSerializer,
+    CourseSerializer,
+)
+from courses.typeahead import typeahead_index
+from django_mai.conditional import conditional_response, latest, make_etag, set_validators
+from django_mai.serializers import SparseFieldsetMixin
 
 
-class CoursesViewSet(ModelViewSet):
+class CoursesViewSet(SparseFieldsetMixin, PaginationModeMixin, ModelViewSet):
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
     queryset = serializer_class.Meta.model.objects.all()
+    keyset_ordering = ('id',)
+    projection_extra = ('updated_at', 'completion_count')
+    # Page number mode only: cursor pages are always ordered by keyset_ordering.
+    filter_backends = (CourseFilterBackend, StableOrderingFilter)
+    ordering_fields = ('id', 'title', 'author', 'price', 'completion_count')
+    ordering = ('id',)
+    typeahead_limit = 10
+    typeahead_max_limit = 50
+
+    def list(self, request: Request, *args, **kwargs) -> Response:  # noqa: ANN002, ANN003
+        '''Return a catalog page, serving it from the catalog cache when possible.'''
+        etag, last_modified = catalog_cache.remember('validators', self.get_catalog_validators)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        data = catalog_cache.get(request)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = super().list(request, *args, **kwargs)
+            catalog_cache.set(request, response.data)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:  # noqa: ANN002, ANN003, ARG002
+        '''Return a course, or 304 if the client has its current version.'''
+        instance = self.get_object()
+        etag = make_etag(instance.pk, instance.updated_at.isoformat(), instance.completion_count)
+        # The completion count changes without `updated_at`; every change of it invalidates the catalog.
+        last_modified = latest(instance.updated_at, catalog_cache.changed_at)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(self.get_serializer(instance).data), etag, last_modified)
+
+    @staticmethod
+    def get_catalog_validators() -> tuple[str, datetime | None]:
+        '''
+        Build catalog validators from the catalog version, the row count and the last change time.
+
+        Completion counts move the catalog version but not `updated_at`, so the
+        ETag includes the version and Last-Modified is the later of the last
+        update and the last invalidation.
+        '''
+        stats = Course.objects.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        last_modified = latest(stats['last_modified'], catalog_cache.changed_at)
+        etag = make_etag(catalog_cache.version, stats['count'], last_modified.isoformat() if last_modified else None)
+        return etag, last_modified
+
+    @action(detail=False, filter_backends=())
+    def search(self, request: Request) -> Response:
+        '''
+        Return courses matching `?q=` by title and author words, best ranked first.
 
+        Pages are fetched with `?cursor=` from the `next` link; `?fields=` and
+        `?omit=` apply to the courses as in the catalog.
+        '''
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': ['This field is required.']})
+        paginator = RankedCursorPagination()
+        page_size = paginator.get_page_size(request)
+        hits = get_search_backend().search(text, paginator.get_position(request), page_size + 1)
+        page = paginator.paginate_hits(hits, request, page_size)
+        courses = self.get_queryset().in_bulk([hit.course_id for hit in page])
+        # A hit may outlive its course for a moment: the index is updated on commit.
+        page = [hit for hit in page if hit.course_id in courses]
+        data = self.get_serializer([courses[hit.course_id] for hit in page], many=True).data
+        for item, hit in zip(data, page, strict=True):
+            item['rank'] = hit.rank
+        return paginator.get_paginated_response(data)
 
-class CompletedCoursesViewSet(ModelViewSet):
+    @action(detail=False, filter_backends=())
+    def typeahead(self, request: Request) -> Response:
+        '''
+        Return courses whose title, author or one of their words starts with `?q=`.
+
+        Served from the in-memory prefix index without database queries, for a
+        request per keystroke. `?limit=` caps the suggestions (default 10, at most 50).
+        '''
+        try:
+            limit = min(int(request.query_params.get('limit', self.typeahead_limit)), self.typeahead_max_limit)
+        except ValueError:
+            limit = self.typeahead_limit
+        return Response({'results': typeahead_index.lookup(request.query_params.get('q', ''), limit)})
+
+    @action(detail=False, url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request: Request) -> Response:  # noqa: ARG002
+        '''Return catalog cache counters of the worker process that serves the request.'''
+        return Response(catalog_cache.stats())
+
+
+class CompletedCoursesViewSet(SparseFieldsetMixin, PaginationModeMixin, ModelViewSet):
     def get_serializer_class(self) -> type[ModelSerializer]:
         '''Return serializer class by HTTP method.'''
+        if self.action == 'bulk':
+            return CompletedCourseBulkSerializer
         if self.request.method == 'GET':
             return CompletedCourseReadSerializer
         return CompletedCourseWriteSerializer
 
+    def get_queryset(self) -> QuerySet:
+        '''
+        Return completions of the current user.
+
+        Staff users may pass `?scope=all` to get completions of every user.
+        Read requests get nested objects joined by SparseFieldsetMixin.
+        '''
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        if self.request.query_params.get('scope') == 'all':
+            if not self.request.user.is_staff:
+                raise PermissionDenied
+        else:
+            queryset = queryset.filter(user_id=self.request.user.pk)
+        return queryset
+
     permission_classes = [IsAuthenticated]
-    queryset = CompletedCourse.objects.all()
+    # No PUT/PATCH: a completion is only its course, and moving it would bypass course.completion_count.
+    http_method_names = ('get', 'post', 'delete', 'head', 'options')
+    # Stable page contents under page number pagination; keyset pages order by keyset_ordering.
+    queryset = CompletedCourse.objects.order_by('id')
+    keyset_ordering = ('id',)
+
+    @action(detail=False, methods=['post', 'delete'])
+    def bulk(self, request: Request) -> Response:
+        '''Mark (POST) or unmark (DELETE) a list of courses as completed by the current user.'''
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course_ids = serializer.validated_data['courses']
+        if request.method == 'POST':
+            statuses = CompletedCourse.objects.complete(request.user.pk, course_ids)
+        else:
+            statuses = CompletedCourse.objects.uncomplete(request.user.pk, course_ids)
+        results = [{'course': course_id, 'status': status} for course_id, status in statuses.items()]
+        return Response({'results': results})
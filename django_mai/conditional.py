@@ -0,0 +1,59 @@
+'''
+Conditional GET helpers for API views.
+
+Views compute a cheap validator (ETag and Last-Modified) before serializing
+anything and answer `304 Not Modified` when the client already has the body.
+'''
+import hashlib
+from datetime import datetime
+
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+
+
+def make_etag(*parts: object) -> str:
+    '''Return a quoted ETag built from the given parts.'''
+    digest = hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+def latest(*times: datetime | None) -> datetime | None:
+    '''Return the latest of the given times, skipping None.'''
+    return max((time for time in times if time is not None), default=None)
+
+
+def conditional_response(
+    request: Request,
+    etag: str | None = None,
+    last_modified: datetime | None = None,
+    vary: tuple[str, ...] = (),
+) -> HttpResponseBase | None:
+    '''Return a 304 (or 412) response if the request preconditions match the validators, else None.'''
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified, vary)
+    return response
+
+
+def set_validators(
+    response: HttpResponseBase,
+    etag: str | None = None,
+    last_modified: datetime | None = None,
+    vary: tuple[str, ...] = (),
+) -> HttpResponseBase:
+    '''Set ETag, Last-Modified and Vary headers on the response.'''
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
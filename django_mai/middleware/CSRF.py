@@ -4,17 +4,20 @@ Cross Site Request Forgery Middleware.
 This module provides a middleware that implements protection
 against request forgeries from other sites.
 """
+import functools
 import logging
+import secrets
 import string
 from collections import defaultdict
-from urllib.parse import urlparse
+from collections.abc import Iterable
+from urllib.parse import ParseResult, urlparse
 
 from django.conf import settings
 from django.core.exceptions import DisallowedHost, ImproperlyConfigured
 from django.http import HttpHeaders, UnreadablePostError
 from django.urls import get_callable
 from django.utils.cache import patch_vary_headers
-from django.utils.crypto import constant_time_compare, get_random_string
+from django.utils.crypto import constant_time_compare
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.functional import cached_property
 from django.utils.http import is_same_domain
@@ -51,23 +54,53 @@ def _get_failure_view():
     return get_callable(settings.CSRF_FAILURE_VIEW)
 
 
-def _get_new_csrf_string():
-    return get_random_string(CSRF_SECRET_LENGTH, allowed_chars=CSRF_ALLOWED_CHARS)
+# Masking works on character indexes in CSRF_ALLOWED_CHARS. Strings are
+# converted with bytes.translate() and added or subtracted as big integers:
+# every index is below 62, so per-byte sums stay below 256 and never carry
+# into the neighbouring byte. All steps run in C with no per-character
+# branches, so their cost does not depend on the token contents.
+_CHARS_COUNT = len(CSRF_ALLOWED_CHARS)
+_TO_INDEX = bytes(
+    CSRF_ALLOWED_CHARS.find(chr(byte)) % 256 for byte in range(256)
+)
+_FROM_INDEX = bytes(
+    ord(CSRF_ALLOWED_CHARS[byte % _CHARS_COUNT]) for byte in range(256)
+)
+# Adding _CHARS_COUNT to every index before subtracting keeps each byte
+# non-negative, so the subtraction doesn't borrow either.
+_OFFSET = int.from_bytes(bytes([_CHARS_COUNT]) * CSRF_SECRET_LENGTH, 'big')
+# Random bytes at or above this bound are rejected so that the remaining
+# ones map uniformly onto the alphabet.
+_RANDOM_LIMIT = 256 - 256 % _CHARS_COUNT
+_RANDOM_REJECTED = bytes(range(_RANDOM_LIMIT, 256))
+
+
+def _get_new_csrf_string() -> str:
+    '''Return a random string of CSRF_SECRET_LENGTH allowed characters.'''
+    chars = b''
+    while len(chars) < CSRF_SECRET_LENGTH:
+        chars += secrets.token_bytes(CSRF_SECRET_LENGTH + 8).translate(_FROM_INDEX, _RANDOM_REJECTED)
+    return chars[:CSRF_SECRET_LENGTH].decode('ascii')
+
 
+def _to_index(value: str) -> int:
+    return int.from_bytes(value.encode('ascii').translate(_TO_INDEX), 'big')
 
-def _mask_cipher_secret(secret):
+
+def _from_index(value: int) -> str:
+    return value.to_bytes(CSRF_SECRET_LENGTH, 'big').translate(_FROM_INDEX).decode('ascii')
+
+
+def _mask_cipher_secret(secret: str) -> str:
     """
     Given a secret (assumed to be a string of CSRF_ALLOWED_CHARS), generate a
     token by adding a mask and applying it to the secret.
     """
     mask = _get_new_csrf_string()
-    chars = CSRF_ALLOWED_CHARS
-    pairs = zip((chars.index(x) for x in secret), (chars.index(x) for x in mask))
-    cipher = "".join(chars[(x + y) % len(chars)] for x, y in pairs)
-    return mask + cipher
+    return mask + _from_index(_to_index(secret) + _to_index(mask))
 
 
-def _unmask_cipher_token(token):
+def _unmask_cipher_token(token: str) -> str:
     """
     Given a token (assumed to be a string of CSRF_ALLOWED_CHARS, of length
     CSRF_TOKEN_LENGTH, and that its first half is a mask), use it to decrypt
@@ -75,9 +108,64 @@ def _unmask_cipher_token(token):
     """
     mask = token[:CSRF_SECRET_LENGTH]
     token = token[CSRF_SECRET_LENGTH:]
-    chars = CSRF_ALLOWED_CHARS
-    pairs = zip((chars.index(x) for x in token), (chars.index(x) for x in mask))
-    return "".join(chars[x - y] for x, y in pairs)  # Note negative values are ok
+    return _from_index(_to_index(token) + _OFFSET - _to_index(mask))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_url(url: str) -> ParseResult:
+    '''
+    Cached urlparse() for Origin and Referer values.
+
+    Clients send the same few values over and over, and the cache is bounded
+    so that unique values from a misbehaving client only evict each other.
+    '''
+    return urlparse(url)
+
+
+class DomainMatcher:
+    '''
+    Match hosts against patterns in the form accepted by is_same_domain().
+
+    A pattern is an exact host, or a host with a leading dot that also
+    matches all of its subdomains. Exact hosts go into a set. Wildcard
+    patterns go into a trie keyed by labels from right to left, so a lookup
+    walks at most one node per label of the host, however many patterns are
+    configured.
+    '''
+
+    _END = object()
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.exact: set[str] = set()
+        self.trie: dict = {}
+        for pattern in patterns:
+            # Like is_same_domain(), lowercase the pattern but not the host.
+            domain = pattern.lower()
+            if not domain:
+                continue
+            if not domain.startswith('.'):
+                self.exact.add(domain)
+            else:
+                node = self.trie
+                for label in reversed(domain[1:].split('.')):
+                    node = node.setdefault(label, {})
+                node[self._END] = True
+
+    def __bool__(self) -> bool:  # noqa: D105
+        return bool(self.exact or self.trie)
+
+    def __call__(self, host: str) -> bool:
+        '''Tell whether the host matches any pattern.'''
+        if host in self.exact:
+            return True
+        node = self.trie
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
 
 
 def _add_new_csrf_cookie(request):
@@ -202,6 +290,16 @@ class CsrfViewMiddleware(MiddlewareMixin):
             allowed_origin_subdomains[parsed.scheme].append(parsed.netloc.lstrip("*"))
         return allowed_origin_subdomains
 
+    @cached_property
+    def origin_subdomain_matchers(self) -> dict[str, DomainMatcher]:
+        '''A mapping of allowed schemes to a DomainMatcher of their netlocs.'''
+        return {scheme: DomainMatcher(hosts) for scheme, hosts in self.allowed_origin_subdomains.items()}
+
+    @cached_property
+    def referer_matcher(self) -> DomainMatcher:
+        '''A DomainMatcher of the hosts in CSRF_TRUSTED_ORIGINS.'''
+        return DomainMatcher(self.csrf_trusted_origins_hosts)
+
     # The _accept and _reject methods currently only exist for the sake of the
     # requires_csrf_token decorator.
     def _accept(self, request):
@@ -288,16 +386,14 @@ class CsrfViewMiddleware(MiddlewareMixin):
                 return True
         if request_origin in self.allowed_origins_exact:
             return True
+        if not self.origin_subdomain_matchers:
+            return False
         try:
-            parsed_origin = urlparse(request_origin)
+            parsed_origin = _parse_url(request_origin)
         except ValueError:
             return False
-        request_scheme = parsed_origin.scheme
-        request_netloc = parsed_origin.netloc
-        return any(
-            is_same_domain(request_netloc, host)
-            for host in self.allowed_origin_subdomains.get(request_scheme, ())
-        )
+        matcher = self.origin_subdomain_matchers.get(parsed_origin.scheme)
+        return matcher is not None and matcher(parsed_origin.netloc)
 
     def _check_referer(self, request):
         referer = request.META.get("HTTP_REFERER")
@@ -305,7 +401,7 @@ class CsrfViewMiddleware(MiddlewareMixin):
             raise RejectRequest(REASON_NO_REFERER)
 
         try:
-            referer = urlparse(referer)
+            referer = _parse_url(referer)
         except ValueError:
             raise RejectRequest(REASON_MALFORMED_REFERER)
 
@@ -317,10 +413,7 @@ class CsrfViewMiddleware(MiddlewareMixin):
         if referer.scheme != "https":
             raise RejectRequest(REASON_INSECURE_REFERER)
 
-        if any(
-            is_same_domain(referer.netloc, host)
-            for host in self.csrf_trusted_origins_hosts
-        ):
+        if self.referer_matcher(referer.netloc):
             return
         # Allow matching the configured cookie domain.
         good_referer = (
@@ -0,0 +1,111 @@
+'''
+JSON renderer and parser backed by orjson.
+
+Drop-in replacements for DRF's `JSONRenderer` and `JSONParser`: the same
+media type and output, produced by orjson when it is installed. Types
+orjson does not know natively (`Decimal`, lazy translation strings,
+datetimes, querysets, ...) are converted by DRF's own `JSONEncoder`, so
+they render exactly as before. Whenever orjson is missing or cannot
+produce identical output (ASCII-only output, indents other than 2, a
+non UTF-8 request body, NaN or Infinity, which orjson writes as null)
+the stdlib path of the DRF base class is used.
+'''
+import math
+from typing import Any
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by the stdlib fallback
+    orjson = None
+
+
+# DRF JSONRenderer escapes these so that the output is also valid JavaScript.
+UNSAFE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+UTF8_NAMES = frozenset(('utf-8', 'utf8'))
+
+
+def has_orjson() -> bool:
+    '''Return whether the orjson backend is available.'''
+    return orjson is not None
+
+
+def has_non_finite(data: Any) -> bool:  # noqa: ANN401
+    '''Return whether `data` holds a NaN or infinite float.'''
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, Mapping):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, list | tuple):
+        return any(has_non_finite(item) for item in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''`JSONRenderer` that encodes with orjson when it can.'''
+
+    # DRF's encoder converts whatever orjson hands back, datetimes included,
+    # to keep its formatting (e.g. millisecond precision and "Z").
+    encoder = JSONEncoder()
+
+    def render(
+        self,
+        data: Any,  # noqa: ANN401
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        '''Render `data` into JSON bytes.'''
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=option)
+        except orjson.JSONEncodeError:
+            # E.g. integers beyond 64 bits, which the stdlib encodes.
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'null' in ret and has_non_finite(data):
+            # The stdlib rejects them in strict mode and writes NaN/Infinity otherwise.
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in UNSAFE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    '''`JSONParser` that decodes UTF-8 bodies with orjson.'''
+
+    renderer_class = FastJSONRenderer
+
+    def parse(
+        self,
+        stream: Any,  # noqa: ANN401
+        media_type: str | None = None,
+        parser_context: Mapping[str, Any] | None = None,
+    ) -> Any:  # noqa: ANN401
+        '''Parse the request body as JSON.'''
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        # orjson always rejects NaN and Infinity, as the strict stdlib parser does.
+        if orjson is None or not self.strict or encoding.lower() not in UTF8_NAMES:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            msg = f'JSON parse error - {exc}'
+            raise ParseError(msg) from exc
@@ -0,0 +1,148 @@
+'''
+Serializer projections: sparse fieldsets and the columns they need.
+
+A serializer with `ProjectionMixin` accepts `fields=` and `omit=` to output
+only some of its fields, and reports the model columns its remaining fields
+read, so a view can load exactly those with `QuerySet.only()`. Nested model
+serializers with the mixin are joined with `select_related()` and projected
+the same way.
+
+`SparseFieldsetMixin` wires this to `?fields=` / `?omit=` on read requests
+of a DRF generic view.
+'''
+from typing import Any
+from collections.abc import Iterable
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer
+
+
+class ProjectionMixin:
+    '''Model serializer that can be narrowed to a subset of its fields.'''
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def __init__(
+        self,
+        *args: Any,  # noqa: ANN401
+        fields: Iterable[str] | None = None,
+        omit: Iterable[str] | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            keep = set(fields)
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
+
+    @classmethod
+    def parse_fields(cls, value: str | None, param: str | None = None) -> tuple[str, ...] | None:
+        '''Parse a comma separated `?fields=` (or `?omit=`) value, rejecting unknown field names.'''
+        if value is None:
+            return None
+        fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in cls().fields]
+        if unknown:
+            raise ValidationError({param or cls.fields_query_param: [f'Unknown fields: {", ".join(unknown)}.']})
+        return fields
+
+    def get_only_fields(self) -> list[str]:
+        '''
+        Return the model fields read by the serializer's fields, primary key first.
+
+        Fields of nested projections are prefixed with the relation name. An
+        empty list means the serializer can read any column, e.g. through a
+        property, so nothing may be deferred.
+        '''
+        opts = self.Meta.model._meta  # noqa: SLF001
+        columns = [opts.pk.name]
+        for name, nested in self.get_related_projections().items():
+            nested_columns = nested.get_only_fields()
+            columns += [name, *(f'{name}__{column}' for column in nested_columns)] if nested_columns else [name]
+        for field in self.fields.values():
+            if field.source == '*' or isinstance(field, BaseSerializer):
+                continue
+            name = field.source.split('.')[0]
+            try:
+                model_field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return []
+            if model_field.concrete and not model_field.many_to_many and name not in columns:
+                columns.append(name)
+        return columns
+
+    def get_related_projections(self) -> dict[str, 'ProjectionMixin']:
+        '''Return nested projections over forward foreign keys, which can be joined.'''
+        opts = self.Meta.model._meta  # noqa: SLF001
+        related = {}
+        for field in self.fields.values():
+            if not isinstance(field, ProjectionMixin) or field.source == '*':
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                related[field.source] = field
+        return related
+
+    def project(self, queryset: QuerySet, *extra: str) -> QuerySet:
+        '''Join nested projections and restrict the queryset to the columns read, plus `extra`.'''
+        related = self.get_related_projections()
+        if related:
+            queryset = queryset.select_related(*related)
+        only = self.get_only_fields()
+        return queryset.only(*only, *extra) if only else queryset
+
+
+class SparseFieldsetMixin:
+    '''
+    Generic view mixin for `?fields=a,b` and `?omit=c` on read requests.
+
+    The serializer is narrowed to the requested fields, and `get_queryset()`
+    loads only the columns and relations the remaining fields read. Write
+    requests are left alone. Views that build querysets of their own call
+    `project_queryset()` on them. Columns the view itself reads, e.g. for
+    validators, are listed in `projection_extra`.
+    '''
+
+    projection_extra: tuple[str, ...] = ()
+
+    def get_projection(self) -> dict[str, tuple[str, ...] | None]:
+        '''Return the parsed `fields` and `omit` of the current read request.'''
+        serializer_class = self.get_serializer_class()
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return {}
+        if not issubclass(serializer_class, ProjectionMixin):
+            return {}
+        if not hasattr(self, '_projection'):
+            params = request.query_params
+            fields_param, omit_param = serializer_class.fields_query_param, serializer_class.omit_query_param
+            self._projection = {
+                'fields': serializer_class.parse_fields(params.get(fields_param), fields_param),
+                'omit': serializer_class.parse_fields(params.get(omit_param), omit_param),
+            }
+        return self._projection
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> BaseSerializer:  # noqa: ANN401, D102
+        for key, value in self.get_projection().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def project_queryset(self, queryset: QuerySet) -> QuerySet:
+        '''Apply the serializer projection of a read request to the queryset.'''
+        projection = self.get_projection()
+        if not projection:
+            return queryset
+        serializer = self.get_serializer_class()(context=self.get_serializer_context(), **projection)
+        return serializer.project(queryset, *self.projection_extra)
+
+    def get_queryset(self) -> QuerySet:  # noqa: D102
+        return self.project_queryset(super().get_queryset())
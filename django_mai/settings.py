@@ -10,11 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 '''
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
 from decouple import config
-from django.core.files.storage import FileSystemStorage
+
+from images.storage import ContentAddressedStorage
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -59,6 +61,7 @@ INSTALLED_APPS = [
     'drf_yasg',
 
     # Local apps
+    'images',
     'users',
     'courses',
 ]
@@ -129,9 +132,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хэширование паролей: scrypt, профиль стоимости берется из PASSWORD_HASH_PROFILES.
+# Хэши других алгоритмов и профилей пересчитываются при успешном входе.
+PASSWORD_HASHERS = [
+    'users.hashers.ProfiledScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Память на один хэш: 128 * work_factor * block_size байт.
+# Сравнение профилей: `python manage.py bench_hashers`.
+PASSWORD_HASH_PROFILES = {
+    'interactive': {'work_factor': 2**14, 'block_size': 8, 'parallelism': 1},  # 16 МиБ
+    'moderate': {'work_factor': 2**15, 'block_size': 8, 'parallelism': 1},  # 32 МиБ
+    'sensitive': {'work_factor': 2**16, 'block_size': 8, 'parallelism': 1},  # 64 МиБ
+}
+PASSWORD_HASH_PROFILE = config('PASSWORD_HASH_PROFILE', default='interactive')
+
+# Число потоков, одновременно вычисляющих хэши паролей в одном процессе
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+
 # Указываем кастомную модель пользователя
 AUTH_USER_MODEL = 'users.User'
 
+# Вход по username или email: один запрос к БД и одна проверка пароля
+AUTHENTICATION_BACKENDS = [
+    'users.backends.UsernameOrEmailBackend',
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -158,25 +188,137 @@ MEDIA_ROOT = BASE_DIR / 'storages'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework settings
+FAST_JSON = config('FAST_JSON', default=True, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         # 'rest_framework.authentication.SessionAuthentication'
         # 'django_mai.middleware.DRFAuthenticate.SessionAuthentication'
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT без запроса пользователя из БД: поля пользователя берутся из токена
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # По умолчанию требуется аутентификация
     ],
+    # JSON ответы; django_mai.renderers кодирует через orjson, без него - как DRF (stdlib json)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',  # JSON ответы
+        'django_mai.renderers.FastJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'django_mai.renderers.FastJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,  # Размер страницы для пагинации
+    # Число прокси перед Django (nginx в docker-compose.yml - 1). Адрес клиента для ограничения
+    # частоты берется из X-Forwarded-For только после них; 0 - REMOTE_ADDR, заголовок не читается.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+}
+
+# Ограничение частоты входа, регистрации и выдачи токенов (users.ratelimit).
+# users.ratelimit.LocalStore хранит счетчики в памяти процесса; при нескольких узлах
+# следует использовать users.ratelimit.CacheStore и общий кэш (STORE_OPTIONS: {'alias': ...}).
+RATE_LIMIT = {
+    'ENABLED': config('RATE_LIMIT_ENABLED', default=True, cast=bool),
+    'STORE': config('RATE_LIMIT_STORE', default='users.ratelimit.LocalStore'),
+    'STORE_OPTIONS': {},
+    'RATES': {
+        'login': {'ip': '30/m', 'username': '10/m'},
+        'token': {'ip': '30/m', 'username': '10/m'},
+        'register': {'ip': '10/h'},
+    },
+}
+
+# Async views пользователей (users.async_views) для запуска под ASGI (uvicorn).
+# Включается, когда entrypoint.sh запускает SERVER_MODE=asgi; под WSGI каждый async view
+# выполнялся бы в отдельном event loop и был бы медленнее синхронного.
+USERS_ASYNC_VIEWS = config('USERS_ASYNC_VIEWS', default=False, cast=bool)
+
+# Число воркеров gunicorn/uvicorn (entrypoint.sh). При нескольких воркерах кэши каталога
+# и профилей должны быть общими (Redis), иначе `manage.py check` сообщает ошибку.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# Cache
+# Бэкенд кэша можно заменить через переменные окружения (например, на Redis)
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CATALOG_CACHE_BACKEND = config('CATALOG_CACHE_BACKEND', default=LOCMEM_CACHE)
+PROFILE_CACHE_BACKEND = config('PROFILE_CACHE_BACKEND', default=LOCMEM_CACHE)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='default'),
+    },
+    # Версия каталога должна быть видна всем воркерам: в продакшене - общий Redis
+    # (CATALOG_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, см. docker-compose.yml).
+    'catalog': {
+        'BACKEND': CATALOG_CACHE_BACKEND,
+        'LOCATION': config('CATALOG_CACHE_LOCATION', default='catalog'),
+        # MAX_ENTRIES - только для кэша в памяти процесса: клиент Redis не принимает лишних опций.
+        'OPTIONS': (
+            {'MAX_ENTRIES': config('CATALOG_CACHE_MAX_ENTRIES', default=1000, cast=int)}
+            if CATALOG_CACHE_BACKEND == LOCMEM_CACHE
+            else {}
+        ),
+    },
+    # Отозванные JWT должны быть видны всем воркерам: в продакшене - общий Redis
+    # (TOKEN_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, см. docker-compose.yml).
+    'tokens': {
+        'BACKEND': config('TOKEN_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('TOKEN_CACHE_LOCATION', default='tokens'),
+    },
+    # Запись профиля удаляется при сохранении пользователя: при нескольких воркерах - общий Redis
+    # (PROFILE_CACHE_BACKEND, см. docker-compose.yml). LocMemCache вытесняет давно не читанные
+    # записи (LRU): запись профиля - около 2 КиБ.
+    'profiles': {
+        'BACKEND': PROFILE_CACHE_BACKEND,
+        'LOCATION': config('PROFILE_CACHE_LOCATION', default='profiles'),
+        'OPTIONS': (
+            {'MAX_ENTRIES': config('PROFILE_CACHE_MAX_ENTRIES', default=10_000, cast=int)}
+            if PROFILE_CACHE_BACKEND == LOCMEM_CACHE
+            else {}
+        ),
+    },
+}
+
+# Кэш готовых ответов профиля и статуса аутентификации (users.cache). При WEB_CONCURRENCY > 1
+# кэш в памяти процесса - ошибка проверки users.E002.
+USERS_PROFILE_CACHE = {
+    'ALIAS': 'profiles',
+    'TIMEOUT': config('PROFILE_CACHE_TIMEOUT', default=5 * 60, cast=int),
+}
+
+# Кэш страниц каталога курсов. Алиас должен быть общим для воркеров: при WEB_CONCURRENCY > 1
+# кэш в памяти процесса - ошибка проверки courses.E001.
+COURSES_CATALOG_CACHE = {
+    'ALIAS': 'catalog',
+    'TIMEOUT': config('CATALOG_CACHE_TIMEOUT', default=60 * 60, cast=int),
+}
+
+# Поиск курсов: пусто - по базе данных (PostgreSQL - tsvector, иначе индекс в памяти процесса)
+COURSES_SEARCH = {
+    'BACKEND': config('COURSES_SEARCH_BACKEND', default=''),
+}
+
+# Подсказки поиска курсов (courses.typeahead): как часто, в секундах, проверять изменения каталога
+# по версии в кэше каталога и, на случай кэша в памяти процесса, по базе данных
+COURSES_TYPEAHEAD = {
+    'CHECK_INTERVAL': config('TYPEAHEAD_CHECK_INTERVAL', default=1.0, cast=float),
+    'DB_CHECK_INTERVAL': config('TYPEAHEAD_DB_CHECK_INTERVAL', default=10.0, cast=float),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.ClaimsTokenRefreshSerializer',
+}
+
+# Отозванные JWT (выход, смена пароля, блокировка, изменение прав). Алиас должен указывать на кэш,
+# общий для всех воркеров: при REQUIRE_SHARED кэш в памяти процесса - ошибка проверки users.E001.
+USERS_TOKEN_DENYLIST = {
+    'ALIAS': 'tokens',
+    'REQUIRE_SHARED': config('TOKEN_DENYLIST_REQUIRE_SHARED', default=not DEBUG, cast=bool),
 }
 
 # CORS settings - настройки для разрешения кросс-доменных запросов
@@ -192,7 +334,24 @@ CORS_ALLOW_CREDENTIALS = True
 CSRF_USE_SESSIONS = False
 
 # Storages
-IMAGES_STORAGE = FileSystemStorage(
+# Файлы изображений именуются по SHA-256 содержимого, одинаковые загрузки хранятся один раз
+IMAGES_STORAGE = ContentAddressedStorage(
     location=Path.joinpath(BASE_DIR, 'storages/images'),
     base_url='/storages/images/'
 )
+
+# Уменьшенные копии загруженных изображений (srcset)
+IMAGE_RENDITIONS = {
+    'FORMAT': 'WEBP',
+    'WIDTHS': (160, 320, 640, 1280),
+    'QUALITY': 80,
+}
+
+# Фоновая обработка изображений (проверка, удаление EXIF, уменьшенные копии).
+# images.tasks.DatabaseBackend ставит задачи в очередь в БД: `manage.py process_image_tasks`.
+IMAGE_TASKS = {
+    'BACKEND': config('IMAGE_TASKS_BACKEND', default='images.tasks.ThreadPoolBackend'),
+    'OPTIONS': {
+        'max_workers': config('IMAGE_TASKS_WORKERS', default=2, cast=int),
+    },
+}
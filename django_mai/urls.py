@@ -29,6 +29,7 @@ from rest_framework_simplejwt.views import (
 )
 
 from courses.router import router as courses_router
+from users.ratelimit import TokenRateThrottle
 
 
 schema_view = get_schema_view(
@@ -44,8 +45,8 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     # JWT auth
-    path('o/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('o/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('o/token/', TokenObtainPairView.as_view(throttle_classes=[TokenRateThrottle]), name='token_obtain_pair'),
+    path('o/token/refresh/', TokenRefreshView.as_view(throttle_classes=[TokenRateThrottle]), name='token_refresh'),
 
     # Docs
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
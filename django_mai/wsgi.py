@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_mai.settings")
 
 application = get_wsgi_application()
+
+# Build the course typeahead index in the background before the first request.
+from courses.typeahead import typeahead_index  # noqa: E402
+
+
+typeahead_index.warm_up()
@@ -42,7 +42,12 @@ echo "✅ Инициализация завершена!"
 if [ "$DEBUG" = "True" ]; then
     echo "🔧 Запуск в режиме разработки..."
     python manage.py runserver 0.0.0.0:8000
+elif [ "$SERVER_MODE" = "asgi" ]; then
+    echo "🏭 Запуск в продакшен режиме (ASGI)..."
+    # Async views пользователей имеют смысл только под ASGI.
+    export USERS_ASYNC_VIEWS=True
+    uvicorn django_mai.asgi:application --host 0.0.0.0 --port 8000 --workers ${WEB_CONCURRENCY:-3}
 else
     echo "🏭 Запуск в продакшен режиме..."
-    gunicorn django_mai.wsgi:application --bind 0.0.0.0:8000 --workers 3
+    gunicorn django_mai.wsgi:application --bind 0.0.0.0:8000 --workers ${WEB_CONCURRENCY:-3}
 fi
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.conf import settings as django_settings
+from rest_framework.fields import ReadOnlyField
+
+
+class SrcSetField(ReadOnlyField):
+    '''Serialize a renditions map as `{'320w': url, ...}` including the original image.'''
+
+    def to_representation(self, value: dict[str, Any]) -> dict[str, str]:  # noqa: D102
+        if not value:
+            return {}
+        storage = django_settings.IMAGES_STORAGE
+        request = self.context.get('request')
+        srcset = {f'{width}w': storage.url(name) for width, name in value.get('variants', {}).items()}
+        if value.get('width'):
+            srcset[f'{value["width"]}w'] = storage.url(value['source'])
+        if request is not None:
+            srcset = {width: request.build_absolute_uri(url) for width, url in srcset.items()}
+        return srcset
+
+
+class RenditionStatusField(ReadOnlyField):
+    '''Serialize the processing status of an image: `pending`, `ready`, `failed` or None without an image.'''
+
+    def to_representation(self, value: dict[str, Any]) -> str | None:  # noqa: D102
+        if not value:
+            return None
+        # Maps built before background processing carry no status.
+        return value.get('status', 'ready')
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+
+from courses.models import Course
+from images.renditions import STATUS_READY, refresh_renditions
+
+
+class Command(BaseCommand):
+    help = 'Queue processing of existing course images and user avatars that have no renditions yet.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--retry', action='store_true', help='Queue pending and failed images again.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        targets = (
+            (Course, 'image', 'image_renditions'),
+            (get_user_model(), 'avatar', 'avatar_renditions'),
+        )
+        for model, field_name, renditions_field_name in targets:
+            queryset = model._default_manager.only('pk', field_name, renditions_field_name)  # noqa: SLF001
+            for instance in queryset.iterator():
+                renditions = getattr(instance, renditions_field_name)
+                retry = options['retry'] and renditions.get('status', STATUS_READY) != STATUS_READY
+                refresh_renditions(instance, field_name, renditions_field_name, force=retry)
+            self.stdout.write(f'{model._meta.label}: queued')  # noqa: SLF001
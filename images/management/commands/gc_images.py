@@ -0,0 +1,93 @@
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from django.conf import settings as django_settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from images.models import Blob
+from images.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed image files that are no longer referenced.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=60 * 60,
+            help='Seconds a file is kept after its last use, so uploads that are not committed yet survive.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        self.storage = django_settings.IMAGES_STORAGE
+        if not isinstance(self.storage, ContentAddressedStorage):
+            msg = 'IMAGES_STORAGE is not a ContentAddressedStorage.'
+            raise CommandError(msg)
+        self.cutoff = time.time() - options['grace_period']
+        self.dry_run = options['dry_run']
+        self.files = self.bytes = 0
+
+        self.collect_released(options['batch_size'])
+        self.collect_untracked(options['batch_size'])
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(f'{verb} {self.files} files, {self.bytes} bytes.')
+
+    def collect_released(self, batch_size: int) -> None:
+        '''Delete files whose reference count dropped to zero before the grace period.'''
+        updated_before = datetime.fromtimestamp(self.cutoff, tz=UTC)
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                # Locked rows are being referenced again right now.
+                blobs = list(
+                    Blob.objects.select_for_update(skip_locked=True)
+                    .filter(refcount__lte=0, updated_at__lt=updated_before, id__gt=last_id)
+                    .order_by('id')[:batch_size]
+                )
+                if not blobs:
+                    return
+                last_id = blobs[-1].id
+                deleted = [blob.pk for blob in blobs if self.delete(blob.name)]
+                if not self.dry_run:
+                    Blob.objects.filter(pk__in=deleted).delete()
+
+    def collect_untracked(self, batch_size: int) -> None:
+        '''Delete files that were stored but never referenced, e.g. uploads of rolled back requests.'''
+        root = Path(self.storage.location)
+        names = (path.relative_to(root).as_posix() for path in root.glob('*/*/*') if path.is_file())
+        batch = []
+        for name in names:
+            if self.storage.is_content_name(name):
+                batch.append(name)
+            if len(batch) == batch_size:
+                self.delete_untracked(batch)
+                batch = []
+        self.delete_untracked(batch)
+
+    def delete_untracked(self, names: list[str]) -> None:  # noqa: D102
+        tracked = set(Blob.objects.filter(name__in=names).values_list('name', flat=True))
+        for name in names:
+            if name not in tracked:
+                self.delete(name)
+
+    def delete(self, name: str) -> bool:
+        '''Delete a file unless it was written or reused within the grace period.'''
+        path = Path(self.storage.path(name))
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return True
+        if stat.st_mtime >= self.cutoff:
+            return False
+        self.files += 1
+        self.bytes += stat.st_size
+        if self.dry_run:
+            self.stdout.write(name)
+        else:
+            path.unlink(missing_ok=True)
+        return True
@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from images.models import ImageTask
+from images.tasks import run_task
+
+
+class Command(BaseCommand):
+    help = 'Run image tasks queued by images.tasks.DatabaseBackend.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+        parser.add_argument('--batch-size', type=int, default=10, help='Tasks claimed per transaction.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait on an empty queue.')
+        parser.add_argument('--max-attempts', type=int, default=3, help='Attempts before a task is left failed.')
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=600.0,
+            help='Seconds after which a running task is considered lost with its worker and claimed again.',
+        )
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        while True:
+            tasks = self.claim(options['batch_size'], options['max_attempts'], options['stale_after'])
+            for task in tasks:
+                self.run(task)
+            if not tasks:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+
+    @staticmethod
+    def claim(batch_size: int, max_attempts: int, stale_after: float) -> list[ImageTask]:
+        '''
+        Mark a batch of queued tasks as running; concurrent workers skip rows locked by each other.
+
+        `updated_at` of a running task is the time it was claimed. A task still
+        running `stale_after` seconds later belongs to a crashed or killed worker
+        and is claimed again, or left failed once it is out of attempts.
+        '''
+        now = timezone.now()
+        stale = Q(status=ImageTask.STATUS_RUNNING, updated_at__lt=now - timedelta(seconds=stale_after))
+        with transaction.atomic():
+            ImageTask.objects.filter(stale, attempts__gte=max_attempts).update(
+                status=ImageTask.STATUS_FAILED,
+                error='Worker lost while running the task.',
+                updated_at=now,
+            )
+            tasks = list(
+                ImageTask.objects.select_for_update(skip_locked=True)
+                .filter(Q(status__in=(ImageTask.STATUS_PENDING, ImageTask.STATUS_FAILED)) | stale)
+                .filter(attempts__lt=max_attempts)
+                .order_by('id')[:batch_size]
+            )
+            ImageTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=ImageTask.STATUS_RUNNING,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+        return tasks
+
+    def run(self, task: ImageTask) -> None:  # noqa: D102
+        try:
+            run_task(task.name, task.kwargs)
+        except Exception as exc:  # noqa: BLE001
+            ImageTask.objects.filter(pk=task.pk).update(
+                status=ImageTask.STATUS_FAILED,
+                error=repr(exc),
+                updated_at=timezone.now(),
+            )
+            self.stderr.write(f'{task}: {exc!r}')
+        else:
+            ImageTask.objects.filter(pk=task.pk).update(
+                status=ImageTask.STATUS_DONE,
+                error='',
+                updated_at=timezone.now(),
+            )
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='task name')),
+                ('kwargs', models.JSONField(default=dict, verbose_name='arguments')),
+                ('status', models.CharField(
+                    choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')],
+                    default='pending',
+                    max_length=10,
+                    verbose_name='status',
+                )),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('error', models.TextField(blank=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='imagetask_status_id_idx')],
+            },
+        ),
+    ]
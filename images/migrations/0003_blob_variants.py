@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0002_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='variants'),
+        ),
+    ]
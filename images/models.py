@@ -0,0 +1,80 @@
+from collections.abc import Iterable
+
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class ImageTask(models.Model):
+    '''Queued media job for the database task backend.'''
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'pending'),
+        (STATUS_RUNNING, 'running'),
+        (STATUS_DONE, 'done'),
+        (STATUS_FAILED, 'failed'),
+    )
+
+    name = models.CharField(verbose_name='task name', max_length=100)
+    kwargs = models.JSONField(verbose_name='arguments', default=dict)
+    status = models.CharField(verbose_name='status', max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(verbose_name='attempts', default=0)
+    error = models.TextField(verbose_name='last error', blank=True)
+    created_at = models.DateTimeField(verbose_name='created at', auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name='updated at', auto_now=True)
+
+    class Meta:  # noqa: D106
+        indexes = (models.Index(fields=('status', 'id'), name='imagetask_status_id_idx'),)
+
+    def __str__(self) -> str:  # noqa: D105
+        return f'{self.name} #{self.pk} ({self.status})'
+
+
+class BlobQuerySet(models.QuerySet):
+
+    def acquire(self, names: Iterable[str]) -> None:
+        '''Add a reference to each stored file.'''
+        names = set(names)
+        if not names:
+            return
+        self.bulk_create([Blob(name=name) for name in names], ignore_conflicts=True)
+        self.filter(name__in=names).update(refcount=F('refcount') + 1, updated_at=timezone.now())
+
+    def release(self, names: Iterable[str]) -> None:
+        '''Drop a reference to each stored file; unreferenced files are deleted by `manage.py gc_images`.'''
+        names = set(names)
+        if not names:
+            return
+        self.filter(name__in=names).update(refcount=F('refcount') - 1, updated_at=timezone.now())
+
+    def get_variants(self, source: str) -> dict[str, str]:
+        '''Return the variant names recorded for a source file by width.'''
+        return self.filter(name=source).values_list('variants', flat=True).first() or {}
+
+    def set_variants(self, source: str, variants: dict[str, str]) -> None:
+        '''Record the variants of a source file, so the next upload of the same content reuses them.'''
+        self.bulk_create([Blob(name=source)], ignore_conflicts=True)
+        self.filter(name=source).update(variants=variants)
+
+
+class Blob(models.Model):
+    '''Reference count of a file in the content-addressed image storage.'''
+
+    name = models.CharField(verbose_name='storage name', max_length=255, unique=True)
+    refcount = models.IntegerField(verbose_name='references', default=0)
+    # Variant names of a source image by width: they are named by their own content, not by the source.
+    variants = models.JSONField(verbose_name='variants', default=dict, blank=True)
+    created_at = models.DateTimeField(verbose_name='created at', auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name='updated at', auto_now=True)
+
+    objects = BlobQuerySet.as_manager()
+
+    class Meta:  # noqa: D106
+        indexes = (models.Index(fields=('refcount', 'updated_at'), name='blob_refcount_updated_at_idx'),)
+
+    def __str__(self) -> str:  # noqa: D105
+        return f'{self.name} ({self.refcount})'
@@ -0,0 +1,186 @@
+import hashlib
+import logging
+from typing import Any
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings as django_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.fields.files import FieldFile
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+from images.models import Blob
+from images.tasks import enqueue, task
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+
+def rendition_name(source: str, width: int) -> str:
+    '''Return the storage name of a source image variant, e.g. `photo.320w.webp` for `photo.png`.'''
+    extension = django_settings.IMAGE_RENDITIONS['FORMAT'].lower()
+    return str(PurePosixPath(source).with_suffix(f'.{width}w.{extension}'))
+
+
+def generate_renditions(field_file: FieldFile) -> dict[str, Any]:
+    '''
+    Create resized, re-encoded copies of an image next to the original.
+
+    Only widths smaller than the original are produced. An existing variant
+    of the same source is reused: content-addressed variants are found
+    through the source's `Blob`, others are named after the source.
+    Return the renditions map stored on the model.
+    '''
+    options = django_settings.IMAGE_RENDITIONS
+    storage = field_file.storage
+    is_content_name = getattr(storage, 'is_content_name', None)
+    content_addressed = bool(is_content_name and is_content_name(field_file.name))
+    known = Blob.objects.get_variants(field_file.name) if content_addressed else {}
+    variants = {}
+    with field_file.open('rb'), Image.open(field_file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+        source_width = image.width
+        for width in sorted(options['WIDTHS']):
+            if width >= source_width:
+                break
+            name = known.get(str(width)) or rendition_name(field_file.name, width)
+            if not storage.exists(name):
+                variant = image.copy()
+                variant.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                variant.save(buffer, format=options['FORMAT'], quality=options['QUALITY'])
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants[str(width)] = name
+    if content_addressed and variants != known:
+        Blob.objects.set_variants(field_file.name, variants)
+    return {'source': field_file.name, 'width': source_width, 'variants': variants}
+
+
+def strip_metadata(data: bytes) -> bytes | None:
+    '''
+    Validate image bytes and drop EXIF data (camera, GPS) from them.
+
+    The EXIF orientation is applied to the pixels before it is dropped.
+    Return cleaned bytes, or None if the image has no EXIF data.
+    '''
+    with Image.open(BytesIO(data)) as probe:
+        probe.verify()
+    with Image.open(BytesIO(data)) as image:
+        exif = image.getexif()
+        if not exif:
+            return None
+        image_format = image.format
+        params = {}
+        if icc_profile := image.info.get('icc_profile'):
+            params['icc_profile'] = icc_profile
+        if exif.get(ExifTags.Base.Orientation, 1) != 1:
+            cleaned = ImageOps.exif_transpose(image)
+        else:
+            cleaned = image
+            if image_format == 'JPEG':
+                # Reuse the original quantization tables instead of re-compressing.
+                params['quality'] = 'keep'
+        cleaned.info.pop('exif', None)
+        buffer = BytesIO()
+        cleaned.save(buffer, format=image_format, **params)
+        return buffer.getvalue()
+
+
+def blob_names(storage: Storage, renditions: dict[str, Any]) -> set[str]:
+    '''Return the reference counted files of a renditions map: the source and its variants.'''
+    names = {renditions.get('source'), *renditions.get('variants', {}).values()}
+    # Only content-addressed files are counted; field defaults and legacy uploads are never collected.
+    is_content_name = getattr(storage, 'is_content_name', None)
+    return {name for name in names if name and is_content_name and is_content_name(name)}
+
+
+def release_renditions(instance: Model, field_name: str, renditions_field_name: str) -> None:
+    '''Drop the references of a deleted instance to its image and variants.'''
+    storage = getattr(instance, field_name).storage
+    Blob.objects.release(blob_names(storage, getattr(instance, renditions_field_name) or {}))
+
+
+def refresh_renditions(instance: Model, field_name: str, renditions_field_name: str, *, force: bool = False) -> None:
+    '''
+    Schedule processing of an image field if its renditions were built for another file.
+
+    `force` schedules it again for the same file, e.g. after a failure. The
+    references of the previous renditions are released either way.
+    '''
+    field_file = getattr(instance, field_name)
+    renditions = getattr(instance, renditions_field_name) or {}
+    if not field_file or (renditions.get('source') == field_file.name and not force):
+        return
+    previous = renditions
+    renditions = {'source': field_file.name, 'status': STATUS_PENDING, 'variants': {}}
+    setattr(instance, renditions_field_name, renditions)
+    # update() does not send post_save again and does not touch auto_now fields.
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{renditions_field_name: renditions})  # noqa: SLF001
+    Blob.objects.acquire(blob_names(field_file.storage, renditions))
+    Blob.objects.release(blob_names(field_file.storage, previous))
+    enqueue(
+        process_image,
+        model=instance._meta.label,  # noqa: SLF001
+        pk=instance.pk,
+        field_name=field_name,
+        renditions_field_name=renditions_field_name,
+    )
+
+
+@task
+def process_image(model: str, pk: int, field_name: str, renditions_field_name: str) -> None:
+    '''Validate, strip metadata, hash and resize a pending image, then store the result on the instance.'''
+    model_class = apps.get_model(model)
+    instance = model_class._default_manager.filter(pk=pk).first()  # noqa: SLF001
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    renditions = getattr(instance, renditions_field_name) or {}
+    if not field_file or renditions.get('source') != field_file.name or renditions.get('status') != STATUS_PENDING:
+        # Already processed or replaced by a newer upload with its own task.
+        return
+
+    field = model_class._meta.get_field(field_name)  # noqa: SLF001
+    update_fields = [renditions_field_name]
+    original_name = field_file.name
+    try:
+        with field_file.open('rb'):
+            data = field_file.read()
+        # Files shared through the field default are left untouched.
+        cleaned = strip_metadata(data) if field_file.name != field.default else None
+        if cleaned is not None:
+            data = cleaned
+            field_file.name = field_file.storage.save(field_file.name, ContentFile(cleaned))
+            update_fields.append(field_name)
+        renditions = generate_renditions(field_file)
+    except (OSError, SyntaxError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning('Cannot process image %s', field_file.name, exc_info=True)
+        renditions = {'source': field_file.name, 'status': STATUS_FAILED, 'variants': {}}
+    else:
+        renditions.update(status=STATUS_READY, sha256=hashlib.sha256(data).hexdigest())
+
+    setattr(instance, renditions_field_name, renditions)
+    update_fields += [
+        f.name for f in model_class._meta.concrete_fields if getattr(f, 'auto_now', False)  # noqa: SLF001
+    ]
+    with transaction.atomic():
+        current = model_class._default_manager.select_for_update().filter(pk=pk).values_list(field_name, flat=True)  # noqa: SLF001
+        if current.first() != original_name:
+            # A new image was uploaded meanwhile; its own task builds the renditions.
+            return
+        instance.save(update_fields=update_fields)
+        storage = field_file.storage
+        Blob.objects.acquire(blob_names(storage, renditions) - {original_name})
+        if field_file.name != original_name:
+            # The uploaded copy still has the metadata that was just stripped.
+            Blob.objects.release(blob_names(storage, {'source': original_name}))
@@ -0,0 +1,72 @@
+import hashlib
+import re
+import uuid
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings as django_settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible(path='images.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    '''
+    File system storage that names files after the SHA-256 of their content.
+
+    `photo.jpg` is stored as `3a/7b/3a7b…e1.jpg`: two levels of shards keep
+    directories small. Saving bytes that are already stored skips the write
+    and returns the existing name, so a repeated upload costs a hash and a
+    stat. Stored files are never overwritten; the ones nobody references any
+    more are found through `images.models.Blob` by `manage.py gc_images`.
+    '''
+
+    shard_levels = 2
+    shard_width = 2
+    name_pattern = re.compile(r'^(?:[0-9a-f]{2}/){2}[0-9a-f]{64}(?:\.[0-9a-z]+)?$')
+
+    def content_name(self, content: File, name: str) -> str:
+        '''Return the storage name of the content, keeping the extension of the given name.'''
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        shards = [hexdigest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_levels)]
+        return '/'.join([*shards, hexdigest + PurePosixPath(name).suffix.lower()])
+
+    def is_content_name(self, name: str) -> bool:
+        '''Tell whether the name was produced by this storage, as opposed to legacy files and field defaults.'''
+        return bool(self.name_pattern.match(name))
+
+    def get_available_name(self, name: str, max_length: int | None = None) -> str:  # noqa: ARG002
+        '''Names are chosen by content in `_save()`, so there is nothing to resolve here.'''
+        return name
+
+    def _save(self, name: str, content: File) -> str:
+        name = self.content_name(content, name)
+        path = Path(self.path(name))
+        if path.exists():
+            # Refresh the mtime so the garbage collector treats the blob as just uploaded.
+            path.touch()
+            return name
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent writers of the same content each use their own temporary file and
+        # atomically replace the target with identical bytes.
+        temporary_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            with temporary_path.open('wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                temporary_path.chmod(self.file_permissions_mode)
+            temporary_path.replace(path)
+        except BaseException:
+            temporary_path.unlink(missing_ok=True)
+            raise
+        return name
+
+
+def images_storage() -> Storage:
+    '''Return the storage of uploaded images; a callable keeps its location out of migrations.'''
+    return django_settings.IMAGES_STORAGE
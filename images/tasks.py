@@ -0,0 +1,145 @@
+'''
+Background execution of media work.
+
+Tasks are plain functions registered with `@task` and started with
+`enqueue()` once the current transaction commits. The backend is chosen with
+the `IMAGE_TASKS` setting:
+
+* `ImmediateBackend` runs the task in the calling thread;
+* `ThreadPoolBackend` and `ProcessPoolBackend` run it in an in-process pool;
+* `DatabaseBackend` stores it as an `ImageTask` row that the
+  `process_image_tasks` management command drains.
+'''
+import logging
+import multiprocessing
+import threading
+from typing import Any
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings as django_settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from images.models import ImageTask
+
+
+logger = logging.getLogger(__name__)
+
+registry: dict[str, Callable[..., Any]] = {}
+
+
+def task(func: Callable[..., Any]) -> Callable[..., Any]:
+    '''Register a function as a task under its dotted path.'''
+    registry[f'{func.__module__}.{func.__qualname__}'] = func
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    return func
+
+
+def run_task(name: str, kwargs: dict[str, Any]) -> None:
+    '''Run a registered task and release the database connection of the worker.'''
+    if name not in registry:
+        # A fresh worker process may not have imported the module of the task yet.
+        import_string(name)
+    try:
+        registry[name](**kwargs)
+    finally:
+        close_old_connections()
+
+
+class BaseBackend:
+
+    def submit(self, name: str, kwargs: dict[str, Any]) -> None:  # noqa: D102
+        raise NotImplementedError
+
+
+class ImmediateBackend(BaseBackend):
+    '''Run tasks synchronously; meant for tests and debugging.'''
+
+    def submit(self, name: str, kwargs: dict[str, Any]) -> None:  # noqa: D102
+        registry[name](**kwargs)
+
+
+class PoolBackend(BaseBackend):
+    executor_class: type[Executor]
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self.max_workers = max_workers
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        '''Return the pool, starting it on first use so forked server workers get their own.'''
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.create_executor()
+            return self._executor
+
+    def create_executor(self) -> Executor:  # noqa: D102
+        return self.executor_class(max_workers=self.max_workers)
+
+    def submit(self, name: str, kwargs: dict[str, Any]) -> None:  # noqa: D102
+        future = self.executor.submit(run_task, name, kwargs)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:  # noqa: ANN001
+        if future.exception() is not None:
+            logger.error('Image task failed', exc_info=future.exception())
+
+
+class ThreadPoolBackend(PoolBackend):
+    executor_class = ThreadPoolExecutor
+
+    def create_executor(self) -> Executor:  # noqa: D102
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='image-task')
+
+
+class ProcessPoolBackend(PoolBackend):
+    executor_class = ProcessPoolExecutor
+
+    def create_executor(self) -> Executor:  # noqa: D102
+        # Spawned workers never share the database connections of the server process.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+
+
+class DatabaseBackend(BaseBackend):
+    '''Persist tasks in the database; run `manage.py process_image_tasks` to execute them.'''
+
+    def submit(self, name: str, kwargs: dict[str, Any]) -> None:  # noqa: D102
+        ImageTask.objects.create(name=name, kwargs=kwargs)
+
+
+_backend: BaseBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> BaseBackend:
+    '''Return the configured backend instance.'''
+    global _backend  # noqa: PLW0603
+    with _backend_lock:
+        if _backend is None:
+            config = django_settings.IMAGE_TASKS
+            _backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting: str, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Drop the cached backend when tests override IMAGE_TASKS.'''
+    global _backend  # noqa: PLW0603
+    if setting == 'IMAGE_TASKS':
+        _backend = None
+
+
+def enqueue(func: Callable[..., Any], **kwargs) -> None:  # noqa: ANN003
+    '''Submit a registered task after the current transaction commits.'''
+    transaction.on_commit(lambda: get_backend().submit(func.task_name, kwargs))
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings as django_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from courses.models import Course
+from images.models import Blob, ImageTask
+
+
+def make_upload(name: str = 'photo.jpg', size: tuple[int, int] = (400, 200)) -> SimpleUploadedFile:
+    '''Return a JPEG upload carrying EXIF data with a GPS tag and a rotation.'''
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = 'Camera'
+    exif[ExifTags.Base.Orientation] = 6
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageProcessingTests(TestCase):
+
+    def tearDown(self) -> None:  # noqa: D102
+        storage = django_settings.IMAGES_STORAGE
+        for name in Blob.objects.values_list('name', flat=True):
+            storage.delete(name)
+
+    def create_course(self) -> Course:  # noqa: D102
+        return Course.objects.create(
+            title='Course', price=1, author='Author', link='https://example.com/', image=make_upload(),
+        )
+
+    @override_settings(IMAGE_TASKS={'BACKEND': 'images.tasks.ImmediateBackend'})
+    def test_upload_is_processed_after_commit(self) -> None:  # noqa: D102
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            course = self.create_course()
+        course.refresh_from_db()
+        self.assertEqual(course.image_renditions['status'], 'pending')
+
+        for callback in callbacks:
+            callback()
+        course.refresh_from_db()
+        renditions = course.image_renditions
+        self.assertEqual(renditions['status'], 'ready')
+        self.assertEqual(renditions['source'], course.image.name)
+        self.assertEqual(len(renditions['sha256']), 64)
+        # The 400x200 photo was rotated by its EXIF orientation before the metadata was dropped.
+        self.assertEqual(renditions['width'], 200)
+        self.assertEqual(list(renditions['variants']), ['160'])
+        with course.image.open('rb'), Image.open(course.image) as image:
+            self.assertFalse(image.getexif())
+
+    @override_settings(IMAGE_TASKS={'BACKEND': 'images.tasks.DatabaseBackend'})
+    def test_database_backend_is_drained_by_command(self) -> None:  # noqa: D102
+        with self.captureOnCommitCallbacks(execute=True):
+            course = self.create_course()
+        task = ImageTask.objects.get()
+        self.assertEqual(task.status, ImageTask.STATUS_PENDING)
+
+        call_command('process_image_tasks', once=True)
+        task.refresh_from_db()
+        course.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (ImageTask.STATUS_DONE, 1))
+        self.assertEqual(course.image_renditions['status'], 'ready')
+
+    @override_settings(IMAGE_TASKS={'BACKEND': 'images.tasks.DatabaseBackend'})
+    def test_tasks_of_lost_workers_are_reclaimed(self) -> None:  # noqa: D102
+        with self.captureOnCommitCallbacks(execute=True):
+            course = self.create_course()
+        claimed_at = timezone.now() - timedelta(minutes=5)
+        ImageTask.objects.update(status=ImageTask.STATUS_RUNNING, attempts=1, updated_at=claimed_at)
+
+        call_command('process_image_tasks', once=True, stale_after=600)
+        self.assertEqual(ImageTask.objects.get().status, ImageTask.STATUS_RUNNING)
+
+        call_command('process_image_tasks', once=True, stale_after=60)
+        task = ImageTask.objects.get()
+        course.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (ImageTask.STATUS_DONE, 2))
+        self.assertEqual(course.image_renditions['status'], 'ready')
+
+        ImageTask.objects.update(status=ImageTask.STATUS_RUNNING, attempts=3, updated_at=claimed_at)
+        call_command('process_image_tasks', once=True, stale_after=60)
+        self.assertEqual(ImageTask.objects.get().status, ImageTask.STATUS_FAILED)
+
+
+@override_settings(IMAGE_TASKS={'BACKEND': 'images.tasks.ImmediateBackend'})
+class ContentAddressedStorageTests(TestCase):
+
+    def tearDown(self) -> None:  # noqa: D102
+        storage = django_settings.IMAGES_STORAGE
+        for name in Blob.objects.values_list('name', flat=True):
+            storage.delete(name)
+
+    def create_course(self) -> Course:  # noqa: D102
+        with self.captureOnCommitCallbacks(execute=True):
+            return Course.objects.create(
+                title='Course', price=1, author='Author', link='https://example.com/', image=make_upload(),
+            )
+
+    def test_identical_uploads_share_files(self) -> None:  # noqa: D102
+        first, second = self.create_course(), self.create_course()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(first.image_renditions['variants'], second.image_renditions['variants'])
+        self.assertEqual(Blob.objects.get(name=first.image.name).refcount, 2)
+
+    def test_variants_of_stored_content_are_reused(self) -> None:  # noqa: D102
+        first = self.create_course()
+        first.refresh_from_db()
+        self.assertEqual(Blob.objects.get_variants(first.image.name), first.image_renditions['variants'])
+        with mock.patch.object(Image.Image, 'thumbnail', autospec=True) as thumbnail:
+            second = self.create_course()
+        thumbnail.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.image_renditions['variants'], first.image_renditions['variants'])
+
+    def test_retry_keeps_reference_counts(self) -> None:  # noqa: D102
+        course = self.create_course()
+        course.refresh_from_db()
+        names = [course.image.name, *course.image_renditions['variants'].values()]
+        for _ in range(2):
+            # A failed build keeps its references until the retry replaces them.
+            Course.objects.filter(pk=course.pk).update(image_renditions={**course.image_renditions, 'status': 'failed'})
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('build_renditions', retry=True, stdout=StringIO())
+            course.refresh_from_db()
+            self.assertEqual(course.image_renditions['status'], 'ready')
+            self.assertEqual([Blob.objects.get(name=name).refcount for name in names], [1] * len(names))
+
+    def test_released_files_are_collected(self) -> None:  # noqa: D102
+        course = self.create_course()
+        course.refresh_from_db()
+        names = [course.image.name, *course.image_renditions['variants'].values()]
+        storage = django_settings.IMAGES_STORAGE
+
+        call_command('gc_images', grace_period=0, stdout=StringIO())
+        self.assertTrue(all(storage.exists(name) for name in names))
+
+        course.delete()
+        call_command('gc_images', grace_period=0, stdout=StringIO())
+        self.assertFalse(any(storage.exists(name) for name in names))
+        self.assertFalse(Blob.objects.exists())
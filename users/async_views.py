@@ -0,0 +1,237 @@
+'''
+Асинхронные views для аутентификации и профиля пользователя.
+
+Повторяют `users.views` для работы под ASGI (uvicorn): запросы к БД
+выполняются через async ORM (`aget`, `asave`), вычисление хэша пароля -
+в пуле хэширования (`users.hashers`), поэтому event loop не блокируется
+ни на БД, ни на scrypt. Вход проверяется тем же `LoginSerializer` и
+`authenticate()`, что и в синхронном view, в потоке.
+
+DRF не поддерживает async views, поэтому декоратор `async_api_view`
+выполняет нужную часть его конвейера сам: разбор тела запроса парсерами
+DRF, аутентификацию классами DEFAULT_AUTHENTICATION_CLASSES (async-версией
+`aauthenticate()`, если она есть), троттлинг и отрисовку ответа рендерером
+DRF. Формат ответов и ошибок совпадает с синхронными
+views. Маршруты переключаются настройкой `USERS_ASYNC_VIEWS`.
+'''
+import functools
+from typing import Any
+from collections.abc import Awaitable, Callable, Sequence
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import login
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions as drf_exceptions
+from rest_framework import status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from django_mai.conditional import conditional_response, make_etag, set_validators
+
+from .backends import UsernameOrEmailBackend
+from .cache import ProfileEntry, get_content_type, get_renderer, profile_cache
+from .hashers import arun_in_hash_pool
+from .models import User
+from .ratelimit import LoginRateThrottle, RegisterRateThrottle, SlidingWindowThrottle
+from .serializers import LoginSerializer, UserRegistrationSerializer, UserSerializer
+from .views import USER_VARY, user_queryset
+
+
+AsyncView = Callable[..., Awaitable[HttpResponseBase]]
+
+LOGIN_BACKEND = f'{UsernameOrEmailBackend.__module__}.{UsernameOrEmailBackend.__qualname__}'
+
+
+def render(data: Any, status_code: int = status.HTTP_200_OK, headers: dict[str, str] | None = None) -> HttpResponse:  # noqa: ANN401
+    '''Отрисовывает данные первым рендерером из DEFAULT_RENDERER_CLASSES.'''
+    renderer = get_renderer()
+    return HttpResponse(
+        renderer.render(data),
+        status=status_code,
+        content_type=get_content_type(renderer),
+        headers=headers,
+    )
+
+
+def get_authenticators() -> list[BaseAuthentication]:
+    '''Возвращает аутентификаторы из DEFAULT_AUTHENTICATION_CLASSES, как APIView.get_authenticators().'''
+    return [authentication_class() for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+async def aauthenticate(authenticators: Sequence[BaseAuthentication], request: Request) -> tuple[Any, Any] | None:
+    '''Возвращает результат первого сработавшего аутентификатора, как Request._authenticate().'''
+    for authenticator in authenticators:
+        if hasattr(authenticator, 'aauthenticate'):
+            user_auth = await authenticator.aauthenticate(request)
+        else:
+            user_auth = await sync_to_async(authenticator.authenticate)(request)
+        if user_auth is not None:
+            return user_auth
+    return None
+
+
+def handle_exception(
+    exc: drf_exceptions.APIException,
+    authenticators: Sequence[BaseAuthentication],
+    request: HttpRequest,
+) -> HttpResponse:
+    '''Превращает исключение DRF в ответ так же, как APIView.handle_exception().'''
+    headers = {}
+    if isinstance(exc, drf_exceptions.NotAuthenticated | drf_exceptions.AuthenticationFailed):
+        auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+        if auth_header:
+            headers['WWW-Authenticate'] = auth_header
+            exc.status_code = status.HTTP_401_UNAUTHORIZED
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = str(int(exc.wait))
+    data = exc.detail if isinstance(exc.detail, list | dict) else {'detail': exc.detail}
+    return render(data, exc.status_code, headers)
+
+
+def async_api_view(
+    methods: Sequence[str],
+    *,
+    authenticated: bool = False,
+    throttles: Sequence[type[SlidingWindowThrottle]] = (),
+) -> Callable[[AsyncView], AsyncView]:
+    '''
+    Асинхронный аналог `@api_view` с `@permission_classes` и `@throttle_classes`.
+
+    View получает `rest_framework.request.Request` с уже заполненными
+    `user` и `auth`. При `authenticated=True` анонимный запрос получает 401.
+    '''
+
+    def decorator(view: AsyncView) -> AsyncView:
+        @functools.wraps(view)
+        async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:  # noqa: ANN401
+            if request.method not in methods:
+                exc = drf_exceptions.MethodNotAllowed(request.method)
+                return render({'detail': exc.detail}, exc.status_code, {'Allow': ', '.join(methods)})
+            authenticators = get_authenticators()
+            api_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=authenticators,
+            )
+            try:
+                user_auth = await aauthenticate(authenticators, api_request)
+                api_request.user, api_request.auth = user_auth or (AnonymousUser(), None)
+                if authenticated and user_auth is None:
+                    raise drf_exceptions.NotAuthenticated
+                for throttle_class in throttles:
+                    throttle = throttle_class()
+                    # Хранилище счетчиков может обращаться к кэшу по сети.
+                    if not await sync_to_async(throttle.allow_request)(api_request, None):
+                        raise drf_exceptions.Throttled(throttle.wait())
+                return await view(api_request, *args, **kwargs)
+            except drf_exceptions.APIException as exc:
+                return handle_exception(exc, authenticators, request)
+
+        # Как и у @api_view, CSRF проверяется аутентификацией, а не middleware.  # noqa: RUF003
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+async def aload_user(pk: int, fields: tuple[str, ...] | None = None) -> User:
+    '''Асинхронная версия users.views.load_user().'''
+    try:
+        return await user_queryset(fields).aget(pk=pk)
+    except User.DoesNotExist as exc:
+        raise drf_exceptions.AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+
+
+@async_api_view(['POST'], throttles=[RegisterRateThrottle])
+async def register_view(request: Request) -> HttpResponse:
+    '''API endpoint для регистрации нового пользователя (см. users.views.register_view).'''
+    serializer = UserRegistrationSerializer(data=request.data)
+    # Проверка уникальности username и email - синхронные запросы валидаторов DRF.
+    if not await sync_to_async(serializer.is_valid)():
+        return render(
+            {'message': 'Ошибка при регистрации', 'errors': serializer.errors},
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    data = dict(serializer.validated_data)
+    data.pop('password_confirm', None)
+    password = data.pop('password')
+    # То же, что UserManager.create_user(), но хэш считается вне event loop.  # noqa: RUF003
+    user = User(**data)
+    user.username = User.normalize_username(user.username)
+    user.email = User.objects.normalize_email(user.email)
+    user.password = await arun_in_hash_pool(make_password, password)
+    await user.asave()
+
+    # Автоматически входим пользователя после регистрации
+    await sync_to_async(login)(request._request, user, backend=LOGIN_BACKEND)  # noqa: SLF001
+    return render(
+        {'message': 'Пользователь успешно зарегистрирован', 'user': UserSerializer(user).data},
+        status.HTTP_201_CREATED,
+    )
+
+
+@async_api_view(['POST'], throttles=[LoginRateThrottle])
+async def login_view(request: Request) -> HttpResponse:
+    '''API endpoint для входа пользователя в систему (см. users.views.login_view).'''
+    serializer = LoginSerializer(data=request.data, context={'request': request._request})  # noqa: SLF001
+    # authenticate() синхронный, как и в users.views.login_view: поиск пользователя,
+    # сигнал user_login_failed и хэш для неизвестного логина - в потоке.
+    if not await sync_to_async(serializer.is_valid)():
+        return render(
+            {'message': 'Ошибка при входе', 'errors': serializer.errors},
+            status.HTTP_400_BAD_REQUEST,
+        )
+    user = serializer.validated_data['user']
+
+    # Входим пользователя в систему
+    await sync_to_async(login)(request._request, user)  # noqa: SLF001
+    return render({'message': 'Успешный вход в систему', 'user': UserSerializer(user).data})
+
+
+async def aget_profile_entry(pk: int) -> ProfileEntry:
+    '''Возвращает готовые ответы пользователя из кэша, при промахе загружая его.'''
+    entry = await profile_cache.aget(pk)
+    if entry is None:
+        entry = await profile_cache.aset(profile_cache.build(await aload_user(pk)))
+    return entry
+
+
+@async_api_view(['GET', 'HEAD'], authenticated=True)
+async def profile_view(request: Request) -> HttpResponseBase:
+    '''API endpoint для получения профиля текущего пользователя (см. users.views.profile_view).'''
+    fields = UserSerializer.parse_fields(request.query_params.get('fields'))
+    if fields is None:
+        entry = await aget_profile_entry(request.user.pk)
+        etag, updated_at = entry.etag, entry.updated_at
+    else:
+        user = await aload_user(request.user.pk, fields)
+        etag, updated_at = make_etag(user.pk, user.updated_at.isoformat(), *fields), user.updated_at
+    not_modified = conditional_response(request, etag, updated_at, vary=USER_VARY)
+    if not_modified is not None:
+        return not_modified
+
+    response = entry.response(entry.profile) if fields is None else render(UserSerializer(user, fields=fields).data)
+    return set_validators(response, etag, updated_at, vary=USER_VARY)
+
+
+@async_api_view(['GET', 'HEAD'])
+async def auth_status_view(request: Request) -> HttpResponse:
+    '''API endpoint для проверки статуса аутентификации (см. users.views.auth_status_view).'''
+    if not request.user.is_authenticated:
+        response = render({'is_authenticated': False, 'user': None})
+    elif (fields := UserSerializer.parse_fields(request.query_params.get('fields'))) is None:
+        entry = await aget_profile_entry(request.user.pk)
+        response = entry.response(entry.auth_status)
+    else:
+        user = UserSerializer(await aload_user(request.user.pk, fields), fields=fields)
+        response = render({'is_authenticated': True, 'user': user.data})
+    patch_vary_headers(response, USER_VARY)
+    return response
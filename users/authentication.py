@@ -0,0 +1,128 @@
+'''
+Аутентификация по JWT без запроса пользователя из БД.
+
+Access-токен содержит id, username и флаги пользователя, поэтому
+`request.user` строится из claims. Полная модель `User` загружается
+только при обращении к полю, которого нет в токене.
+'''
+import time
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest
+from django.utils.functional import LazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from .denylist import ISSUED_AT_CLAIM, token_denylist
+
+
+# Поля пользователя, которые копируются в токен.
+USER_CLAIMS = ('username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def set_user_claims(token: Token, user: Any) -> Token:  # noqa: ANN401
+    '''Записывает в токен поля пользователя, нужные для запросов без БД, и точное время выпуска.'''
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[ISSUED_AT_CLAIM] = time.time_ns() // 1000
+    return token
+
+
+class ClaimsUser(LazyObject):
+    '''
+    Пользователь из claims access-токена.
+
+    `pk`, `id`, `username`, `is_active`, `is_staff` и `is_superuser` читаются
+    из токена. Любой другой атрибут, запись или сравнение один раз загружают
+    полную модель `User`, после чего объект ведет себя как она.
+    '''
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token: Token) -> None:
+        super().__init__()
+        self.__dict__['token'] = token
+
+    def _setup(self) -> None:
+        user_model = get_user_model()
+        try:
+            self._wrapped = user_model._default_manager.get(**{api_settings.USER_ID_FIELD: self.pk})  # noqa: SLF001
+        except user_model.DoesNotExist as exc:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+
+    def __bool__(self) -> bool:  # noqa: D105
+        return True
+
+    def __hash__(self) -> int:  # noqa: D105
+        # Same as Model.__hash__(), so the user can be a dict key without being loaded.
+        return hash(self.pk)
+
+    @property
+    def pk(self) -> Any:  # noqa: ANN401, D102
+        # simplejwt stores the id as a string.
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])  # noqa: SLF001
+
+    id = pk
+
+    @property
+    def username(self) -> str:  # noqa: D102
+        return self.token['username']
+
+    @property
+    def is_active(self) -> bool:  # noqa: D102
+        return self.token['is_active']
+
+    @property
+    def is_staff(self) -> bool:  # noqa: D102
+        return self.token['is_staff']
+
+    @property
+    def is_superuser(self) -> bool:  # noqa: D102
+        return self.token['is_superuser']
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    '''
+    JWT-аутентификация без SELECT пользователя на каждый запрос.
+
+    Отозванные токены отклоняются по списку `token_denylist`. Токены,
+    выпущенные до появления claims, обрабатываются как раньше, с загрузкой
+    пользователя из БД.
+    '''
+
+    def get_user(self, validated_token: Token) -> Any:  # noqa: ANN401, D102
+        self.check_token(validated_token, revoked=token_denylist.is_revoked(validated_token))
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+    async def aauthenticate(self, request: HttpRequest) -> tuple[Any, Token] | None:
+        '''Асинхронная версия authenticate() для async views.'''
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        self.check_token(validated_token, revoked=await token_denylist.ais_revoked(validated_token))
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return await sync_to_async(super().get_user)(validated_token), validated_token
+        return ClaimsUser(validated_token), validated_token
+
+    @staticmethod
+    def check_token(validated_token: Token, *, revoked: bool) -> None:
+        '''Отклоняет токен без id пользователя, отозванный токен и токен заблокированного пользователя.'''
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        if revoked:
+            raise AuthenticationFailed(_('Token is revoked'), code='token_revoked')
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token.get('is_active', True):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
@@ -0,0 +1,66 @@
+'''
+Бэкенд аутентификации по имени пользователя или email.
+
+Пользователь ищется одним запросом по индексам username и email, пароль
+проверяется ровно один раз. Для неизвестного логина вычисляется такой же
+хэш, как для существующего, поэтому время ответа не выдает, есть ли аккаунт.
+'''
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+
+
+UserModel = get_user_model()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    '''Аутентификация по username или email и паролю.'''
+
+    def authenticate(  # noqa: D102
+        self,
+        request: HttpRequest | None,  # noqa: ARG002
+        username: str | None = None,
+        password: str | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any | None:  # noqa: ANN401
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_user_by_login(username)
+        if user is None:
+            # Тот же хэш, что и при проверке пароля, чтобы время ответа не зависело от наличия аккаунта.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    @classmethod
+    def get_user_by_login(cls, login: str) -> Any | None:  # noqa: ANN401
+        '''Возвращает пользователя по username или email одним запросом.'''
+        return cls.pick_user(login, list(cls.login_candidates(login)))
+
+    @staticmethod
+    def login_candidates(login: str) -> QuerySet:
+        '''Пользователи, у которых username или email совпадает с логином.'''
+        username_field = UserModel.USERNAME_FIELD
+        return UserModel._default_manager.filter(Q(**{username_field: login}) | Q(email=login)).order_by()[:3]  # noqa: SLF001
+
+    @staticmethod
+    def pick_user(login: str, candidates: list[Any]) -> Any | None:  # noqa: ANN401
+        '''
+        Выбирает пользователя среди найденных.
+
+        Совпадение по username важнее совпадения по email. Email, который
+        указан у нескольких пользователей, не идентифицирует никого.
+        '''
+        username_field = UserModel.USERNAME_FIELD
+        for user in candidates:
+            if getattr(user, username_field) == login:
+                return user
+        return candidates[0] if len(candidates) == 1 else None
@@ -0,0 +1,182 @@
+'''
+Кэш готовых ответов профиля и статуса аутентификации.
+
+SPA запрашивает `auth-status/` при каждой смене маршрута, а профиль
+пользователя меняется редко. Поэтому для каждого пользователя хранится
+запись с его `updated_at`, валидаторами (ETag, Last-Modified) и уже
+отрисованными байтами обоих ответов: при попадании не выполняются ни
+запрос к БД, ни сериализатор, ни рендерер.
+
+Запись удаляется при сохранении или удалении пользователя (users.signals).
+`ProgressCache` так же хранит сводку прогресса пользователя по курсам.
+По умолчанию используется LocMemCache с ограничением MAX_ENTRIES: это
+LRU-кэш в памяти процесса, и удаление записи доходит только до него.
+Поэтому при WEB_CONCURRENCY > 1 алиас должен указывать на общий Redis
+(PROFILE_CACHE_BACKEND), иначе `manage.py check` сообщает ошибку users.E002.
+'''
+import time
+from typing import Any
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings as django_settings
+from django.core.cache import BaseCache, caches
+from django.http import HttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+from django_mai.conditional import make_etag
+
+from .models import User
+from .serializers import UserSerializer
+
+
+def get_renderer() -> BaseRenderer:
+    '''Возвращает первый рендерер из DEFAULT_RENDERER_CLASSES.'''
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def get_content_type(renderer: BaseRenderer) -> str:  # noqa: D103
+    return f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+
+
+@dataclass(frozen=True)
+class ProfileEntry:
+    '''Готовые ответы для одной версии пользователя.'''
+
+    user_id: int
+    updated_at: datetime
+    etag: str
+    content_type: str
+    profile: bytes
+    auth_status: bytes
+
+    def response(self, body: bytes) -> HttpResponse:
+        '''Возвращает ответ с готовым телом без повторной отрисовки.'''
+        return HttpResponse(body, content_type=self.content_type)
+
+
+class ProfileCache:
+    '''Записи ProfileEntry по id пользователя с проверкой updated_at.'''
+
+    key_prefix = 'users:profile'
+
+    def __init__(self, alias: str, timeout: int | None) -> None:
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self) -> BaseCache:  # noqa: D102
+        return caches[self.alias]
+
+    def make_key(self, user_id: object) -> str:  # noqa: D102
+        return f'{self.key_prefix}:{user_id}'
+
+    def get(self, user_id: object, updated_at: datetime | None = None) -> ProfileEntry | None:
+        '''
+        Возвращает запись пользователя или None.
+
+        Если `updated_at` известен, запись другой версии не возвращается.
+        '''
+        return self.check(self.cache.get(self.make_key(user_id)), updated_at)
+
+    async def aget(self, user_id: object, updated_at: datetime | None = None) -> ProfileEntry | None:
+        '''Асинхронная версия get().'''
+        return self.check(await self.cache.aget(self.make_key(user_id)), updated_at)
+
+    @staticmethod
+    def check(entry: ProfileEntry | None, updated_at: datetime | None) -> ProfileEntry | None:
+        '''Отбрасывает запись другой версии пользователя.'''
+        if entry is not None and updated_at is not None and entry.updated_at != updated_at:
+            return None
+        return entry
+
+    def build(self, user: User) -> ProfileEntry:
+        '''Сериализует и отрисовывает ответы пользователя один раз для обоих views.'''
+        renderer = get_renderer()
+        data = UserSerializer(user).data
+        return ProfileEntry(
+            user_id=user.pk,
+            updated_at=user.updated_at,
+            etag=make_etag(user.pk, user.updated_at.isoformat()),
+            content_type=get_content_type(renderer),
+            profile=renderer.render(data),
+            auth_status=renderer.render({'is_authenticated': True, 'user': data}),
+        )
+
+    def set(self, entry: ProfileEntry) -> ProfileEntry:  # noqa: D102
+        self.cache.set(self.make_key(entry.user_id), entry, timeout=self.timeout)
+        return entry
+
+    async def aset(self, entry: ProfileEntry) -> ProfileEntry:  # noqa: D102
+        await self.cache.aset(self.make_key(entry.user_id), entry, timeout=self.timeout)
+        return entry
+
+    def invalidate(self, user_id: object) -> None:  # noqa: D102
+        self.cache.delete(self.make_key(user_id))
+
+
+class ProgressCache:
+    '''
+    Сводка прогресса по курсам (courses.models.CompletedCourseQuerySet.progress) по id пользователя.
+
+    Запись пользователя удаляется при изменении его прохождений
+    (courses.signals и массовые методы CompletedCourse). Изменение цены
+    курса затрагивает всех прошедших его, поэтому оно сдвигает общую
+    версию, которая входит в ключи всех записей.
+    '''
+
+    key_prefix = 'users:progress'
+    version_key = 'users:progress:version'
+
+    def __init__(self, alias: str, timeout: int | None) -> None:
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self) -> BaseCache:  # noqa: D102
+        return caches[self.alias]
+
+    @property
+    def version(self) -> int:
+        '''Возвращает текущую версию цен курсов.'''
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # От часов: потерянный ключ версии не возвращает записи старой версии.
+            self.cache.add(self.version_key, time.time_ns() // 1000, timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def make_key(self, user_id: object) -> str:  # noqa: D102
+        return f'{self.key_prefix}:{self.version}:{user_id}'
+
+    def get_or_set(self, user_id: object, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        '''Возвращает сводку пользователя из кэша, при промахе вычисляя и сохраняя ее.'''
+        key = self.make_key(user_id)
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def invalidate(self, user_id: object) -> None:  # noqa: D102
+        self.cache.delete(self.make_key(user_id))
+
+    def invalidate_all(self) -> None:
+        '''Сбрасывает сводки всех пользователей переходом на новую версию.'''
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, time.time_ns() // 1000, timeout=None)
+
+
+profile_cache = ProfileCache(
+    alias=django_settings.USERS_PROFILE_CACHE['ALIAS'],
+    timeout=django_settings.USERS_PROFILE_CACHE['TIMEOUT'],
+)
+
+progress_cache = ProgressCache(
+    alias=django_settings.USERS_PROFILE_CACHE['ALIAS'],
+    timeout=django_settings.USERS_PROFILE_CACHE['TIMEOUT'],
+)
@@ -0,0 +1,58 @@
+'''
+Проверки конфигурации приложения пользователей (`manage.py check`).
+
+Список отозванных JWT (users.denylist) работает, только если все воркеры
+читают один кэш: в кэше памяти процесса отзыв увидел бы один воркер из
+нескольких, а остальные принимали бы токен до его истечения. Так же и кэш
+профилей: при сохранении пользователя запись удаляется только в кэше
+воркера, сохранившего пользователя.
+'''
+from django.conf import settings as django_settings
+from django.core.checks import CheckMessage, Error, Tags, register
+
+
+# Бэкенды, не разделяемые между процессами.
+PROCESS_LOCAL_CACHES = frozenset((
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+))
+
+
+def get_process_local_backend(alias: str) -> str | None:
+    '''Возвращает бэкенд алиаса кэша, если он не разделяется между процессами, иначе None.'''
+    backend = django_settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend if backend in PROCESS_LOCAL_CACHES else None
+
+
+@register(Tags.caches, Tags.security)
+def check_token_denylist_cache(**kwargs) -> list[CheckMessage]:  # noqa: ANN003, ARG001
+    '''Требует общий кэш для списка отозванных токенов, по умолчанию - при DEBUG=False.'''
+    options = django_settings.USERS_TOKEN_DENYLIST
+    alias = options['ALIAS']
+    backend = get_process_local_backend(alias)
+    if not options['REQUIRE_SHARED'] or backend is None:
+        return []
+    return [
+        Error(
+            f'Token denylist cache alias {alias!r} uses {backend}, which is not shared between workers.',
+            hint='Point TOKEN_CACHE_BACKEND/TOKEN_CACHE_LOCATION to a shared cache such as Redis.',
+            id='users.E001',
+        ),
+    ]
+
+
+@register(Tags.caches)
+def check_profile_cache(**kwargs) -> list[CheckMessage]:  # noqa: ANN003, ARG001
+    '''Требует общий кэш профилей при WEB_CONCURRENCY > 1.'''
+    alias = django_settings.USERS_PROFILE_CACHE['ALIAS']
+    backend = get_process_local_backend(alias)
+    if django_settings.WEB_CONCURRENCY <= 1 or backend is None:
+        return []
+    return [
+        Error(
+            f'Profile cache alias {alias!r} uses {backend}, which is not shared between '
+            f'{django_settings.WEB_CONCURRENCY} workers.',
+            hint='Point PROFILE_CACHE_BACKEND/PROFILE_CACHE_LOCATION to a shared cache such as Redis.',
+            id='users.E002',
+        ),
+    ]
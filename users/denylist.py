@@ -0,0 +1,88 @@
+'''
+Список отозванных JWT.
+
+Access-токены проверяются без запроса к БД, поэтому отзыв хранится в кэше:
+отдельные токены по `jti` (выход из системы) и все токены пользователя,
+выпущенные до момента отзыва (смена пароля, блокировка, изменение прав).
+Момент выпуска берется из claim `iat_us` с точностью до микросекунды:
+по `iat` в целых секундах вход сразу после смены пароля был бы отклонен.
+Записи живут не дольше самих токенов. Алиас кэша должен быть общим для всех
+воркеров (Redis в docker-compose.yml); кэш в памяти процесса допустим только
+при одном процессе, иначе (по умолчанию при DEBUG=False) `manage.py check`
+сообщает об ошибке users.E001.
+'''
+import math
+import time
+from typing import Any
+
+from django.conf import settings as django_settings
+from django.core.cache import BaseCache, caches
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+
+# Время выпуска токена в микросекундах (users.authentication.set_user_claims).
+ISSUED_AT_CLAIM = 'iat_us'
+
+
+class TokenDenylist:
+    '''Отозванные токены и пользователи, чьи токены отозваны целиком.'''
+
+    key_prefix = 'users:jwt:denylist'
+
+    def __init__(self, alias: str) -> None:
+        self.alias = alias
+
+    @property
+    def cache(self) -> BaseCache:  # noqa: D102
+        return caches[self.alias]
+
+    def token_key(self, jti: str) -> str:  # noqa: D102
+        return f'{self.key_prefix}:jti:{jti}'
+
+    def user_key(self, user_id: object) -> str:  # noqa: D102
+        return f'{self.key_prefix}:user:{user_id}'
+
+    def revoke(self, token: Token) -> None:
+        '''Отзывает один токен до истечения его срока действия.'''
+        timeout = max(math.ceil(token['exp'] - time.time()), 1)
+        self.cache.set(self.token_key(token[api_settings.JTI_CLAIM]), True, timeout=timeout)
+
+    def revoke_user(self, user_id: object) -> None:
+        '''Отзывает все уже выпущенные токены пользователя.'''
+        timeout = int(max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME).total_seconds())
+        self.cache.set(self.user_key(user_id), time.time(), timeout=timeout)
+
+    def is_revoked(self, token: Token) -> bool:
+        '''Проверяет токен одним обращением к кэшу.'''
+        keys = self.keys(token)
+        return self.check(token, keys, self.cache.get_many(keys))
+
+    async def ais_revoked(self, token: Token) -> bool:
+        '''Асинхронная версия is_revoked().'''
+        keys = self.keys(token)
+        return self.check(token, keys, await self.cache.aget_many(keys))
+
+    def keys(self, token: Token) -> list[str]:
+        '''Возвращает ключи токена и его пользователя.'''
+        return [
+            self.token_key(token.get(api_settings.JTI_CLAIM)),
+            self.user_key(token.get(api_settings.USER_ID_CLAIM)),
+        ]
+
+    @staticmethod
+    def check(token: Token, keys: list[str], values: dict[str, Any]) -> bool:
+        '''Решает по значениям из кэша, отозван ли токен.'''
+        token_key, user_key = keys
+        if token_key in values:
+            return True
+        revoked_at = values.get(user_key)
+        if revoked_at is None:
+            return False
+        if ISSUED_AT_CLAIM in token:
+            return token[ISSUED_AT_CLAIM] / 1_000_000 <= revoked_at
+        # Токены без iat_us: по целым секундам, выпущенные в секунду отзыва тоже отклоняются.
+        return token.get('iat', 0) <= revoked_at
+
+
+token_denylist = TokenDenylist(alias=django_settings.USERS_TOKEN_DENYLIST['ALIAS'])
@@ -1,23 +1,25 @@
-class PasswordsDontMatchError(ValueError):
+from rest_framework.exceptions import ValidationError
+
+
+class PasswordsDontMatchError(ValidationError):
 
     def __init__(self) -> None:
         super().__init__('Пароли не совпадают')
 
 
-class InvalidLoginOrPasswordError(ValueError):
+class InvalidLoginOrPasswordError(ValidationError):
 
     def __init__(self) -> None:
         super().__init__('Неверное имя пользователя/email или пароль')
 
 
-class UserAccountDeactivatedError(ValueError):
+class UserAccountDeactivatedError(ValidationError):
 
     def __init__(self) -> None:
         super().__init__('Аккаунт пользователя отключен')
 
 
-class UsernameOrPasswordDontProvidedError(ValueError):
+class UsernameOrPasswordDontProvidedError(ValidationError):
 
     def __init__(self) -> None:
         super().__init__('Необходимо указать имя пользователя и пароль')
-
@@ -0,0 +1,104 @@
+'''
+Хэширование паролей scrypt с настраиваемыми профилями стоимости.
+
+Параметры scrypt (N, r, p) берутся из профиля `PASSWORD_HASH_PROFILE`
+в `PASSWORD_HASH_PROFILES`. Хэш, созданный с другим профилем или другим
+алгоритмом (например, PBKDF2), при успешном входе прозрачно пересчитывается
+Django: `must_update()` сообщает о несовпадении параметров, и
+`User.check_password()` сохраняет новый хэш.
+
+Сам scrypt выполняется в ограниченном пуле потоков. OpenSSL отпускает GIL,
+поэтому хэши считаются параллельно, а размер пула ограничивает число
+одновременных вычислений и потребляемую ими память (128 * N * r байт на хэш).
+'''
+import asyncio
+import base64
+import hashlib
+import threading
+from typing import Any
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings as django_settings
+from django.contrib.auth.hashers import ScryptPasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_hash_executor() -> ThreadPoolExecutor:
+    '''Возвращает общий пул потоков для вычисления хэшей.'''
+    global _executor  # noqa: PLW0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=django_settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix='password-hash',
+            )
+        return _executor
+
+
+def run_in_hash_pool(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+    '''Выполняет функцию в пуле хэширования и ждет результат.'''
+    if threading.current_thread().name.startswith('password-hash'):
+        # Уже в пуле: повторная постановка в очередь могла бы заблокировать поток.
+        return func(*args, **kwargs)
+    return get_hash_executor().submit(func, *args, **kwargs).result()
+
+
+async def arun_in_hash_pool(func: Callable[..., Any], *args: Any) -> Any:  # noqa: ANN401
+    '''Выполняет функцию в пуле хэширования, не блокируя event loop.'''
+    return await asyncio.get_running_loop().run_in_executor(get_hash_executor(), func, *args)
+
+
+@receiver(setting_changed)
+def reset_hash_executor(setting: str, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Пересоздает пул при изменении PASSWORD_HASH_WORKERS в тестах.'''
+    global _executor  # noqa: PLW0603
+    if setting == 'PASSWORD_HASH_WORKERS':
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
+
+
+class ProfiledScryptPasswordHasher(ScryptPasswordHasher):
+    '''Scrypt с параметрами из текущего профиля стоимости.'''
+
+    @property
+    def profile(self) -> dict[str, int]:  # noqa: D102
+        return django_settings.PASSWORD_HASH_PROFILES[django_settings.PASSWORD_HASH_PROFILE]
+
+    @property
+    def work_factor(self) -> int:  # noqa: D102
+        return self.profile['work_factor']
+
+    @property
+    def block_size(self) -> int:  # noqa: D102
+        return self.profile['block_size']
+
+    @property
+    def parallelism(self) -> int:  # noqa: D102
+        return self.profile['parallelism']
+
+    def encode(self, password: str, salt: str, n: int | None = None, r: int | None = None, p: int | None = None) -> str:  # noqa: D102
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = run_in_hash_pool(
+            hashlib.scrypt,
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            # Хэши старых профилей могут требовать больше памяти, чем лимит OpenSSL по умолчанию (32 МиБ).
+            maxmem=2 * 128 * r * (n + p),
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
@@ -0,0 +1,65 @@
+import timeit
+from urllib.parse import urlparse
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.crypto import constant_time_compare, get_random_string
+from django.utils.http import is_same_domain
+
+from django_mai.middleware import CSRF
+
+
+CHARS = CSRF.CSRF_ALLOWED_CHARS
+
+
+def reference_mask(secret: str) -> str:
+    '''Per-character masking the middleware used before, kept to compare cost and output.'''
+    mask = get_random_string(CSRF.CSRF_SECRET_LENGTH, allowed_chars=CHARS)
+    pairs = zip((CHARS.index(x) for x in secret), (CHARS.index(x) for x in mask), strict=True)
+    return mask + ''.join(CHARS[(x + y) % len(CHARS)] for x, y in pairs)
+
+
+def reference_unmask(token: str) -> str:  # noqa: D103
+    mask, token = token[: CSRF.CSRF_SECRET_LENGTH], token[CSRF.CSRF_SECRET_LENGTH :]
+    pairs = zip((CHARS.index(x) for x in token), (CHARS.index(x) for x in mask), strict=True)
+    return ''.join(CHARS[x - y] for x, y in pairs)
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of CSRF token masking and trusted origin matching.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--number', type=int, default=20000, help='Calls per measurement.')
+        parser.add_argument('--origins', type=int, default=100, help='Wildcard trusted origins to match against.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        number = options['number']
+        secret = CSRF._get_new_csrf_string()  # noqa: SLF001
+        token = CSRF._mask_cipher_secret(secret)  # noqa: SLF001
+        if reference_unmask(token) != secret or CSRF._unmask_cipher_token(reference_mask(secret)) != secret:  # noqa: SLF001
+            self.stderr.write('Implementations disagree.')
+            return
+
+        cases = [
+            ('mask', lambda: reference_mask(secret), lambda: CSRF._mask_cipher_secret(secret)),  # noqa: SLF001
+            ('unmask', lambda: reference_unmask(token), lambda: CSRF._unmask_cipher_token(token)),  # noqa: SLF001
+            (
+                'check request token',
+                lambda: constant_time_compare(reference_unmask(token), secret),
+                lambda: CSRF._does_token_match(token, secret),  # noqa: SLF001
+            ),
+        ]
+        hosts = [f'.tenant{i}.example.com' for i in range(options['origins'])]
+        matcher = CSRF.DomainMatcher(hosts)
+        referer = 'https://app.tenant99999.example.com/courses/'
+        cases.append(
+            (
+                f'match {len(hosts)} origins',
+                lambda: (netloc := urlparse(referer).netloc) and any(is_same_domain(netloc, host) for host in hosts),
+                lambda: matcher(CSRF._parse_url(referer).netloc),  # noqa: SLF001
+            ),
+        )
+        self.stdout.write(f'{"operation":<22}{"before, us":>12}{"after, us":>12}{"speedup":>10}')
+        for label, before, after in cases:
+            before_us = min(timeit.repeat(before, number=number, repeat=3)) / number * 1e6
+            after_us = min(timeit.repeat(after, number=number, repeat=3)) / number * 1e6
+            self.stdout.write(f'{label:<22}{before_us:>12.2f}{after_us:>12.2f}{before_us / after_us:>9.1f}x')
@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings as django_settings
+from django.contrib.auth.hashers import BasePasswordHasher, PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand, CommandParser
+from django.test.utils import override_settings
+
+from users.hashers import ProfiledScryptPasswordHasher
+
+
+class Command(BaseCommand):
+    help = 'Measure password checks per second for each hash cost profile.'
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--logins', type=int, default=40, help='Password checks per profile.')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=django_settings.PASSWORD_HASH_WORKERS,
+            help='Concurrent logins, i.e. request threads of one worker.',
+        )
+        parser.add_argument('--profiles', default='', help='Comma separated profile names, all by default.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        profiles = [name for name in options['profiles'].split(',') if name] or list(
+            django_settings.PASSWORD_HASH_PROFILES,
+        )
+        threads = options['threads']
+        cores = min(threads, django_settings.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+        self.stdout.write(
+            f'{options["logins"]} logins, {threads} threads, '
+            f'{django_settings.PASSWORD_HASH_WORKERS} hash workers, {cores} cores used',
+        )
+        self.stdout.write(f'{"profile":<24}{"memory":>10}{"ms/login":>10}{"logins/s":>10}{"per core":>10}')
+
+        rows = [('pbkdf2 (django default)', PBKDF2PasswordHasher(), None)]
+        rows += [(name, ProfiledScryptPasswordHasher(), name) for name in profiles]
+        for label, hasher, profile in rows:
+            with override_settings(PASSWORD_HASH_PROFILE=profile or django_settings.PASSWORD_HASH_PROFILE):
+                memory = (
+                    f'{128 * hasher.work_factor * hasher.block_size // 2**20} MiB'
+                    if isinstance(hasher, ProfiledScryptPasswordHasher)
+                    else '-'
+                )
+                latency, rate = self.measure(hasher, options['logins'], threads)
+            self.stdout.write(f'{label:<24}{memory:>10}{latency * 1000:>10.1f}{rate:>10.1f}{rate / cores:>10.1f}')
+
+    @staticmethod
+    def measure(hasher: BasePasswordHasher, logins: int, threads: int) -> tuple[float, float]:
+        '''Return the latency of one check and the throughput of concurrent checks.'''
+        encoded = hasher.encode('correct horse battery staple', hasher.salt())
+        started = time.perf_counter()
+        hasher.verify('correct horse battery staple', encoded)
+        latency = time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: hasher.verify('correct horse battery staple', encoded), range(logins)))
+            elapsed = time.perf_counter() - started
+        return latency, logins / elapsed
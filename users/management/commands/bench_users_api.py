@@ -0,0 +1,97 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the users API of a running server, e.g. gunicorn (WSGI) against '
+        'gunicorn with uvicorn workers and USERS_ASYNC_VIEWS=True (ASGI).'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:  # noqa: D102
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL.')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument(
+            '--endpoint',
+            choices=['profile', 'auth-status', 'login'],
+            default='profile',
+            help='GET profile/auth-status with a token, or POST login with the credentials.',
+        )
+        parser.add_argument('--requests', type=int, default=1000, help='Total requests.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent keep-alive connections.')
+
+    def handle(self, **options) -> None:  # noqa: ANN003, D102
+        url = urlsplit(options['url'])
+        self.host, self.port = url.hostname, url.port or 80
+        credentials = json.dumps({'username': options['username'], 'password': options['password']})
+        if options['endpoint'] == 'login':
+            request = ('POST', '/api/users/login/', credentials, {'Content-Type': 'application/json'})
+        else:
+            status, body = self.request('POST', '/o/token/', credentials, {'Content-Type': 'application/json'})
+            if status != 200:  # noqa: PLR2004
+                msg = f'Could not obtain a token: {status} {body[:200]!r}'
+                raise CommandError(msg)
+            access = json.loads(body)['access']
+            request = ('GET', f'/api/users/{options["endpoint"]}/', None, {'Authorization': f'Bearer {access}'})
+
+        latencies: list[float] = []
+        errors = [0]
+        lock = threading.Lock()
+        per_worker, extra = divmod(options['requests'], options['concurrency'])
+
+        def worker(count: int) -> None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            local, failed = [], 0
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    connection.request(*request)
+                    response = connection.getresponse()
+                    response.read()
+                    failed += response.status >= 400  # noqa: PLR2004
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                local.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+        threads = [
+            threading.Thread(target=worker, args=(per_worker + (i < extra),)) for i in range(options['concurrency'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{request[0]} {request[1]}: {len(latencies)} requests, {options["concurrency"]} connections, '
+            f'{errors[0]} errors',
+        )
+        self.stdout.write(
+            f'{len(latencies) / elapsed:.1f} req/s, p50 {quantiles[49] * 1000:.1f} ms, '
+            f'p95 {quantiles[94] * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms',
+        )
+
+    def request(self, method: str, path: str, body: str | None, headers: dict[str, str]) -> tuple[int, bytes]:
+        '''Send one request on a new connection.'''
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
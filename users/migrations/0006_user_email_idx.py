@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+INDEX = models.Index(fields=('email',), name='users_user_email_idx')
+
+
+def add_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Add the email index without blocking writes to the users table on PostgreSQL.'''
+    table, name = quoted_names(apps, schema_editor)
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'CREATE INDEX {name} ON {table} (email)')
+        return
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which IF NOT EXISTS would keep.
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY {name} ON {table} (email)')
+
+
+def remove_index(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    '''Drop the email index.'''
+    _, name = quoted_names(apps, schema_editor)
+    concurrently = 'CONCURRENTLY IF EXISTS ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'DROP INDEX {concurrently}{name}')
+
+
+def quoted_names(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> tuple[str, str]:
+    '''Return quoted table and index names.'''
+    model = apps.get_model('users', 'User')
+    return (
+        schema_editor.quote_name(model._meta.db_table),  # noqa: SLF001
+        schema_editor.quote_name(INDEX.name),
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0005_alter_user_avatar'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='user', index=INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_index, remove_index),
+            ],
+        ),
+    ]
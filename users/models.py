@@ -5,10 +5,11 @@
 '''
 import typing as ty
 
-from django.conf import settings as django_settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from images.storage import images_storage
+
 
 class User(AbstractUser):
     '''
@@ -20,10 +21,18 @@ class User(AbstractUser):
     # Дополнительные поля пользователя
     avatar = models.ImageField(
         verbose_name='avatars',
-        storage=django_settings.IMAGES_STORAGE,
+        storage=images_storage,
         default='defaults/user.png'
     )
 
+    avatar_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты аватара',
+        help_text='Уменьшенные копии аватара для разных ширин экрана',
+    )
+
     phone_number = models.CharField(
         max_length=20,
         blank=True,
@@ -63,6 +72,10 @@ class User(AbstractUser):
         ordering: ty.ClassVar[list[str]] = [
             '-created_at'
         ]  # Сортировка по дате создания (новые сначала)
+        indexes = (
+            # Поиск пользователя по email при входе
+            models.Index(fields=('email',), name='users_user_email_idx'),
+        )
 
     def __str__(self) -> str:
         '''Строковое представление модели пользователя.'''
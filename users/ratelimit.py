@@ -0,0 +1,215 @@
+'''
+Ограничение частоты запросов входа, регистрации и выдачи токенов.
+
+Используется скользящее окно (sliding window counter): число запросов
+оценивается как `previous * (1 - elapsed / window) + current`, где
+`previous` и `current` - счетчики предыдущего и текущего фиксированных
+окон. Для каждого ключа хранятся всего два числа.
+
+Счетчики лежат в хранилище из настройки `RATE_LIMIT['STORE']`:
+
+* `LocalStore` - в памяти процесса и без блокировок, для одного узла;
+* `CacheStore` - в кэше Django (Redis, Memcached), общем для всех узлов.
+
+Проверка выполняется DRF-троттлингом до вызова view, то есть раньше
+запросов к БД и хэширования пароля.
+'''
+import itertools
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.core.cache import BaseCache, caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    '''Разбирает частоту вида `10/m` в пару (лимит, окно в секундах).'''
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+class BaseStore:
+    '''Хранилище счетчиков фиксированных окон.'''
+
+    def hit(self, key: str, index: int, window: int) -> tuple[int, int]:
+        '''Увеличивает счетчик окна `index` и возвращает счетчики предыдущего и текущего окон.'''
+        raise NotImplementedError
+
+
+class LocalStore(BaseStore):
+    '''
+    Счетчики в памяти процесса без блокировок.
+
+    Инкремент - это `next()` у `itertools.count`, атомарный в CPython, а
+    словари меняются только атомарными `setdefault()` и `pop()`. Для чтения
+    последнее значение счетчика копируется в `_values`: при гонке оно может
+    отстать на единицу, что для лимита несущественно.
+    '''
+
+    # Как часто удалять счетчики прошедших окон.
+    prune_every = 1000
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, int], itertools.count] = {}
+        self._values: dict[tuple[str, int], int] = {}
+        self._hits = itertools.count(1)
+
+    def hit(self, key: str, index: int, window: int) -> tuple[int, int]:  # noqa: ARG002, D102
+        current_key = (key, index)
+        counter = self._counters.get(current_key) or self._counters.setdefault(current_key, itertools.count(1))
+        current = next(counter)
+        self._values[current_key] = current
+        if next(self._hits) % self.prune_every == 0:
+            self.prune(index)
+        return self._values.get((key, index - 1), 0), current
+
+    def prune(self, index: int) -> None:
+        '''Удаляет счетчики окон старше предыдущего.'''
+        for counter_key in list(self._counters):
+            if counter_key[1] < index - 1:
+                self._counters.pop(counter_key, None)
+                self._values.pop(counter_key, None)
+
+
+class CacheStore(BaseStore):
+    '''Счетчики в кэше Django, общие для всех процессов и узлов.'''
+
+    key_prefix = 'users:ratelimit'
+
+    def __init__(self, alias: str = 'default') -> None:
+        self.alias = alias
+
+    @property
+    def cache(self) -> BaseCache:  # noqa: D102
+        return caches[self.alias]
+
+    def hit(self, key: str, index: int, window: int) -> tuple[int, int]:  # noqa: D102
+        current_key = f'{self.key_prefix}:{key}:{index}'
+        # Ключ живет два окна: в следующем окне он нужен как предыдущий.
+        self.cache.add(current_key, 0, timeout=2 * window)
+        current = self.cache.incr(current_key)
+        previous = self.cache.get(f'{self.key_prefix}:{key}:{index - 1}', 0)
+        return previous, current
+
+
+class RateLimitMetrics:
+    '''Счетчики пропущенных и отклоненных запросов этого процесса по scope и правилу.'''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, str, str], int] = {}
+
+    def record(self, scope: str, rule: str, *, admitted: bool) -> None:  # noqa: D102
+        key = (scope, rule, 'admitted' if admitted else 'rejected')
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self) -> dict[str, dict[str, dict[str, int]]]:
+        '''Возвращает `{scope: {rule: {'admitted': n, 'rejected': n}}}`.'''
+        stats: dict[str, dict[str, dict[str, int]]] = {}
+        with self._lock:
+            for (scope, rule, outcome), count in self._counts.items():
+                stats.setdefault(scope, {}).setdefault(rule, {'admitted': 0, 'rejected': 0})[outcome] = count
+        return stats
+
+
+metrics = RateLimitMetrics()
+
+_store: BaseStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BaseStore:
+    '''Возвращает хранилище счетчиков из настроек.'''
+    global _store  # noqa: PLW0603
+    with _store_lock:
+        if _store is None:
+            config = django_settings.RATE_LIMIT
+            _store = import_string(config['STORE'])(**config.get('STORE_OPTIONS', {}))
+        return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting: str, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Сбрасывает хранилище при изменении RATE_LIMIT в тестах.'''
+    global _store  # noqa: PLW0603
+    if setting == 'RATE_LIMIT':
+        _store = None
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    '''
+    DRF-троттлинг по правилам `RATE_LIMIT['RATES'][scope]`.
+
+    Правило `ip` ограничивает запросы с одного адреса, правило `username` -
+    попытки для одного имени пользователя или email с любых адресов. Адрес
+    берется DRF `get_ident()`: REMOTE_ADDR или, при `NUM_PROXIES`, адрес,
+    добавленный в X-Forwarded-For ближайшим доверенным прокси, - остальную
+    часть заголовка подставляет клиент.
+    '''
+
+    scope: str
+
+    def __init__(self) -> None:
+        self.retry_after: float | None = None
+
+    def get_keys(self, request: Request) -> dict[str, str | None]:
+        '''Возвращает значение ключа для каждого правила.'''
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        return {
+            'ip': self.get_ident(request),
+            'username': str(username).strip().lower() if username else None,
+        }
+
+    def allow_request(self, request: Request, view: APIView) -> bool:  # noqa: ARG002, D102
+        config = django_settings.RATE_LIMIT
+        if not config['ENABLED']:
+            return True
+        keys = self.get_keys(request)
+        now = time.time()
+        allowed = True
+        for rule, rate in config['RATES'].get(self.scope, {}).items():
+            if keys.get(rule) is None:
+                continue
+            limit, window = parse_rate(rate)
+            index, elapsed = divmod(now, window)
+            previous, current = get_store().hit(f'{self.scope}:{rule}:{keys[rule]}', int(index), window)
+            weight = 1 - elapsed / window
+            admitted = previous * weight + current <= limit
+            metrics.record(self.scope, rule, admitted=admitted)
+            if not admitted:
+                allowed = False
+                self.retry_after = max(self.retry_after or 0, self.get_wait(previous, current, limit, window, elapsed))
+        return allowed
+
+    @staticmethod
+    def get_wait(previous: int, current: int, limit: int, window: int, elapsed: float) -> float:
+        '''Время, через которое оценка числа запросов опустится до лимита.'''
+        if current >= limit or not previous:
+            # Нужно дождаться следующего окна, в котором текущий счетчик станет предыдущим.
+            return window - elapsed + window * (1 - limit / current)
+        return max(window * (1 - (limit - current) / previous) - elapsed, 0)
+
+    def wait(self) -> float | None:  # noqa: D102
+        return self.retry_after
+
+
+class LoginRateThrottle(SlidingWindowThrottle):
+    scope = 'login'
+
+
+class RegisterRateThrottle(SlidingWindowThrottle):
+    scope = 'register'
+
+
+class TokenRateThrottle(SlidingWindowThrottle):
+    scope = 'token'
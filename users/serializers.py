@@ -4,24 +4,64 @@
 Обрабатывают преобразование данных между Python объектами и JSON.
 '''
 
+from typing import Any
+
 from django.contrib.auth import authenticate
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from django_mai.serializers import ProjectionMixin
+from images.fields import RenditionStatusField, SrcSetField
 
 from . import exceptions
+from .authentication import set_user_claims
+from .denylist import token_denylist
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProjectionMixin, serializers.ModelSerializer):
     '''
     Сериализатор для модели пользователя.
 
-    Используется для отображения информации о пользователе.
+    Используется для отображения информации о пользователе. Поля
+    перечислены явно: группы и права (many-to-many, запрос на каждого
+    пользователя) не выводятся. `fields=` оставляет только часть полей,
+    а `project()` загружает только нужные им колонки.
     '''
 
+    avatar_srcset = SrcSetField(source='avatar_renditions')
+    avatar_status = RenditionStatusField(source='avatar_renditions')
+
     class Meta:  # noqa: D106
         model = User
-        exclude = ('password', 'last_login', 'is_superuser', 'is_staff', 'is_active', 'is_verified')
-        read_only_fields = ('id', 'created_at', 'updated_at', 'is_verified')
+        fields = (
+            'id',
+            'username',
+            'email',
+            'first_name',
+            'last_name',
+            'avatar',
+            'avatar_srcset',
+            'avatar_status',
+            'phone_number',
+            'birth_date',
+            'date_joined',
+            'created_at',
+            'updated_at',
+        )
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+
+class ProgressSerializer(serializers.Serializer):
+    '''Сводка прогресса пользователя по курсам.'''
+
+    courses_completed = serializers.IntegerField()
+    total_courses = serializers.IntegerField()
+    completion_percentage = serializers.FloatField()
+    total_spent = serializers.DecimalField(max_digits=12, decimal_places=2)
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -111,25 +151,13 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            # Пытаемся аутентифицировать пользователя
+            # Бэкенд ищет пользователя по username или email одним запросом
             user = authenticate(
                 request=self.context.get('request'),
                 username=username,
                 password=password,
             )
 
-            if not user:
-                # Если аутентификация не удалась, проверяем по email
-                try:
-                    user_by_email = User.objects.get(email=username)
-                    user = authenticate(
-                        request=self.context.get('request'),
-                        username=user_by_email.username,
-                        password=password,
-                    )
-                except User.DoesNotExist:
-                    pass
-
             if not user:
                 raise exceptions.InvalidLoginOrPasswordError
 
@@ -140,3 +168,33 @@ class LoginSerializer(serializers.Serializer):
             return attrs
 
         raise exceptions.UsernameOrPasswordDontProvidedError
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    '''Выдает пару токенов с полями пользователя для ClaimsJWTAuthentication.'''
+
+    @classmethod
+    def get_token(cls, user: User) -> Token:  # noqa: D102
+        return set_user_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    '''
+    Обновляет access-токен.
+
+    Отклоняет отозванные refresh-токены и записывает в новый access-токен
+    актуальные поля пользователя, а не скопированные при входе.
+    '''
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, str]:  # noqa: D102
+        refresh = self.token_class(attrs['refresh'])
+        if token_denylist.is_revoked(refresh):
+            msg = 'Token is revoked'
+            raise InvalidToken(msg)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}).first()
+        if user is None:
+            # Пользователь удален: claims старого токена не переносятся в новый access-токен.
+            msg = 'User not found'
+            raise InvalidToken(msg)
+        set_user_claims(refresh, user)
+        return super().validate({**attrs, 'refresh': str(refresh)})
@@ -0,0 +1,65 @@
+'''
+Обработчики сигналов моделей пользователей.
+
+Создают уменьшенные копии аватара после его загрузки, освобождают
+файлы аватара удаленного пользователя, отзывают его JWT при смене
+пароля, блокировке или изменении прав и сбрасывают кэш его профиля.
+'''
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from images.renditions import refresh_renditions, release_renditions
+
+from .cache import profile_cache
+from .denylist import token_denylist
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def build_avatar_renditions(instance: User, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Создает уменьшенные копии нового аватара.'''
+    refresh_renditions(instance, 'avatar', 'avatar_renditions')
+
+
+@receiver(post_delete, sender=User)
+def release_avatar(instance: User, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Освобождает файлы аватара, чтобы gc_images удалил их, если они больше не используются.'''
+    release_renditions(instance, 'avatar', 'avatar_renditions')
+
+
+# Поля прав, записанные в claims access-токена (users.authentication.USER_CLAIMS).
+PRIVILEGE_FIELDS = frozenset(('is_staff', 'is_superuser'))
+
+
+@receiver(pre_save, sender=User)
+def remember_privileges(instance: User, update_fields: frozenset | None, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Запоминает сохраненные права пользователя, чтобы после сохранения заметить их изменение.'''
+    instance._stored_privileges = None  # noqa: SLF001
+    if instance._state.adding or (update_fields is not None and not PRIVILEGE_FIELDS & set(update_fields)):  # noqa: SLF001
+        # Вход сохраняет только last_login: лишнего запроса нет.
+        return
+    instance._stored_privileges = User.objects.filter(pk=instance.pk).values('is_staff', 'is_superuser').first()  # noqa: SLF001
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens(instance: User, created: bool, update_fields: frozenset | None, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Отзывает выпущенные токены, если пароль изменен, пользователь заблокирован или изменились его права.'''
+    # set_password() хранит новый пароль в _password до конца save(). При входе Django сам
+    # перехеширует тот же пароль и сохраняет только это поле: это не смена пароля.
+    password_changed = instance._password is not None and update_fields != {'password'}  # noqa: SLF001
+    # Иначе снятые права оставались бы в claims живых access-токенов до их истечения.
+    stored = getattr(instance, '_stored_privileges', None)
+    privileges_changed = stored is not None and stored != {field: getattr(instance, field) for field in stored}
+    if not created and (password_changed or privileges_changed or not instance.is_active):
+        token_denylist.revoke_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_cache(instance: User, **kwargs) -> None:  # noqa: ANN003, ARG001
+    '''Удаляет готовые ответы профиля пользователя.'''
+    profile_cache.invalidate(instance.pk)
+    # Запрос, прочитавший пользователя до фиксации транзакции, мог снова заполнить кэш старыми данными.
+    transaction.on_commit(lambda: profile_cache.invalidate(instance.pk))
@@ -1,3 +1,563 @@
-from django.test import TestCase
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+from django.utils.cache import has_vary_header
+from django.utils.http import is_same_domain
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.cache import catalog_cache
+from courses.models import CompletedCourse, Course
+from django_mai.middleware import CSRF
+
+from . import async_views
+from .authentication import ClaimsJWTAuthentication
+from .cache import profile_cache, progress_cache
+from .checks import check_profile_cache, check_token_denylist_cache
+from .denylist import token_denylist
+from .management.commands.bench_csrf import reference_mask, reference_unmask
+from .models import User
+from .ratelimit import metrics
+from .serializers import ClaimsTokenObtainPairSerializer, UserSerializer
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ProfileConditionalGetTests(APITestCase):
+
+    def setUp(self) -> None:  # noqa: D102
+        self.user = User.objects.create_user(username='student')
+        self.client.force_authenticate(self.user)
+
+    def test_profile_not_modified(self) -> None:  # noqa: D102
+        etag = self.client.get('/api/users/profile/')['ETag']
+        response = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_profile_etag_changes_on_update(self) -> None:  # noqa: D102
+        etag = self.client.get('/api/users/profile/')['ETag']
+        self.client.patch('/api/users/profile/update/', {'first_name': 'Иван'})
+        self.user.refresh_from_db()
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_responses_vary_on_session_cookie(self) -> None:  # noqa: D102
+        profile = self.client.get('/api/users/profile/')
+        not_modified = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=profile['ETag'])
+        self.client.force_authenticate(None)
+        anonymous = self.client.get('/api/users/auth-status/')
+        for response in (profile, not_modified, anonymous):
+            self.assertTrue(all(has_vary_header(response, header) for header in ('Authorization', 'Cookie')))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ClaimsJWTAuthenticationTests(APITestCase):
+    '''Access tokens authenticate without loading the user from the database.'''
+
+    def setUp(self) -> None:  # noqa: D102
+        token_denylist.cache.clear()
+        self.user = User.objects.create_user(username='student', password='password')  # noqa: S106
+        tokens = self.client.post('/o/token/', {'username': 'student', 'password': 'password'}).data
+        self.refresh = tokens['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+
+    def test_catalog_read_issues_no_auth_query(self) -> None:  # noqa: D102
+        self.client.get('/api/courses/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_full_user_is_loaded_lazily(self) -> None:  # noqa: D102
+        token = AccessToken(self.client._credentials['HTTP_AUTHORIZATION'].split()[1])  # noqa: SLF001
+        user = ClaimsJWTAuthentication().get_user(token)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.username, user.is_staff), (self.user.pk, 'student', False))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
+            self.assertEqual(user.email, self.user.email)
+
+    def test_logout_revokes_tokens(self) -> None:  # noqa: D102
+        self.assertEqual(self.client.post('/api/users/logout/', {'refresh': self.refresh}).status_code, 200)
+        self.assertEqual(self.client.get('/api/courses/').status_code, 401)
+        self.assertEqual(self.client.post('/o/token/refresh/', {'refresh': self.refresh}).status_code, 401)
+
+    def test_login_right_after_password_change_is_accepted(self) -> None:  # noqa: D102
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/courses/').status_code, 401)
+        tokens = self.client.post('/o/token/', {'username': 'student', 'password': 'new-password'}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(self.client.get('/api/courses/').status_code, 200)
+        self.assertEqual(self.client.post('/o/token/refresh/', {'refresh': tokens['refresh']}).status_code, 200)
+
+    def test_revocation_within_one_second(self) -> None:  # noqa: D102
+        revoked_at = int(time.time()) + 0.5
+        with mock.patch('users.denylist.time.time', return_value=revoked_at):
+            token_denylist.revoke_user(self.user.pk)
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        for issued_at, revoked in ((revoked_at - 0.1, True), (revoked_at + 0.1, False)):
+            token['iat'], token['iat_us'] = int(issued_at), round(issued_at * 1_000_000)
+            self.assertIs(token_denylist.is_revoked(token), revoked)
+        # Tokens issued before iat_us are compared by whole seconds.
+        del token['iat_us']
+        self.assertTrue(token_denylist.is_revoked(token))
+
+    def test_deactivation_revokes_tokens(self) -> None:  # noqa: D102
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/courses/').status_code, 401)
+
+    def test_privilege_change_revokes_tokens(self) -> None:  # noqa: D102
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        tokens = self.client.post('/o/token/', {'username': 'student', 'password': 'password'}).data
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(self.client.get('/api/courses/completedcourses/', {'scope': 'all'}).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Иван'
+        user.save()
+        self.assertEqual(self.client.get('/api/courses/').status_code, 200)
+        user.is_staff = False
+        user.save()
+        self.assertEqual(self.client.get('/api/courses/completedcourses/', {'scope': 'all'}).status_code, 401)
+        self.assertEqual(self.client.post('/o/token/refresh/', {'refresh': tokens['refresh']}).status_code, 401)
+
+    def test_refresh_of_deleted_user_is_rejected(self) -> None:  # noqa: D102
+        self.user.delete()
+        self.assertEqual(self.client.post('/o/token/refresh/', {'refresh': self.refresh}).status_code, 401)
+
+
+class TokenDenylistCheckTests(SimpleTestCase):
+    '''Список отозванных токенов требует общий для воркеров кэш.'''
+
+    required = {'ALIAS': 'tokens', 'REQUIRE_SHARED': True}
+
+    def test_process_local_cache_is_an_error(self) -> None:  # noqa: D102
+        with override_settings(USERS_TOKEN_DENYLIST=self.required):
+            self.assertEqual([error.id for error in check_token_denylist_cache()], ['users.E001'])
+        with override_settings(USERS_TOKEN_DENYLIST={**self.required, 'REQUIRE_SHARED': False}):
+            self.assertEqual(check_token_denylist_cache(), [])
+
+    def test_shared_cache_passes(self) -> None:  # noqa: D102
+        caches = {'tokens': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis'}}
+        with override_settings(USERS_TOKEN_DENYLIST=self.required, CACHES=caches):
+            self.assertEqual(check_token_denylist_cache(), [])
+
+
+class ProfileCacheCheckTests(SimpleTestCase):
+    '''Кэш профилей должен быть общим для нескольких воркеров.'''
+
+    def test_process_local_cache_is_an_error(self) -> None:  # noqa: D102
+        with override_settings(WEB_CONCURRENCY=3):
+            self.assertEqual([error.id for error in check_profile_cache()], ['users.E002'])
+        with override_settings(WEB_CONCURRENCY=1):
+            self.assertEqual(check_profile_cache(), [])
+
+    def test_shared_cache_passes(self) -> None:  # noqa: D102
+        caches = {'profiles': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis'}}
+        with override_settings(WEB_CONCURRENCY=3, CACHES=caches):
+            self.assertEqual(check_profile_cache(), [])
+
+
+class UsernameOrEmailBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student', email='student@example.com', password='password')  # noqa: S106
+        # Username of one user equal to the email of another one.
+        cls.other = User.objects.create_user(username='other@example.com', password='password')  # noqa: S106
+        User.objects.create_user(username='namesake', email='other@example.com', password='password')  # noqa: S106
+
+    def test_login_by_username_or_email_in_one_query(self) -> None:  # noqa: D102
+        for login in ('student', 'student@example.com'):
+            with self.subTest(login=login), self.assertNumQueries(1):
+                self.assertEqual(authenticate(username=login, password='password'), self.user)  # noqa: S106
+
+    def test_username_wins_over_email(self) -> None:  # noqa: D102
+        self.assertEqual(authenticate(username='other@example.com', password='password'), self.other)  # noqa: S106
+
+    def test_failed_login_checks_one_hash(self) -> None:  # noqa: D102
+        hasher_class = type(get_hasher())
+        for login in ('student@example.com', 'unknown'):
+            with self.subTest(login=login), mock.patch.object(
+                hasher_class, 'encode', autospec=True, side_effect=hasher_class.encode,
+            ) as encode, self.assertNumQueries(1):
+                self.assertIsNone(authenticate(username=login, password='wrong'))  # noqa: S106
+            self.assertEqual(encode.call_count, 1)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['users.hashers.ProfiledScryptPasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher'],
+    PASSWORD_HASH_PROFILES={
+        'low': {'work_factor': 2**8, 'block_size': 8, 'parallelism': 1},
+        'high': {'work_factor': 2**9, 'block_size': 8, 'parallelism': 1},
+    },
+    PASSWORD_HASH_PROFILE='low',  # noqa: S106
+)
+class PasswordHashProfileTests(TestCase):
+
+    def test_login_rehashes_to_current_profile(self) -> None:  # noqa: D102
+        user = User.objects.create_user(username='student')
+        user.password = make_password('password', hasher='md5')
+        user.save()
+
+        self.assertEqual(authenticate(username='student', password='password'), user)  # noqa: S106
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$256$'))
+
+        with override_settings(PASSWORD_HASH_PROFILE='high'):  # noqa: S106
+            self.assertEqual(authenticate(username='student', password='password'), user)  # noqa: S106
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$512$'))
+
+
+@override_settings(
+    ALLOWED_HOSTS=['testserver'],
+    RATE_LIMIT={
+        'ENABLED': True,
+        'STORE': 'users.ratelimit.LocalStore',
+        'RATES': {'token': {'ip': '3/m', 'username': '2/m'}},
+    },
+)
+class TokenRateLimitTests(APITestCase):
+
+    def login(self, username: str, ip: str = '10.0.0.1') -> Response:  # noqa: D102
+        data = {'username': username, 'password': 'wrong'}
+        return self.client.post('/o/token/', data, REMOTE_ADDR=ip)
+
+    def test_ip_limit_rejects_before_database(self) -> None:  # noqa: D102
+        rejected = metrics.stats().get('token', {}).get('ip', {}).get('rejected', 0)
+        for i in range(3):
+            self.assertEqual(self.login(f'user-{i}').status_code, 401)
+        with self.assertNumQueries(0):
+            response = self.login('user-3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(metrics.stats()['token']['ip']['rejected'], rejected + 1)
+
+    def test_forwarded_for_does_not_bypass_ip_limit(self) -> None:  # noqa: D102
+        data = {'password': 'wrong'}
+        statuses = [
+            self.client.post('/o/token/', {**data, 'username': f'spoofer-{i}'}, REMOTE_ADDR='10.0.0.5',
+                             HTTP_X_FORWARDED_FOR=f'192.0.2.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [401, 401, 401, 429])
+
+    def test_ip_behind_proxy_is_taken_from_the_proxy(self) -> None:  # noqa: D102
+        rest_framework = {**django_settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        data = {'password': 'wrong'}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            # nginx appends the address it saw to whatever the client sent.
+            statuses = [
+                self.client.post('/o/token/', {**data, 'username': f'proxied-{i}'}, REMOTE_ADDR='172.20.0.3',
+                                 HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 198.51.100.7').status_code
+                for i in range(4)
+            ]
+            self.assertEqual(statuses, [401, 401, 401, 429])
+            other = self.client.post('/o/token/', {**data, 'username': 'proxied-4'}, REMOTE_ADDR='172.20.0.3',
+                                     HTTP_X_FORWARDED_FOR='198.51.100.8')
+            self.assertEqual(other.status_code, 401)
+
+    def test_username_limit_spans_addresses(self) -> None:  # noqa: D102
+        self.assertEqual(self.login('Student', ip='10.0.0.2').status_code, 401)
+        self.assertEqual(self.login('student', ip='10.0.0.3').status_code, 401)
+        self.assertEqual(self.login('student', ip='10.0.0.4').status_code, 429)
+        self.assertEqual(self.login('other', ip='10.0.0.4').status_code, 401)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ProfileCacheTests(APITestCase):
+    '''Профиль и статус аутентификации отдаются из кэша готовых ответов.'''
+
+    def setUp(self) -> None:  # noqa: D102
+        token_denylist.cache.clear()
+        self.user = User.objects.create_user(username='student')
+        access = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_auth_status_hit_skips_database(self) -> None:  # noqa: D102
+        first = self.client.get('/api/users/auth-status/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/users/auth-status/')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.json()['user']['username'], 'student')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/users/profile/').json()['username'], 'student')
+
+    def test_update_invalidates_entry(self) -> None:  # noqa: D102
+        etag = self.client.get('/api/users/profile/')['ETag']
+        self.client.patch('/api/users/profile/update/', {'first_name': 'Иван'})
+        response = self.client.get('/api/users/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['first_name'], 'Иван')
+        self.assertEqual(self.client.get('/api/users/auth-status/').json()['user']['first_name'], 'Иван')
+
+    def test_entry_of_other_version_is_ignored(self) -> None:  # noqa: D102
+        profile_cache.set(profile_cache.build(self.user))
+        self.assertIsNotNone(profile_cache.get(self.user.pk, self.user.updated_at))
+        User.objects.filter(pk=self.user.pk).update(first_name='Иван', updated_at=timezone.now())
+        self.user.refresh_from_db()
+        self.assertIsNone(profile_cache.get(self.user.pk, self.user.updated_at))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ProgressTests(APITestCase):
+    '''Сводка прогресса считается одним запросом и сбрасывается при изменении прохождений.'''
+
+    @classmethod
+    def setUpTestData(cls) -> None:  # noqa: D102
+        cls.user = User.objects.create_user(username='student')
+        cls.courses = Course.objects.bulk_create(
+            Course(title=f'Course {i}', price=price, author='Author', link='https://example.com/')
+            for i, price in enumerate((Decimal('10.00'), Decimal('20.50'), Decimal('5.00')))
+        )
+        CompletedCourse.objects.complete(cls.user.pk, [cls.courses[0].pk, cls.courses[1].pk])
+
+    def setUp(self) -> None:  # noqa: D102
+        progress_cache.cache.clear()
+        catalog_cache.invalidate()
+        self.client.force_authenticate(self.user)
+
+    def get_progress(self) -> dict:  # noqa: D102
+        return self.client.get('/api/users/profile/progress/').json()
+
+    def test_summary_is_one_aggregate_and_cached(self) -> None:  # noqa: D102
+        # Агрегат по прохождениям пользователя и число курсов каталога.
+        with self.assertNumQueries(2):
+            progress = self.get_progress()
+        self.assertEqual(
+            progress,
+            {'courses_completed': 2, 'total_courses': 3, 'completion_percentage': 66.67, 'total_spent': '30.50'},
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_progress(), progress)
+
+    def test_empty_progress(self) -> None:  # noqa: D102
+        self.client.force_authenticate(User.objects.create_user(username='new'))
+        self.assertEqual(self.get_progress()['total_spent'], '0.00')
+        self.assertEqual(self.get_progress()['completion_percentage'], 0.0)
+
+    def test_completion_changes_invalidate(self) -> None:  # noqa: D102
+        self.get_progress()
+        with self.captureOnCommitCallbacks(execute=True):
+            CompletedCourse.objects.create(user=self.user, course=self.courses[2])
+        self.assertEqual(self.get_progress()['courses_completed'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            CompletedCourse.objects.uncomplete(self.user.pk, [self.courses[0].pk])
+        self.assertEqual(self.get_progress()['total_spent'], '25.50')
+
+    def test_price_change_invalidates(self) -> None:  # noqa: D102
+        self.get_progress()
+        course = self.courses[0]
+        course.price = Decimal('12.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        self.assertEqual(self.get_progress()['total_spent'], '32.50')
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class UserProjectionTests(APITestCase):
+    '''Пользователь загружается одним запросом только с нужными колонками.'''
+
+    def setUp(self) -> None:  # noqa: D102
+        token_denylist.cache.clear()
+        self.user = User.objects.create_user(username='student', email='student@example.com')
+        self.user.groups.create(name='students')
+        access = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_profile_miss_is_one_narrow_query(self) -> None:  # noqa: D102
+        profile_cache.invalidate(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/api/users/profile/').json()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('password', queries[0]['sql'])
+        self.assertNotIn('groups', data)
+        self.assertNotIn('user_permissions', data)
+
+    def test_sparse_fieldset(self) -> None:  # noqa: D102
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/profile/', {'fields': 'username,email'})
+        self.assertEqual(response.json(), {'username': 'student', 'email': 'student@example.com'})
+        self.assertNotIn('first_name', queries[0]['sql'])
+        self.assertNotEqual(response['ETag'], self.client.get('/api/users/profile/')['ETag'])
+
+        response = self.client.get('/api/users/auth-status/', {'fields': 'id'})
+        self.assertEqual(response.json(), {'is_authenticated': True, 'user': {'id': self.user.pk}})
+
+        response = self.client.get('/api/users/profile/', {'fields': 'username,password'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncUrlconf:
+    '''users.urls при USERS_ASYNC_VIEWS=True.'''
+
+    urlpatterns = [
+        path('api/users/register/', async_views.register_view),
+        path('api/users/login/', async_views.login_view),
+        path('api/users/profile/', async_views.profile_view),
+        path('api/users/auth-status/', async_views.auth_status_view),
+    ]
+
+
+@override_settings(
+    ALLOWED_HOSTS=['testserver'],
+    ROOT_URLCONF=AsyncUrlconf,
+    PASSWORD_HASHERS=[
+        'users.hashers.ProfiledScryptPasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+    PASSWORD_HASH_PROFILES={'low': {'work_factor': 2**8, 'block_size': 8, 'parallelism': 1}},
+    PASSWORD_HASH_PROFILE='low',  # noqa: S106
+    RATE_LIMIT={'ENABLED': False},
+)
+class AsyncViewsTests(TestCase):
+
+    def setUp(self) -> None:  # noqa: D102
+        token_denylist.cache.clear()
+        self.user = User.objects.create_user(username='student', email='student@example.com')
+        self.user.password = make_password('password', hasher='md5')
+        self.user.save()
+        access = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        # AsyncClient передает заголовки через headers, а не через ключи META.  # noqa: RUF003
+        self.auth = {'Authorization': f'Bearer {access}'}
+
+    async def post(self, url: str, data: dict) -> Response:  # noqa: D102
+        return await self.async_client.post(url, data, content_type='application/json')
+
+    async def test_profile_matches_sync_view(self) -> None:  # noqa: D102
+        response = await self.async_client.get('/api/users/profile/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), await sync_to_async(lambda: UserSerializer(self.user).data)())
+
+        headers = {**self.auth, 'If-None-Match': response['ETag']}
+        response = await self.async_client.get('/api/users/profile/', headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertTrue(all(has_vary_header(response, header) for header in ('Authorization', 'Cookie')))
+
+        response = await self.async_client.get('/api/users/profile/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_authentication_classes_follow_settings(self) -> None:  # noqa: D102
+        rest_framework = {
+            **django_settings.REST_FRAMEWORK,
+            'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework_simplejwt.authentication.JWTAuthentication'],
+        }
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            # Без aauthenticate() синхронный аутентификатор выполняется в потоке.
+            response = await self.async_client.get('/api/users/profile/', headers=self.auth)
+            self.assertEqual(response.json()['username'], 'student')
+        with override_settings(REST_FRAMEWORK={**rest_framework, 'DEFAULT_AUTHENTICATION_CLASSES': []}):
+            response = await self.async_client.get('/api/users/profile/', headers=self.auth)
+            self.assertEqual(response.status_code, 403)
+
+    async def test_auth_status(self) -> None:  # noqa: D102
+        response = await self.async_client.get('/api/users/auth-status/', headers=self.auth)
+        self.assertEqual(response.json()['user']['username'], 'student')
+        self.assertTrue(all(has_vary_header(response, header) for header in ('Authorization', 'Cookie')))
+        response = await self.async_client.get('/api/users/auth-status/')
+        self.assertEqual(response.json(), {'is_authenticated': False, 'user': None})
+
+    async def test_login_rehashes_password(self) -> None:  # noqa: D102
+        response = await self.post('/api/users/login/', {'username': 'student@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.post('/api/users/login/', {'username': 'student@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'student')
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$256$'))
+
+    async def test_login_errors_match_sync_view(self) -> None:  # noqa: D102
+        failed = mock.Mock()
+        user_login_failed.connect(failed)
+        self.addCleanup(user_login_failed.disconnect, failed)
+        data = {'username': 'student', 'password': 'wrong'}
+        response = await self.post('/api/users/login/', data)
+        sync_post = sync_to_async(self.client.post)
+        sync_response = await sync_post('/api/users/login/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(failed.call_count, 2)
+
+    async def test_login_rejects_non_object_body(self) -> None:  # noqa: D102
+        response = await self.async_client.post('/api/users/login/', [1, 2], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.json()['errors'])
+
+    async def test_register(self) -> None:  # noqa: D102
+        data = {
+            'username': 'newbie',
+            'email': 'newbie@EXAMPLE.com',
+            'password': 'long-password',
+            'password_confirm': 'long-password',
+        }
+        response = await self.post('/api/users/register/', data)
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('sessionid', response.cookies)
+        user = await User.objects.aget(username='newbie')
+        self.assertEqual(user.email, 'newbie@example.com')
+        self.assertTrue(await sync_to_async(user.check_password)('long-password'))
+
+        self.assertEqual((await self.post('/api/users/register/', data)).status_code, 400)
+
+    @override_settings(
+        RATE_LIMIT={'ENABLED': True, 'STORE': 'users.ratelimit.LocalStore', 'RATES': {'login': {'ip': '1/m'}}},
+    )
+    async def test_login_is_throttled(self) -> None:  # noqa: D102
+        data = {'username': 'student', 'password': 'wrong'}
+        self.assertEqual((await self.post('/api/users/login/', data)).status_code, 400)
+        response = await self.post('/api/users/login/', data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class CsrfMiddlewareTests(TestCase):
+    '''Маскирование CSRF-токена и проверка доверенных источников.'''
+
+    def test_wire_format_is_unchanged(self) -> None:  # noqa: D102
+        for _ in range(200):
+            secret = CSRF._get_new_csrf_string()  # noqa: SLF001
+            self.assertRegex(secret, r'^[a-zA-Z0-9]{32}$')
+            token = CSRF._mask_cipher_secret(secret)  # noqa: SLF001
+            self.assertEqual(reference_unmask(token), secret)
+            self.assertEqual(CSRF._unmask_cipher_token(token), secret)  # noqa: SLF001
+            self.assertEqual(CSRF._unmask_cipher_token(reference_mask(secret)), secret)  # noqa: SLF001
+
+        edge = 'z' * 32 + '9' * 32
+        self.assertEqual(CSRF._unmask_cipher_token(edge), reference_unmask(edge))  # noqa: SLF001
+
+    @override_settings(CSRF_TRUSTED_ORIGINS=['https://front.example.com', 'https://*.mai.ru', 'http://*.local:8000'])
+    def test_trusted_origins(self) -> None:  # noqa: D102
+        middleware = CSRF.CsrfViewMiddleware(lambda _request: None)
+        cases = {
+            'https://front.example.com': True,
+            'https://lk.mai.ru': True,
+            'https://a.b.mai.ru': True,
+            'https://mai.ru': True,
+            'https://evilmai.ru': False,
+            'http://lk.mai.ru': False,
+            'http://app.local:8000': True,
+            'http://app.local': False,
+        }
+        for origin, trusted in cases.items():
+            request = RequestFactory().post('/', HTTP_ORIGIN=origin)
+            self.assertEqual(middleware._origin_verified(request), trusted, origin)  # noqa: SLF001
+
+        hosts = ['front.example.com', '.mai.ru', '.', '']
+        matcher = CSRF.DomainMatcher(hosts)
+        for host in ['lk.mai.ru', 'LK.mai.ru', 'mai.ru', 'front.example.com', 'example.com', 'x.', '']:
+            self.assertEqual(matcher(host), any(is_same_domain(host, pattern) for pattern in hosts), host)
@@ -5,28 +5,38 @@ URL маршруты для приложения пользователей.
 '''
 
 
+from django.conf import settings as django_settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 
+# Под ASGI регистрация, вход, профиль и статус обслуживаются async views.
+api_views = async_views if django_settings.USERS_ASYNC_VIEWS else views
+
 urlpatterns = [
     # Эндпоинт для регистрации нового пользователя
     # POST /api/users/register/
-    path('register/', views.register_view, name='register'),
+    path('register/', api_views.register_view, name='register'),
     # Эндпоинт для входа в систему
     # POST /api/users/login/
-    path('login/', views.login_view, name='login'),
+    path('login/', api_views.login_view, name='login'),
     # Эндпоинт для выхода из системы
     # POST /api/users/logout/
     path('logout/', views.logout_view, name='logout'),
     # Эндпоинт для получения профиля текущего пользователя
     # GET /api/users/profile/
-    path('profile/', views.profile_view, name='profile'),
+    path('profile/', api_views.profile_view, name='profile'),
     # Эндпоинт для обновления профиля пользователя
     # PUT, PATCH /api/users/profile/update/
     path('profile/update/', views.update_profile_view, name='update_profile'),
+    # Эндпоинт сводки прогресса по курсам: пройдено, потрачено, процент каталога
+    # GET /api/users/profile/progress/
+    path('profile/progress/', views.progress_view, name='profile_progress'),
     # Эндпоинт для проверки статуса аутентификации
     # GET /api/users/auth-status/
-    path('auth-status/', views.auth_status_view, name='auth_status'),
+    path('auth-status/', api_views.auth_status_view, name='auth_status'),
+    # Статистика ограничения частоты запросов (только для администраторов)
+    # GET /api/users/rate-limit-stats/
+    path('rate-limit-stats/', views.rate_limit_stats_view, name='rate_limit_stats'),
 ]
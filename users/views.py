@@ -4,22 +4,43 @@ Views для аутентификации и управления пользов
 Содержит API endpoints для регистрации, входа, выхода и получения профиля.
 '''
 
+from contextlib import suppress
+
 from django.conf import settings as django_settings
 from django.contrib.auth import login, logout
+from django.db.models import QuerySet
+from django.http import HttpResponseBase
 from django.middleware.csrf import get_token
 from django.utils.cache import patch_vary_headers
+from django.utils.translation import gettext_lazy as _
 from rest_framework import permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from courses.cache import catalog_cache
+from courses.models import CompletedCourse, Course
+from django_mai.conditional import conditional_response, make_etag, set_validators
 
+from .cache import ProfileEntry, profile_cache, progress_cache
+from .denylist import token_denylist
+from .models import User
+from .ratelimit import LoginRateThrottle, RegisterRateThrottle, metrics
 from .serializers import (
     LoginSerializer,
+    ProgressSerializer,
     UserRegistrationSerializer,
     UserSerializer,
 )
 
 
+# Ответы профиля зависят от пользователя: JWT приходит в Authorization, сессия - в Cookie.
+USER_VARY = ('Authorization', 'Cookie')
+
+
 @api_view(['GET'])
 def get_csrf_cookie(request: Request) -> Response:
     '''API for getting an CSRF token for other API requests.'''
@@ -41,6 +62,7 @@ def get_csrf_cookie(request: Request) -> Response:
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([RegisterRateThrottle])
 def register_view(request: Request) -> Response:
     '''
     API endpoint для регистрации нового пользователя.
@@ -82,6 +104,7 @@ def register_view(request: Request) -> Response:
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login_view(request: Request) -> Response:
     '''
     API endpoint для входа пользователя в систему.
@@ -124,11 +147,17 @@ def logout_view(request: Request) -> Response:
     '''
     API endpoint для выхода пользователя из системы.
 
-    Требует аутентификации. Завершает сессию пользователя.
+    Требует аутентификации. Завершает сессию пользователя и отзывает
+    access-токен запроса, а также refresh-токен, если он передан в поле `refresh`.
     '''
     # try:
     # Выходим пользователя из системы
     logout(request)
+    if isinstance(request.auth, Token):
+        token_denylist.revoke(request.auth)
+    if refresh := request.data.get('refresh'):
+        with suppress(TokenError):
+            token_denylist.revoke(RefreshToken(refresh))
 
     return Response(
         {'message': 'Успешный выход из системы'}, status=status.HTTP_200_OK
@@ -141,21 +170,55 @@ def logout_view(request: Request) -> Response:
     #     )
 
 
+def user_queryset(fields: tuple[str, ...] | None = None) -> QuerySet:
+    '''Пользователи только с колонками, которые выводит UserSerializer, и updated_at для валидаторов.'''
+    return UserSerializer(fields=fields).project(User.objects, 'updated_at')
+
+
+def load_user(pk: int, fields: tuple[str, ...] | None = None) -> User:
+    '''Загружает текущего пользователя одним запросом.'''
+    try:
+        return user_queryset(fields).get(pk=pk)
+    except User.DoesNotExist as exc:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+
+
+def get_profile_entry(pk: int) -> ProfileEntry:
+    '''Возвращает готовые ответы пользователя из кэша, при промахе загружая его.'''
+    entry = profile_cache.get(pk)
+    if entry is None:
+        entry = profile_cache.set(profile_cache.build(load_user(pk)))
+    return entry
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def profile_view(request: Request) -> Response:
+def profile_view(request: Request) -> HttpResponseBase:
     '''
     API endpoint для получения профиля текущего пользователя.
 
     Требует аутентификации. Возвращает данные профиля пользователя.
+    Поддерживает условные запросы (If-None-Match / If-Modified-Since):
+    если профиль не менялся, возвращает 304 без сериализации.
+    Полный ответ берется из кэша профилей (users.cache), `?fields=a,b`
+    возвращает только перечисленные поля.
     '''
-    user = request.user
-    serializer = UserSerializer(user)
-
-    return Response(
-        serializer.data,
-        status=status.HTTP_200_OK,
+    fields = UserSerializer.parse_fields(request.query_params.get('fields'))
+    if fields is None:
+        entry = get_profile_entry(request.user.pk)
+        etag, updated_at = entry.etag, entry.updated_at
+    else:
+        user = load_user(request.user.pk, fields)
+        etag, updated_at = make_etag(user.pk, user.updated_at.isoformat(), *fields), user.updated_at
+    not_modified = conditional_response(request, etag, updated_at, vary=USER_VARY)
+    if not_modified is not None:
+        return not_modified
+
+    # Полный профиль - готовые байты из кэша: ни сериализатор, ни рендерер не вызываются.
+    response = (
+        entry.response(entry.profile) if fields is None else Response(UserSerializer(user, fields=fields).data)
     )
+    return set_validators(response, etag, updated_at, vary=USER_VARY)
 
     # except Exception as e:
     #     return Response(
@@ -164,6 +227,29 @@ def profile_view(request: Request) -> Response:
     #     )
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def progress_view(request: Request) -> Response:
+    '''
+    API endpoint сводки прогресса текущего пользователя по курсам.
+
+    Возвращает число пройденных курсов, их суммарную стоимость и долю
+    пройденных курсов каталога в процентах. Число и стоимость считаются
+    одним агрегирующим запросом и кэшируются для пользователя
+    (users.cache), число курсов каталога - один раз на версию каталога.
+    '''
+    user_id = request.user.pk
+    progress = progress_cache.get_or_set(user_id, lambda: CompletedCourse.objects.progress(user_id))
+    total_courses = catalog_cache.remember('course_count', Course.objects.count)
+    completed = progress['courses_completed']
+    percentage = round(completed * 100 / total_courses, 2) if total_courses else 0.0
+    return Response(
+        ProgressSerializer(
+            {**progress, 'total_courses': total_courses, 'completion_percentage': percentage},
+        ).data,
+    )
+
+
 @api_view(['PUT', 'PATCH'])
 @permission_classes([permissions.IsAuthenticated])
 def update_profile_view(request: Request) -> Response:
@@ -210,20 +296,35 @@ def update_profile_view(request: Request) -> Response:
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def auth_status_view(request: Request) -> Response:
+def auth_status_view(request: Request) -> HttpResponseBase:
     '''
     API endpoint для проверки статуса аутентификации.
 
     Возвращает информацию о том, аутентифицирован ли пользователь.
-    Если да - возвращает данные пользователя.
+    Если да - возвращает данные пользователя (`?fields=a,b` - только
+    перечисленные поля).
     '''
-    if request.user.is_authenticated:
-        serializer = UserSerializer(request.user)
-        return Response(
-            {'is_authenticated': True, 'user': serializer.data},
-            status=status.HTTP_200_OK,
+    if not request.user.is_authenticated:
+        response = Response(
+            {'is_authenticated': False, 'user': None}, status=status.HTTP_200_OK
         )
+    elif (fields := UserSerializer.parse_fields(request.query_params.get('fields'))) is None:
+        entry = get_profile_entry(request.user.pk)
+        response = entry.response(entry.auth_status)
+    else:
+        user = UserSerializer(load_user(request.user.pk, fields), fields=fields)
+        response = Response({'is_authenticated': True, 'user': user.data}, status=status.HTTP_200_OK)
+    patch_vary_headers(response, USER_VARY)
+    return response
 
-    return Response(
-        {'is_authenticated': False, 'user': None}, status=status.HTTP_200_OK
-    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def rate_limit_stats_view(request: Request) -> Response:  # noqa: ARG001
+    '''
+    API endpoint со статистикой ограничения частоты запросов.
+
+    Возвращает число пропущенных и отклоненных запросов этого процесса
+    для каждого scope и правила.
+    '''
+    return Response({'store': django_settings.RATE_LIMIT['STORE'], 'scopes': metrics.stats()})